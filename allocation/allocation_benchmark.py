@@ -0,0 +1,205 @@
+import datetime
+import json
+import random
+import resource
+import sys
+import time
+from typing import Dict, List, Optional
+
+from allocation.allocation_data_builder import set_mock_opening_hour_data
+from allocation.allocation_models import (
+    AllocationBasket,
+    AllocationData,
+    AllocationEvent,
+    AllocationSpace,
+)
+from allocation.allocation_solver import AllocationSolver, AllocationSolverParameters
+from applications.models import EventOccurrence
+
+BENCHMARK_REPORT_VERSION = 1
+
+
+class SyntheticAllocationDataGenerator(object):
+    """Generates AllocationData that resembles a real application round.
+
+    Spaces are grouped into districts and each application event asks for
+    a few spaces of one district, so that the generated rounds have a similar
+    structure as the real ones. Opening hours come from the same mock data
+    that AllocationDataBuilder uses when Hauki is not configured.
+    """
+
+    SPACES_PER_DISTRICT = 10
+    DURATIONS = [60, 90, 120, 180]
+    MAX_PERSONS = [None, 10, 20, 40]
+    NUM_PERSONS = [None, 8, 15, 30]
+
+    def __init__(
+        self,
+        num_spaces: int,
+        num_applications: int,
+        events_per_week: int = 2,
+        num_baskets: int = 3,
+        period_length: int = 90,
+        seed: int = 0,
+        period_start: datetime.date = datetime.date(2021, 1, 4),
+    ):
+        self.num_spaces = num_spaces
+        self.num_applications = num_applications
+        self.events_per_week = events_per_week
+        self.num_baskets = num_baskets
+        self.period_start = period_start
+        self.period_end = period_start + datetime.timedelta(days=period_length - 1)
+        self.random = random.Random(seed)
+        self._next_id = 1
+
+    def _generate_id(self) -> int:
+        generated_id = self._next_id
+        self._next_id += 1
+        return generated_id
+
+    def generate_spaces(self) -> Dict[int, AllocationSpace]:
+        spaces = {}
+        for _ in range(self.num_spaces):
+            space = AllocationSpace(
+                id=self._generate_id(),
+                max_persons=self.random.choice(self.MAX_PERSONS),
+                period_start=self.period_start,
+                period_end=self.period_end,
+            )
+            spaces[space.id] = set_mock_opening_hour_data(
+                space, self.period_start, self.period_end
+            )
+        return spaces
+
+    def generate_event(self, space_ids: List[int]) -> AllocationEvent:
+        district = self.random.randrange(
+            0, max(len(space_ids) // self.SPACES_PER_DISTRICT, 1)
+        )
+        first_space = district * self.SPACES_PER_DISTRICT
+        district_space_ids = space_ids[
+            first_space : first_space + self.SPACES_PER_DISTRICT  # noqa: E203
+        ]
+        duration = datetime.timedelta(minutes=self.random.choice(self.DURATIONS))
+        occurrences = {}
+        for weekday in self.random.sample(
+            range(7), min(7, self.events_per_week + self.random.randint(0, 2))
+        ):
+            begin_hour = self.random.randint(10, 19)
+            occurrences[self._generate_id()] = EventOccurrence(
+                weekday=weekday,
+                begin=datetime.time(hour=begin_hour),
+                end=datetime.time(hour=min(begin_hour + self.random.randint(2, 5), 22)),
+                occurrences=[],
+            )
+        return AllocationEvent(
+            id=self._generate_id(),
+            occurrences=occurrences,
+            period_start=self.period_start,
+            period_end=self.period_end,
+            space_ids=self.random.sample(
+                district_space_ids,
+                self.random.randint(1, min(3, len(district_space_ids))),
+            ),
+            begin=self.period_start,
+            end=self.period_end,
+            min_duration=duration,
+            max_duration=duration,
+            events_per_week=self.events_per_week,
+            num_persons=self.random.choice(self.NUM_PERSONS),
+        )
+
+    def generate(self) -> AllocationData:
+        spaces = self.generate_spaces()
+        space_ids = list(spaces.keys())
+        events = []
+        for _ in range(self.num_applications):
+            for _ in range(self.random.randint(1, 3)):
+                events.append(self.generate_event(space_ids))
+
+        baskets = {}
+        for order_number in range(1, self.num_baskets + 1):
+            basket_id = self._generate_id()
+            baskets[basket_id] = AllocationBasket(
+                id=basket_id,
+                order_number=order_number,
+                allocation_percentage=0,
+                events=[event for event in events if self.random.random() < 0.3],
+                score=10 // order_number,
+            )
+        baskets[None] = AllocationBasket(
+            id=None,
+            allocation_percentage=None,
+            order_number=1000,
+            events=events,
+            score=1,
+        )
+        return AllocationData(
+            period_start=self.period_start,
+            period_end=self.period_end,
+            baskets=baskets,
+            spaces=spaces,
+        )
+
+
+def get_peak_rss_kilobytes(who: int = resource.RUSAGE_SELF) -> int:
+    peak_rss = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak_rss // 1024 if sys.platform == "darwin" else peak_rss
+
+
+def solve_with_report(
+    allocation_data: AllocationData, parameters: AllocationSolverParameters
+) -> dict:
+    """Solves the data and reports the timings, model size and memory usage"""
+    solver = AllocationSolver(allocation_data=allocation_data, parameters=parameters)
+    started = time.perf_counter()
+    solution = solver.solve()
+    total_time = time.perf_counter() - started
+
+    return {
+        "parameters": dict(parameters.__dict__),
+        "total_time": total_time,
+        "presolve": {
+            "candidates": solver.presolve_statistics.candidates,
+            "removed": solver.presolve_statistics.removed,
+        },
+        "solver": solver.statistics.as_dict(),
+        "allocated_events": len(solution),
+        "peak_rss_kilobytes": get_peak_rss_kilobytes(),
+        "peak_rss_children_kilobytes": get_peak_rss_kilobytes(resource.RUSAGE_CHILDREN),
+    }
+
+
+class AllocationBenchmark(object):
+    """Runs the allocation solver over generated data and reports the timings"""
+
+    def __init__(
+        self,
+        generator: SyntheticAllocationDataGenerator,
+        parameters: Optional[AllocationSolverParameters] = None,
+    ):
+        self.generator = generator
+        self.parameters = parameters or AllocationSolverParameters()
+
+    def run(self) -> dict:
+        started = time.perf_counter()
+        allocation_data = self.generator.generate()
+        data_build_time = time.perf_counter() - started
+
+        report = {
+            "version": BENCHMARK_REPORT_VERSION,
+            "problem": {
+                "spaces": self.generator.num_spaces,
+                "applications": self.generator.num_applications,
+                "events_per_week": self.generator.events_per_week,
+                "baskets": self.generator.num_baskets,
+                "period_start": self.generator.period_start.isoformat(),
+                "period_end": self.generator.period_end.isoformat(),
+            },
+            "data_build_time": data_build_time,
+        }
+        report.update(solve_with_report(allocation_data, self.parameters))
+        return report
+
+    def run_to_json(self) -> str:
+        return json.dumps(self.run(), indent=2)
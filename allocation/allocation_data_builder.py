@@ -1,26 +1,59 @@
 import datetime
-from itertools import chain
-from typing import Dict, List
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
 
 from django.conf import settings
-from django.utils import timezone
+from django.db.models import OuterRef, Prefetch, Subquery
 
 from allocation.allocation_models import (
     AllocationBasket,
     AllocationData,
     AllocationEvent,
+    AllocationFixedAssignment,
+    AllocationHint,
     AllocationSpace,
 )
-from applications.models import ApplicationEvent, ApplicationRound, ApplicationStatus
-from opening_hours.hours import get_opening_hours
+from applications.models import (
+    ApplicationEvent,
+    ApplicationEventSchedule,
+    ApplicationEventScheduleResult,
+    ApplicationEventStatus,
+    ApplicationRound,
+    ApplicationStatus,
+    EventOccurrence,
+)
+from opening_hours.hours_cache import get_opening_hours
 from reservation_units.models import ReservationUnit
 
+logger = logging.getLogger(__name__)
+
 excluded_application_statuses = [
     ApplicationStatus.DECLINED,
     ApplicationStatus.CANCELLED,
 ]
 
 
+def get_all_dates(period_start: datetime.date, period_end: datetime.date):
+    dates = []
+    start = period_start
+    delta = datetime.timedelta(days=1)
+    while start <= period_end:
+        dates.append(start)
+        start += delta
+    return dates
+
+
+def set_mock_opening_hour_data(
+    space: AllocationSpace, period_start: datetime.date, period_end: datetime.date
+) -> AllocationSpace:
+    # Hardcoded data for dev purposes
+    space.set_daily_opening_hours(
+        start=datetime.time(hour=10), end=datetime.time(hour=22)
+    )
+    return space
+
+
 class AllocationDataBuilder(object):
     def __init__(
         self, application_round: ApplicationRound, output_basket_ids: [int] = []
@@ -30,14 +63,29 @@ class AllocationDataBuilder(object):
         self.application_round = application_round
         self.output_basket_ids = output_basket_ids
         self.baskets = {}
+        # Events in several baskets share the AllocationEvent of the first basket
+        self.allocation_events: Dict[int, AllocationEvent] = {}
+        # Seconds spent waiting for Hauki in get_allocation_data
+        self.hauki_fetch_time = 0.0
 
     def get_allocation_data(self):
+        units = list(
+            self.application_round.reservation_units.prefetch_related("spaces")
+        )
+        opening_hours = {}
+        if settings.HAUKI_API_URL:
+            started = time.perf_counter()
+            opening_hours = self.get_opening_hours_by_unit(units)
+            self.hauki_fetch_time = time.perf_counter() - started
         spaces: dict[int, AllocationSpace] = {}
-        for unit in self.application_round.reservation_units.all():
-            space = self.get_space(unit=unit)
+        for unit in units:
+            space = self.get_space(
+                unit=unit, opening_hours=opening_hours.get(str(unit.uuid), [])
+            )
             spaces[space.id] = space
 
         self.get_event_baskets()
+        fixed_assignments, hints = self.get_previous_results()
 
         return AllocationData(
             period_start=self.period_start,
@@ -45,8 +93,50 @@ class AllocationDataBuilder(object):
             spaces=spaces,
             baskets=self.baskets,
             output_basket_ids=self.output_basket_ids,
+            fixed_assignments=fixed_assignments,
+            hints=hints,
         )
 
+    def get_previous_results(
+        self,
+    ) -> Tuple[List[AllocationFixedAssignment], Dict[int, AllocationHint]]:
+        """Accepted results are pinned, other results are used as solver hints"""
+        fixed_assignments = []
+        hints = {}
+        results = ApplicationEventScheduleResult.objects.filter(
+            application_event_schedule__application_event__application__application_round=self.application_round,  # noqa: E501
+            declined=False,
+        ).select_related("application_event_schedule__application_event")
+        for result in results:
+            schedule = result.application_event_schedule
+            occurrence = EventOccurrence(
+                weekday=result.allocated_day,
+                begin=result.allocated_begin,
+                end=result.allocated_end,
+                occurrences=[],
+            )
+            if result.accepted:
+                fixed_assignments.append(
+                    AllocationFixedAssignment(
+                        space_id=result.allocated_reservation_unit_id,
+                        event_id=schedule.application_event_id,
+                        occurrence_id=schedule.id,
+                        occurrence=occurrence,
+                        period_start=self.period_start,
+                        event_begin=schedule.application_event.begin,
+                    )
+                )
+            else:
+                hints[schedule.id] = AllocationHint(
+                    space_id=result.allocated_reservation_unit_id,
+                    occurrence_id=schedule.id,
+                    basket_id=result.basket_id,
+                    occurrence=occurrence,
+                    period_start=self.period_start,
+                    event_begin=schedule.application_event.begin,
+                )
+        return fixed_assignments, hints
+
     def get_allocation_events(
         self, application_events: [ApplicationEvent]
     ) -> [AllocationEvent]:
@@ -54,69 +144,70 @@ class AllocationDataBuilder(object):
         filtered_events = [
             application_event
             for application_event in application_events
-            if application_event.application.status not in excluded_application_statuses
+            if application_event.latest_application_status
+            not in excluded_application_statuses
         ]
         for application_event in filtered_events:
+            if application_event.id in self.allocation_events:
+                events.append(self.allocation_events[application_event.id])
+                continue
             declined_unit_ids = [
                 unit.id for unit in application_event.declined_reservation_units.all()
             ]
             space_ids = [
-                unit.reservation_unit.id
+                unit.reservation_unit_id
                 for unit in application_event.event_reservation_units.all()
-                if unit.reservation_unit.id not in declined_unit_ids
+                if unit.reservation_unit_id not in declined_unit_ids
             ]
-            events.append(
-                AllocationEvent(
-                    id=application_event.id,
-                    occurrences=application_event.get_not_scheduled_occurrences(),
-                    period_start=self.period_start,
-                    period_end=self.period_end,
-                    space_ids=space_ids,
-                    begin=application_event.begin,
-                    end=application_event.end,
-                    min_duration=application_event.min_duration,
-                    max_duration=application_event.max_duration
-                    if application_event.max_duration is not None
-                    else application_event.min_duration,
-                    events_per_week=application_event.events_per_week,
-                    num_persons=application_event.num_persons,
-                )
+            self.allocation_events[application_event.id] = AllocationEvent(
+                id=application_event.id,
+                occurrences=application_event.get_not_scheduled_occurrences(),
+                period_start=self.period_start,
+                period_end=self.period_end,
+                space_ids=space_ids,
+                begin=application_event.begin,
+                end=application_event.end,
+                min_duration=application_event.min_duration,
+                max_duration=application_event.max_duration
+                if application_event.max_duration is not None
+                else application_event.min_duration,
+                events_per_week=application_event.events_per_week,
+                num_persons=application_event.num_persons,
             )
+            events.append(self.allocation_events[application_event.id])
         return events
 
     def get_all_dates(self):
-        dates = []
-        start = self.period_start
-        delta = datetime.timedelta(days=1)
-        while start <= self.period_end:
-            dates.append(start)
-            start += delta
-        return dates
+        return get_all_dates(self.period_start, self.period_end)
 
     def set_mock_opening_hour_data(self, space: AllocationSpace) -> AllocationSpace:
-        # Hardcoded data for dev purposes
-        all_dates = self.get_all_dates()
-        for the_date in all_dates:
-            space.add_time(
-                start=datetime.datetime(
-                    the_date.year,
-                    the_date.month,
-                    the_date.day,
-                    hour=10,
-                    tzinfo=timezone.get_default_timezone(),
-                ),
-                end=datetime.datetime(
-                    the_date.year,
-                    the_date.month,
-                    the_date.day,
-                    hour=22,
-                    tzinfo=timezone.get_default_timezone(),
-                ),
-            )
-        return space
+        return set_mock_opening_hour_data(space, self.period_start, self.period_end)
+
+    def get_opening_hours_by_unit(
+        self, units: List[ReservationUnit]
+    ) -> Dict[str, List[dict]]:
+        """Fetches opening hours of all units at once.
+
+        get_opening_hours splits the request into chunks and fetches them
+        concurrently. The days are routed back to the units by their origin id,
+        which is the reservation unit uuid.
+        """
+        opening_hours: Dict[str, List[dict]] = {}
+        if not units:
+            return opening_hours
+        for opening_hour in get_opening_hours(
+            [str(unit.uuid) for unit in units],
+            self.application_round.reservation_period_begin,
+            self.application_round.reservation_period_end,
+        ):
+            opening_hours.setdefault(opening_hour["origin_id"], []).append(opening_hour)
+        logger.info("Fetched opening hours for %s units", len(units))
+        return opening_hours
 
-    def get_space(self, unit: ReservationUnit):
-        space = AllocationSpace(
+    def get_space(
+        self, unit: ReservationUnit, opening_hours: Optional[List[dict]] = None
+    ):
+        space = AllocationSpace.from_reservation_unit(
             unit=unit,
             period_start=self.period_start,
             period_end=self.period_end,
@@ -125,86 +216,99 @@ class AllocationDataBuilder(object):
         if not settings.HAUKI_API_URL:
             return self.set_mock_opening_hour_data(space)
 
-        opening_hours = get_opening_hours(
-            f"{unit.uuid}",
-            self.application_round.reservation_period_begin,
-            self.application_round.reservation_period_end,
-        )
+        if opening_hours is None:
+            opening_hours = self.get_opening_hours_by_unit([unit]).get(
+                str(unit.uuid), []
+            )
 
         for opening_hour in opening_hours:
-            date = opening_hour["date"]
-            for time in opening_hour["times"]:
-                space.add_time(
-                    start=datetime.datetime(
-                        year=date.year,
-                        month=date.month,
-                        day=date.day,
-                        hour=time.start_time.hour,
-                        minute=time.start_time.minute,
-                        tzinfo=timezone.get_default_timezone(),
-                    ),
-                    end=datetime.datetime(
-                        year=date.year,
-                        month=date.month,
-                        day=date.day,
-                        hour=time.end_time.hour,
-                        minute=time.end_time.minute,
-                        tzinfo=timezone.get_default_timezone(),
-                    ),
+            for opening_time in opening_hour["times"]:
+                space.add_opening_hours(
+                    date=opening_hour["date"],
+                    start=opening_time.start_time,
+                    end=opening_time.end_time,
                 )
         return space
 
+    def get_application_events(self) -> List[ApplicationEvent]:
+        """All application events of the round with everything the builder reads.
+
+        Latest application and event statuses are annotated instead of read
+        with statuses.last(), so loading the events takes a fixed number of
+        queries regardless of the size of the round.
+        """
+        return list(
+            ApplicationEvent.objects.filter(
+                application__application_round=self.application_round
+            )
+            .annotate(
+                latest_status=Subquery(
+                    ApplicationEventStatus.objects.filter(
+                        application_event=OuterRef("pk")
+                    )
+                    .order_by("-pk")
+                    .values("status")[:1]
+                ),
+                latest_application_status=Subquery(
+                    ApplicationStatus.objects.filter(
+                        application=OuterRef("application_id")
+                    )
+                    .order_by("-pk")
+                    .values("status")[:1]
+                ),
+            )
+            .select_related("application")
+            .prefetch_related(
+                "declined_reservation_units",
+                "event_reservation_units",
+                Prefetch(
+                    "application_event_schedules",
+                    queryset=ApplicationEventSchedule.objects.select_related(
+                        "application_event_schedule_result"
+                    ),
+                ),
+            )
+            .order_by("application_id", "pk")
+        )
+
     def get_event_baskets(self) -> Dict[int, List[int]]:
         event_baskets = {}
-        for (
-            basket_id,
-            application_events,
-        ) in self.application_round.get_application_events_by_basket().items():
-            basket = next(
-                basket
-                for basket in self.application_round.application_round_baskets.filter(
-                    pk=basket_id
-                )
-                if basket.id == basket_id
-            )
-            allocation_basket = AllocationBasket(
+        application_events = self.get_application_events()
+        baskets = self.application_round.application_round_baskets.order_by(
+            "order_number"
+        ).prefetch_related("purposes", "age_groups")
+        for basket in baskets:
+            basket_events = [
+                application_event
+                for application_event in application_events
+                if basket.is_application_event_in_basket(application_event)
+            ]
+            self.baskets[basket.id] = AllocationBasket(
                 id=basket.id,
                 allocation_percentage=basket.allocation_percentage,
                 order_number=basket.order_number,
-                events=self.get_allocation_events(application_events),
+                events=self.get_allocation_events(basket_events),
                 score=basket.get_score(),
             )
+            for application_event in basket_events:
+                event_baskets.setdefault(application_event.id, []).append(basket.id)
 
-            self.baskets[basket_id] = allocation_basket
-            for application_event in application_events:
-                if event_baskets.get(application_event.id):
-                    event_baskets[application_event.id].append(basket_id)
-                else:
-                    event_baskets[application_event.id] = [basket_id]
-
-        all_events = chain(
-            *[
-                filter(
-                    lambda application: application.status
-                    not in excluded_application_statuses,
-                    application.application_events.all(),
-                )
-                for application in self.application_round.applications.all()
-            ]
-        )
         catchall_basket = AllocationBasket(
             id=None,
             allocation_percentage=None,
             order_number=1000,
-            events=self.get_allocation_events(all_events),
+            events=self.get_allocation_events(
+                [
+                    application_event
+                    for application_event in application_events
+                    if application_event.latest_status
+                    not in excluded_application_statuses
+                ]
+            ),
             score=1,
         )
         self.baskets[None] = catchall_basket
-        for application in self.application_round.applications.all():
-            for application_event in application.application_events.all():
-                if event_baskets.get(application_event.id):
-                    event_baskets[application_event.id].append(None)
-                else:
-                    event_baskets[application_event.id] = [None]
+        for application_event in application_events:
+            event_baskets.setdefault(application_event.id, []).append(None)
 
         return event_baskets
@@ -0,0 +1,111 @@
+from typing import Dict, List, Optional
+
+from allocation.allocation_index import AllocationEligibilityIndex
+from allocation.allocation_models import AllocationBasket, AllocationData
+
+
+class AllocationDecomposer(object):
+    """Splits allocation data into independent subproblems.
+
+    Events and spaces form a bipartite graph where an edge is an eligible
+    (event, space) pair. Events in different connected components never
+    compete for the same space, so each component can be solved as its own
+    model and the results merged.
+    """
+
+    def __init__(
+        self,
+        allocation_data: AllocationData,
+        index: Optional[AllocationEligibilityIndex] = None,
+    ):
+        self.allocation_data = allocation_data
+        self.index = index or AllocationEligibilityIndex(allocation_data)
+        self._parents: Dict[int, int] = {}
+
+    def _find(self, space_id: int) -> int:
+        root = space_id
+        while self._parents[root] != root:
+            root = self._parents[root]
+        while self._parents[space_id] != root:
+            self._parents[space_id], space_id = root, self._parents[space_id]
+        return root
+
+    def _union(self, first: int, second: int):
+        first_root = self._find(first)
+        second_root = self._find(second)
+        if first_root != second_root:
+            self._parents[second_root] = first_root
+
+    def components(self) -> List[AllocationData]:
+        event_space_ids: Dict[int, List[int]] = {}
+        for event_id, candidates in self.index.event_candidates.items():
+            event_space_ids[event_id] = list(
+                dict.fromkeys(space_id for space_id, _, _ in candidates)
+            )
+
+        self._parents = {
+            space_id: space_id
+            for space_ids in event_space_ids.values()
+            for space_id in space_ids
+        }
+        for space_ids in event_space_ids.values():
+            for space_id in space_ids[1:]:
+                self._union(space_ids[0], space_id)
+
+        component_event_ids: Dict[int, set] = {}
+        component_space_ids: Dict[int, List[int]] = {}
+        for space_id in self._parents.keys():
+            component_space_ids.setdefault(self._find(space_id), []).append(space_id)
+        for event_id, space_ids in event_space_ids.items():
+            component_event_ids.setdefault(self._find(space_ids[0]), set()).add(
+                event_id
+            )
+
+        return [
+            self._build_component(
+                space_ids=component_space_ids[root],
+                event_ids=component_event_ids[root],
+            )
+            for root in component_event_ids.keys()
+        ]
+
+    def _build_component(self, space_ids: List[int], event_ids: set) -> AllocationData:
+        baskets = {}
+        for basket_id, basket in self.allocation_data.baskets.items():
+            events = [event for event in basket.events if event.id in event_ids]
+            if not events:
+                continue
+            baskets[basket_id] = AllocationBasket(
+                id=basket.id,
+                order_number=basket.order_number,
+                allocation_percentage=basket.allocation_percentage,
+                events=events,
+                score=basket.score,
+            )
+
+        occurrence_ids = {
+            occurrence_id
+            for event_id in event_ids
+            for occurrence_id in self.index.events[event_id].occurrences.keys()
+        }
+        return AllocationData(
+            period_start=self.allocation_data.period_start,
+            period_end=self.allocation_data.period_end,
+            baskets=baskets,
+            spaces={
+                space_id: self.allocation_data.spaces[space_id]
+                for space_id in space_ids
+            },
+            output_basket_ids=self.allocation_data.output_basket_ids,
+            fixed_assignments=[
+                fixed_assignment
+                for fixed_assignment in self.allocation_data.fixed_assignments
+                if fixed_assignment.space_id in space_ids
+                or fixed_assignment.event_id in event_ids
+            ],
+            hints={
+                occurrence_id: hint
+                for occurrence_id, hint in self.allocation_data.hints.items()
+                if occurrence_id in occurrence_ids
+            },
+        )
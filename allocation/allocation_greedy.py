@@ -0,0 +1,93 @@
+import bisect
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+
+from allocation.allocation_index import AllocationEligibilityIndex, CandidateKey
+
+
+def earliest_free_start(
+    busy: List[Tuple[int, int]], window_start: int, window_end: int, duration: int
+) -> Optional[int]:
+    """Earliest start in the window at which duration fits between the sorted,
+    non overlapping busy intervals of a space"""
+    start = window_start
+    position = max(bisect.bisect_right(busy, (start, start)) - 1, 0)
+    for busy_start, busy_end in islice(busy, position, None):
+        if busy_start >= start + duration:
+            break
+        if busy_end > start:
+            start = busy_end
+    return start if start + duration <= window_end else None
+
+
+class GreedyAllocator(object):
+    """Quick heuristic allocation over the eligibility index.
+
+    Events are taken in basket order, longest first, and each of their
+    occurrences is placed at the earliest free start on the first space that
+    has room, until the event has its events per week. The result is feasible
+    but not optimal. It is a first draft in a fraction of the solver's time and
+    a starting point for the solver.
+    """
+
+    def __init__(self, index: AllocationEligibilityIndex):
+        self.index = index
+
+    def ordered_event_ids(self) -> List[int]:
+        return sorted(
+            self.index.event_candidates.keys(),
+            key=lambda event_id: (
+                self.index.baskets[self.index.event_basket[event_id]].order_number,
+                -self.index.events[event_id].min_duration,
+                event_id,
+            ),
+        )
+
+    def allocate(self) -> Dict[CandidateKey, Tuple[int, int]]:
+        busy: Dict[int, List[Tuple[int, int]]] = {}
+        for space_id, fixed_assignments in self.index.fixed_assignments.items():
+            busy[space_id] = sorted(
+                (
+                    fixed_assignment.occurrence.begin,
+                    fixed_assignment.occurrence.end,
+                )
+                for fixed_assignment in fixed_assignments
+            )
+
+        assignments = {}
+        for event_id in self.ordered_event_ids():
+            duration = self.index.events[event_id].min_duration
+            remaining = self.index.remaining_events_per_week(event_id)
+            occurrence_candidates: Dict[int, List[CandidateKey]] = {}
+            for key in self.index.event_candidates[event_id]:
+                occurrence_candidates.setdefault(key[2], []).append(key)
+
+            for candidates in occurrence_candidates.values():
+                if remaining <= 0:
+                    break
+                for key in candidates:
+                    space_busy = busy.setdefault(key[0], [])
+                    start = self.earliest_start(space_busy, key, duration)
+                    if start is not None:
+                        bisect.insort(space_busy, (start, start + duration))
+                        assignments[key] = (start, start + duration)
+                        remaining -= 1
+                        break
+        return assignments
+
+    def earliest_start(
+        self, busy: List[Tuple[int, int]], key: CandidateKey, duration: int
+    ) -> Optional[int]:
+        for window_start, window_end in self.index.windows(key):
+            start = earliest_free_start(busy, window_start, window_end, duration)
+            if start is not None:
+                return start
+        return None
+
+    def objective_value(self, assignments: Dict[CandidateKey, Tuple[int, int]]):
+        return float(
+            sum(
+                self.index.events[key[1]].min_duration * self.index.score(key[1])
+                for key in assignments
+            )
+        )
@@ -0,0 +1,255 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from allocation.allocation_models import (
+    AllocationData,
+    AllocationEvent,
+    AllocationFixedAssignment,
+    AllocationHint,
+    AllocationOccurrence,
+    AllocationOccurrenceTable,
+    AllocationSpace,
+)
+
+# (space_id, event_id, occurrence_id)
+CandidateKey = Tuple[int, int, int]
+
+
+def has_room_for_persons(space: AllocationSpace, event: AllocationEvent):
+    return (
+        space.max_persons is None
+        or event.num_persons is None
+        or space.max_persons >= event.num_persons
+    )
+
+
+def suitable_spaces_for_event(
+    allocation_event: AllocationEvent, spaces: Dict[int, AllocationSpace]
+) -> Dict[int, AllocationSpace]:
+    suitable_spaces = {}
+    for space_id, space in spaces.items():
+        if space_id in allocation_event.space_ids and has_room_for_persons(
+            space, allocation_event
+        ):
+            suitable_spaces[space_id] = space
+    return suitable_spaces
+
+
+def determine_time_windows(
+    table: AllocationOccurrenceTable,
+    space: AllocationSpace,
+    occurrence_rows: np.ndarray,
+) -> List[List[Tuple[int, int]]]:
+    """Opening windows of the space in which each occurrence fits.
+
+    The windows are cut to the requested times of the occurrence, and the ones
+    that are shorter than the event duration are left out.
+    """
+    begins = table.begins[occurrence_rows]
+    ends = table.ends[occurrence_rows]
+    firsts = np.searchsorted(space.window_ends, begins, side="right")
+    counts = np.maximum(
+        np.searchsorted(space.window_starts, ends, side="left") - firsts, 0
+    )
+    # One row for each overlapping (occurrence, window) pair
+    occurrences = np.repeat(np.arange(len(occurrence_rows)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    windows = np.repeat(firsts, counts) + offsets
+    starts = np.maximum(space.window_starts[windows], begins[occurrences])
+    window_ends = np.minimum(space.window_ends[windows], ends[occurrences])
+    fits = starts + table.durations[occurrence_rows][occurrences] <= window_ends
+
+    time_windows = [[] for _ in range(len(occurrence_rows))]
+    for occurrence, start, end in zip(
+        occurrences[fits].tolist(), starts[fits].tolist(), window_ends[fits].tolist()
+    ):
+        time_windows[occurrence].append((start, end))
+    return time_windows
+
+
+class PresolveStatistics(object):
+    """Counts of the (space, event, occurrence) candidates dropped before
+    the model is built, grouped by the reason they can never be allocated."""
+
+    def __init__(self):
+        self.candidates = 0
+        self.removed_no_opening_window = 0
+        self.removed_over_capacity = 0
+
+    @property
+    def removed(self) -> int:
+        return self.removed_no_opening_window + self.removed_over_capacity
+
+    @property
+    def remaining(self) -> int:
+        return self.candidates - self.removed
+
+    def as_dict(self) -> dict:
+        return {
+            "candidates": self.candidates,
+            "removed_no_opening_window": self.removed_no_opening_window,
+            "removed_over_capacity": self.removed_over_capacity,
+        }
+
+    def __str__(self):
+        return (
+            "{} of {} candidates removed (no opening window: {}, "
+            "over capacity: {})".format(
+                self.removed,
+                self.candidates,
+                self.removed_no_opening_window,
+                self.removed_over_capacity,
+            )
+        )
+
+
+class AllocationEligibilityIndex(object):
+    """Lookup tables of the feasible (space, event, occurrence) combinations.
+
+    Built once from AllocationData so that the solver constraints and the solution
+    extraction iterate only over eligible combinations instead of rescanning
+    every space for every event on each pass.
+
+    An event that belongs to several baskets has one candidate per space and
+    occurrence. It is attributed to the basket with the best score, which sets
+    its weight in the objective and the basket reported in the solution.
+
+    Building the index also presolves the problem: combinations on units too
+    small for the event or units without an opening window that fits the event
+    duration are dropped and counted in presolve_statistics.
+    """
+
+    def __init__(self, allocation_data: AllocationData):
+        self.spaces: Dict[int, AllocationSpace] = allocation_data.spaces
+        self.baskets = allocation_data.baskets
+        self.events: Dict[int, AllocationEvent] = {}
+        self.event_baskets: Dict[int, List[Optional[int]]] = {}
+        self.event_basket: Dict[int, Optional[int]] = {}
+        self.event_space_ids: Dict[int, List[int]] = {}
+        self.candidates: List[CandidateKey] = []
+        self.space_candidates: Dict[int, List[CandidateKey]] = {}
+        self.event_candidates: Dict[int, List[CandidateKey]] = {}
+        self.occurrence_candidates: Dict[int, List[CandidateKey]] = {}
+        self.time_windows: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        self.fixed_assignments: Dict[int, List[AllocationFixedAssignment]] = {}
+        self.fixed_event_counts: Dict[int, int] = {}
+        self.hints: Dict[int, AllocationHint] = allocation_data.hints
+        self.presolve_statistics = PresolveStatistics()
+        self._attribute_events()
+        self.occurrence_table = AllocationOccurrenceTable(
+            self.events.values(), allocation_data.period_start
+        )
+        self._build()
+        self._build_fixed_assignments(allocation_data.fixed_assignments)
+
+    def _attribute_events(self):
+        for basket in self.baskets.values():
+            for event in basket.events:
+                if event.id not in self.events:
+                    self.events[event.id] = event
+                    self.event_baskets[event.id] = []
+                    self.event_basket[event.id] = basket.id
+                    self.event_space_ids[event.id] = list(
+                        suitable_spaces_for_event(event, self.spaces).keys()
+                    )
+                elif basket.score > self.baskets[self.event_basket[event.id]].score:
+                    self.event_basket[event.id] = basket.id
+                self.event_baskets[event.id].append(basket.id)
+
+    def _build(self):
+        statistics = self.presolve_statistics
+        basket_order = {basket_id: i for i, basket_id in enumerate(self.baskets)}
+        # Candidates are ordered by the attributed basket, so that the solution
+        # lists the events of the higher priority baskets first.
+        ordered_events = sorted(
+            self.events.values(),
+            key=lambda event: basket_order[self.event_basket[event.id]],
+        )
+        pairs: List[CandidateKey] = []
+        for event in ordered_events:
+            requested_space_ids = [
+                space_id for space_id in event.space_ids if space_id in self.spaces
+            ]
+
+            for occurrence_id in event.occurrences.keys():
+                for space_id in requested_space_ids:
+                    statistics.candidates += 1
+                    if not has_room_for_persons(self.spaces[space_id], event):
+                        statistics.removed_over_capacity += 1
+                        continue
+                    pairs.append((space_id, event.id, occurrence_id))
+
+        for key, windows in zip(pairs, self._determine_time_windows(pairs)):
+            space_id, event_id, occurrence_id = key
+            self.time_windows[(space_id, occurrence_id)] = windows
+            if not windows:
+                statistics.removed_no_opening_window += 1
+                continue
+
+            self.candidates.append(key)
+            self.space_candidates.setdefault(space_id, []).append(key)
+            self.event_candidates.setdefault(event_id, []).append(key)
+            self.occurrence_candidates.setdefault(occurrence_id, []).append(key)
+
+    def _determine_time_windows(
+        self, pairs: List[CandidateKey]
+    ) -> List[List[Tuple[int, int]]]:
+        positions_by_space: Dict[int, List[int]] = {}
+        for position, key in enumerate(pairs):
+            positions_by_space.setdefault(key[0], []).append(position)
+
+        pair_windows: List[List[Tuple[int, int]]] = [[] for _ in pairs]
+        for space_id, positions in positions_by_space.items():
+            space_windows = determine_time_windows(
+                self.occurrence_table,
+                self.spaces[space_id],
+                np.array(
+                    [
+                        self.occurrence_table.rows[pairs[position][2]]
+                        for position in positions
+                    ]
+                ),
+            )
+            for position, windows in zip(positions, space_windows):
+                pair_windows[position] = windows
+        return pair_windows
+
+    def _build_fixed_assignments(
+        self, fixed_assignments: List[AllocationFixedAssignment]
+    ):
+        for fixed_assignment in fixed_assignments:
+            self.fixed_event_counts[fixed_assignment.event_id] = (
+                self.fixed_event_counts.get(fixed_assignment.event_id, 0) + 1
+            )
+            if fixed_assignment.space_id in self.spaces:
+                self.fixed_assignments.setdefault(fixed_assignment.space_id, []).append(
+                    fixed_assignment
+                )
+
+    def remaining_events_per_week(self, event_id: int) -> int:
+        return max(
+            self.events[event_id].events_per_week
+            - self.fixed_event_counts.get(event_id, 0),
+            0,
+        )
+
+    def score(self, event_id: int) -> int:
+        return self.baskets[self.event_basket[event_id]].score
+
+    def hint(self, key: CandidateKey) -> Optional[AllocationHint]:
+        """Previous result for the candidate's occurrence if it was on the same space"""
+        space_id, event_id, occurrence_id = key
+        hint = self.hints.get(occurrence_id)
+        if hint is None or hint.space_id != space_id:
+            return None
+        return hint
+
+    def occurrence(self, key: CandidateKey) -> AllocationOccurrence:
+        space_id, event_id, occurrence_id = key
+        return self.events[event_id].occurrences[occurrence_id]
+
+    def windows(self, key: CandidateKey) -> List[Tuple[int, int]]:
+        """Opening windows in which the candidate fits, sorted by start"""
+        space_id, event_id, occurrence_id = key
+        return self.time_windows[(space_id, occurrence_id)]
@@ -1,7 +1,8 @@
 import datetime
 import math
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 from django.utils import timezone
 
 from applications.models import EventOccurrence
@@ -27,51 +28,157 @@ def integer_to_time_from_precision(integer_time: int):
     return datetime.time.min() + integer_time * ALLOCATION_PRECISION
 
 
+# Number of ALLOCATION_PRECISION units in a day
+UNITS_PER_DAY = 24 * 60 // ALLOCATION_PRECISION
+
+
+def time_to_integer_with_precision(time: datetime.time) -> int:
+    seconds = time.hour * 3600 + time.minute * 60 + time.second
+    return -(-seconds // (ALLOCATION_PRECISION * 60))
+
+
+def merge_windows(
+    starts: np.ndarray, ends: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Sorts the windows and merges the ones that overlap or touch"""
+    if len(starts) == 0:
+        return starts, ends
+    order = np.argsort(starts, kind="stable")
+    starts = starts[order]
+    ends = ends[order]
+    reached = np.maximum.accumulate(ends)
+    first_of_merged = np.concatenate(([True], starts[1:] > reached[:-1]))
+    return (
+        starts[first_of_merged],
+        np.maximum.reduceat(ends, np.flatnonzero(first_of_merged)),
+    )
+
+
 class AllocationSpace(object):
-    """Would like to have some proper definition here"""
+    """Reservation unit and its opening windows during the period.
+
+    The windows are kept sorted and merged in two arrays, in
+    ALLOCATION_PRECISION units from the beginning of the period, so a day can
+    have several windows. Windows are added in any order and merged when they
+    are first read.
+    """
 
     def __init__(
         self,
-        unit: ReservationUnit,
+        id: int,
+        max_persons: Optional[int],
         period_start: datetime.date,
         period_end: datetime.date,
     ):
-        self.id = unit.id
+        self.id = id
         self._period_start = period_start
         self._period_end = period_end
-        self.available_times: Dict[datetime.date, AvailableTime] = {}
-        self.max_persons = unit.get_max_persons()
+        self._window_starts = np.empty(0, dtype=np.int32)
+        self._window_ends = np.empty(0, dtype=np.int32)
+        self._added: List[Tuple[int, int]] = []
+        self.max_persons = max_persons
 
-    def add_time(self, start: datetime, end: datetime):
-        start_delta = time_delta_to_integer_with_precision(
-            (
-                start
-                - datetime.datetime(
-                    year=self._period_start.year,
-                    month=self._period_start.month,
-                    day=self._period_start.day,
-                    hour=0,
-                    minute=0,
-                    second=0,
-                    tzinfo=timezone.get_default_timezone(),
-                )
-            )
+    @classmethod
+    def from_reservation_unit(
+        cls,
+        unit: ReservationUnit,
+        period_start: datetime.date,
+        period_end: datetime.date,
+    ) -> "AllocationSpace":
+        return cls(
+            id=unit.id,
+            max_persons=unit.get_max_persons(),
+            period_start=period_start,
+            period_end=period_end,
         )
-        end_delta = time_delta_to_integer_with_precision(
-            (
-                end
-                - datetime.datetime(
-                    year=self._period_start.year,
-                    month=self._period_start.month,
-                    day=self._period_start.day,
-                    hour=0,
-                    minute=0,
-                    second=0,
-                    tzinfo=timezone.get_default_timezone(),
-                )
+
+    def _merge_added(self):
+        if self._added:
+            added = np.array(self._added, dtype=np.int32)
+            self._added = []
+            self._window_starts, self._window_ends = merge_windows(
+                np.concatenate((self._window_starts, added[:, 0])),
+                np.concatenate((self._window_ends, added[:, 1])),
             )
+
+    @property
+    def window_starts(self) -> np.ndarray:
+        self._merge_added()
+        return self._window_starts
+
+    @property
+    def window_ends(self) -> np.ndarray:
+        self._merge_added()
+        return self._window_ends
+
+    @property
+    def available_times(self) -> Dict[datetime.date, List[AvailableTime]]:
+        available_times = {}
+        for start, end in zip(self.window_starts.tolist(), self.window_ends.tolist()):
+            date = self._period_start + datetime.timedelta(days=start // UNITS_PER_DAY)
+            available_times.setdefault(date, []).append(AvailableTime(start, end))
+        return available_times
+
+    def in_period(self, date: datetime.date) -> bool:
+        return self._period_start <= date <= self._period_end
+
+    def add_window(self, start: int, end: int):
+        """Opens the space from start to end, in ALLOCATION_PRECISION units from
+        the beginning of the period. Empty windows are ignored."""
+        if end > start:
+            self._added.append((start, end))
+
+    def add_opening_hours(
+        self, date: datetime.date, start: datetime.time, end: datetime.time
+    ):
+        """Opens the space on the date, dates outside the period are ignored"""
+        if self.in_period(date):
+            day_start = (date - self._period_start).days * UNITS_PER_DAY
+            self.add_window(
+                day_start + time_to_integer_with_precision(start),
+                day_start + time_to_integer_with_precision(end),
+            )
+
+    def set_daily_opening_hours(self, start: datetime.time, end: datetime.time):
+        """Opens the space at the same hours on every day of the period"""
+        num_days = max((self._period_end - self._period_start).days + 1, 0)
+        day_starts = np.arange(num_days, dtype=np.int32) * UNITS_PER_DAY
+        self._added = []
+        self._window_starts, self._window_ends = merge_windows(
+            day_starts + time_to_integer_with_precision(start),
+            day_starts + time_to_integer_with_precision(end),
+        )
+
+    def add_time(self, start: datetime, end: datetime):
+        if not self.in_period(start.date()):
+            return
+        period_start = datetime.datetime(
+            year=self._period_start.year,
+            month=self._period_start.month,
+            day=self._period_start.day,
+            tzinfo=timezone.get_default_timezone(),
+        )
+        self.add_window(
+            time_delta_to_integer_with_precision(start - period_start),
+            time_delta_to_integer_with_precision(end - period_start),
         )
-        self.available_times[start.date()] = AvailableTime(start_delta, end_delta)
+
+    def fits(self, start: int, end: int) -> bool:
+        """Whether the space is open for the whole of [start, end)"""
+        window = np.searchsorted(self.window_starts, start, side="right") - 1
+        return window >= 0 and self.window_ends[window] >= end
+
+    def windows_between(self, begin: int, end: int) -> List[Tuple[int, int]]:
+        """Opening windows that overlap [begin, end), cut to it"""
+        first = np.searchsorted(self.window_ends, begin, side="right")
+        last = np.searchsorted(self.window_starts, end, side="left")
+        return [
+            (max(window_start, begin), min(window_end, end))
+            for window_start, window_end in zip(
+                self.window_starts[first:last].tolist(),
+                self.window_ends[first:last].tolist(),
+            )
+        ]
 
 
 class AllocationOccurrence(object):
@@ -149,6 +256,45 @@ class AllocationEvent(object):
         return allocation_occurrences
 
 
+class AllocationOccurrenceTable(object):
+    """Occurrences of events as a struct of arrays, one row per occurrence.
+
+    Days are indexes to the days of the period, begin and end are in
+    ALLOCATION_PRECISION units from the beginning of the period.
+    """
+
+    def __init__(self, events: Iterable[AllocationEvent], period_start: datetime.date):
+        rows = [
+            (
+                event.id,
+                occurrence_id,
+                (occurrence.first_date - period_start).days,
+                occurrence.begin,
+                occurrence.end,
+                event.min_duration,
+            )
+            for event in events
+            for occurrence_id, occurrence in event.occurrences.items()
+        ]
+        (
+            self.event_ids,
+            self.occurrence_ids,
+            self.days,
+            self.begins,
+            self.ends,
+            self.durations,
+        ) = (
+            np.array(rows, dtype=np.int64).reshape(-1, 6).T
+        )
+        self.rows: Dict[int, int] = {
+            occurrence_id: row
+            for row, occurrence_id in enumerate(self.occurrence_ids.tolist())
+        }
+
+    def __len__(self):
+        return len(self.occurrence_ids)
+
+
 class AllocationBasket(object):
     """Would like to have some proper definition here"""
 
@@ -167,6 +313,42 @@ class AllocationBasket(object):
         self.score = score
 
 
+class AllocationFixedAssignment(object):
+    """Accepted allocation result which is kept as is when allocating again"""
+
+    def __init__(
+        self,
+        space_id: int,
+        event_id: int,
+        occurrence_id: int,
+        occurrence: EventOccurrence,
+        period_start: datetime.date,
+        event_begin: datetime.date,
+    ):
+        self.space_id = space_id
+        self.event_id = event_id
+        self.occurrence_id = occurrence_id
+        self.occurrence = AllocationOccurrence(occurrence, period_start, event_begin)
+
+
+class AllocationHint(object):
+    """Previous, not yet accepted allocation result used to warm start the solver"""
+
+    def __init__(
+        self,
+        space_id: int,
+        occurrence_id: int,
+        basket_id: Optional[int],
+        occurrence: EventOccurrence,
+        period_start: datetime.date,
+        event_begin: datetime.date,
+    ):
+        self.space_id = space_id
+        self.occurrence_id = occurrence_id
+        self.basket_id = basket_id
+        self.begin = AllocationOccurrence(occurrence, period_start, event_begin).begin
+
+
 class AllocationData(object):
     """Would like to have some proper definition here"""
 
@@ -177,12 +359,16 @@ class AllocationData(object):
         baskets: Dict[int, List[AllocationBasket]],
         spaces: Dict[int, List[AllocationSpace]],
         output_basket_ids: [int] = [],
+        fixed_assignments: Optional[List[AllocationFixedAssignment]] = None,
+        hints: Optional[Dict[int, AllocationHint]] = None,
     ):
         self.period_start = period_start
         self.period_end = period_end
         self.spaces = spaces
         self.baskets = baskets
         self.output_basket_ids = output_basket_ids
+        self.fixed_assignments = fixed_assignments or []
+        self.hints = hints or {}
 
 
 class AllocatedEvent(object):
@@ -0,0 +1,197 @@
+import datetime
+import hashlib
+import json
+import logging
+import time
+import uuid
+from typing import List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from allocation.allocation_data_builder import AllocationDataBuilder
+from allocation.allocation_index import AllocationEligibilityIndex
+from allocation.allocation_models import ALLOCATION_PRECISION, AllocatedEvent
+from allocation.allocation_snapshot import allocation_data_to_snapshot, snapshot_hash
+from allocation.allocation_solver import AllocationSolver, AllocationSolverParameters
+from allocation.models import AllocationPreview
+from applications.models import ApplicationRound
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_CACHE_KEY_PREFIX = "allocation_preview"
+
+PREVIEW_PENDING = AllocationPreview.PENDING
+PREVIEW_COMPLETED = AllocationPreview.COMPLETED
+PREVIEW_FAILED = AllocationPreview.FAILED
+
+
+def preview_cache_key(
+    input_hash: str, parameters: AllocationSolverParameters, quick: bool
+) -> str:
+    """Cache key of a preview, the solver parameters change the result too"""
+    options = json.dumps(
+        {
+            "num_search_workers": parameters.num_search_workers,
+            "max_time_in_seconds": parameters.max_time_in_seconds,
+            "relative_gap_limit": parameters.relative_gap_limit,
+            "random_seed": parameters.random_seed,
+            "num_processes": parameters.num_processes,
+            "greedy_hints": parameters.greedy_hints,
+            "quick": quick,
+        },
+        sort_keys=True,
+    )
+    return "%s:%s:%s" % (
+        PREVIEW_CACHE_KEY_PREFIX,
+        input_hash,
+        hashlib.sha256(options.encode()).hexdigest()[:16],
+    )
+
+
+def allocated_event_to_dict(allocated_event: AllocatedEvent) -> dict:
+    return {
+        "space_id": allocated_event.space_id,
+        "event_id": allocated_event.event_id,
+        "occurrence_id": allocated_event.occurrence_id,
+        "basket_id": allocated_event.basket_id,
+        "duration": int(allocated_event.duration.total_seconds() // 60),
+        "begin": allocated_event.begin.isoformat(),
+        "end": allocated_event.end.isoformat(),
+    }
+
+
+def basket_utilisation(
+    index: AllocationEligibilityIndex,
+    allocated_events: List[AllocatedEvent],
+    output_basket_ids: List[int],
+) -> List[dict]:
+    """Weekly minutes requested and allocated per basket.
+
+    Events count towards the basket they are attributed to in the solver.
+    Accepted results of previous allocations count as allocated.
+    """
+    utilisation = {
+        basket.id: {
+            "basket_id": basket.id,
+            "order_number": basket.order_number,
+            "allocation_percentage": basket.allocation_percentage,
+            "events": 0,
+            "requested_duration": 0,
+            "allocated_duration": 0,
+        }
+        for basket in index.baskets.values()
+        if not output_basket_ids or basket.id in output_basket_ids
+    }
+    for event_id, event in index.events.items():
+        basket = utilisation.get(index.event_basket[event_id])
+        if basket is None:
+            continue
+        duration = event.min_duration * ALLOCATION_PRECISION
+        basket["events"] += 1
+        basket["requested_duration"] += event.events_per_week * duration
+        basket["allocated_duration"] += (
+            index.fixed_event_counts.get(event_id, 0) * duration
+        )
+    for allocated_event in allocated_events:
+        utilisation[allocated_event.basket_id]["allocated_duration"] += int(
+            allocated_event.duration.total_seconds() // 60
+        )
+
+    for basket in utilisation.values():
+        basket["utilisation"] = (
+            basket["allocated_duration"] / basket["requested_duration"]
+            if basket["requested_duration"]
+            else None
+        )
+    return sorted(utilisation.values(), key=lambda basket: basket["order_number"])
+
+
+def preview_allocation(
+    application_round: ApplicationRound,
+    basket_ids: List[int],
+    parameters: Optional[AllocationSolverParameters] = None,
+    quick: bool = False,
+) -> dict:
+    """Builds and solves the allocation without persisting the results.
+
+    Building the data and solving can take minutes, so previews run in
+    allocation.tasks.run_allocation_preview, not in web requests.
+    Previews are cached by the snapshot hash of the allocation data and the
+    solver parameters, so asking again with unchanged applications and
+    basket settings returns the earlier result without solving.
+    """
+    started = time.perf_counter()
+    parameters = parameters or AllocationSolverParameters()
+    data = AllocationDataBuilder(
+        application_round=application_round, output_basket_ids=basket_ids
+    ).get_allocation_data()
+    input_hash = snapshot_hash(allocation_data_to_snapshot(data))
+    cache_key = preview_cache_key(input_hash, parameters, quick)
+
+    preview = cache.get(cache_key)
+    if preview is not None:
+        logger.info("Allocation preview %s found in cache." % cache_key)
+        return {**preview, "cached": True}
+
+    solver = AllocationSolver(
+        allocation_data=data, parameters=parameters.within_task_time_limit(started)
+    )
+    allocated_events = solver.solve_greedy() if quick else solver.solve()
+    preview = {
+        "snapshot_hash": input_hash,
+        "solver_statistics": solver.statistics.as_dict(),
+        "presolve": solver.presolve_statistics.as_dict(),
+        "baskets": basket_utilisation(
+            solver.index, allocated_events, data.output_basket_ids
+        ),
+        "allocated_events": [
+            allocated_event_to_dict(allocated_event)
+            for allocated_event in allocated_events
+        ],
+    }
+    cache.set(cache_key, preview, settings.ALLOCATION_PREVIEW_CACHE_TIMEOUT)
+    return {**preview, "cached": False}
+
+
+def _preview_expiry() -> datetime.datetime:
+    return timezone.now() - datetime.timedelta(
+        seconds=settings.ALLOCATION_PREVIEW_CACHE_TIMEOUT
+    )
+
+
+def create_preview_id() -> str:
+    """Id of a preview that is solved in the background, stored as pending.
+
+    The status is stored in AllocationPreview, not in the cache, because the
+    preview is solved and polled in different processes. Previews older than
+    ALLOCATION_PREVIEW_CACHE_TIMEOUT seconds are deleted.
+    """
+    AllocationPreview.objects.filter(created_at__lt=_preview_expiry()).delete()
+    return AllocationPreview.objects.create(status=PREVIEW_PENDING).id.hex
+
+
+def get_preview_status(preview_id: str) -> Optional[dict]:
+    """The preview when it is done, or its status. None if the id is unknown
+    or expired."""
+    try:
+        preview_uuid = uuid.UUID(preview_id)
+    except ValueError:
+        return None
+    allocation_preview = AllocationPreview.objects.filter(
+        pk=preview_uuid, created_at__gte=_preview_expiry()
+    ).first()
+    if allocation_preview is None:
+        return None
+    return {
+        **(allocation_preview.preview or {}),
+        "preview_id": preview_uuid.hex,
+        "status": allocation_preview.status,
+    }
+
+
+def set_preview_status(preview_id: str, status: str, preview: Optional[dict] = None):
+    AllocationPreview.objects.filter(pk=uuid.UUID(preview_id)).update(
+        status=status, preview=preview
+    )
@@ -1,39 +1,141 @@
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.utils import timezone
 from django.utils.datetime_safe import datetime
 
 from allocation.allocation_data_builder import AllocationDataBuilder
-from allocation.allocation_solver import AllocationSolver
+from allocation.allocation_models import AllocationData
+from allocation.allocation_snapshot import write_snapshot
+from allocation.allocation_solver import (
+    AllocationCancelled,
+    AllocationSolver,
+    AllocationSolverParameters,
+)
 from allocation.models import AllocationRequest
 from applications.allocation_result_mapper import AllocationResultMapper
 
+logger = logging.getLogger(__name__)
 
-def start_allocation(allocation_request: AllocationRequest):
-    data = AllocationDataBuilder(
+
+def finish_allocation(allocation_request: AllocationRequest, phase: str):
+    allocation_request.application_round.allocating = False
+    allocation_request.application_round.save()
+    allocation_request.end_date = datetime.now()
+    allocation_request.completed = phase == AllocationRequest.COMPLETED
+    allocation_request.phase = phase
+    allocation_request.save()
+
+
+def get_allocation_data_builder(
+    allocation_request: AllocationRequest,
+) -> AllocationDataBuilder:
+    return AllocationDataBuilder(
         application_round=allocation_request.application_round,
         output_basket_ids=[
             basket.id for basket in allocation_request.application_round_baskets.all()
         ],
-    ).get_allocation_data()
-    solver = AllocationSolver(allocation_data=data)
+    )
+
+
+def get_allocation_data(allocation_request: AllocationRequest) -> AllocationData:
+    return get_allocation_data_builder(allocation_request).get_allocation_data()
+
+
+def export_snapshot(
+    allocation_request: AllocationRequest, data: AllocationData, path: str
+) -> str:
+    return write_snapshot(
+        data,
+        path,
+        metadata={
+            "allocation_request_id": allocation_request.id,
+            "application_round_id": allocation_request.application_round_id,
+            "exported_at": timezone.now().isoformat(),
+        },
+    )
+
+
+def get_snapshot_path(allocation_request: AllocationRequest, directory: str) -> str:
+    return os.path.join(
+        directory, "allocation_request_%s.json.gz" % allocation_request.id
+    )
+
+
+def start_allocation(allocation_request: AllocationRequest):
     allocation_request.application_round.allocating = True
     allocation_request.application_round.save()
+    # Seconds per phase, saved with the request also when the allocation fails
+    metrics = allocation_request.metrics = {}
+    started = time.perf_counter()
     try:
-        allocation_events = solver.solve()
+        allocation_request.set_phase(AllocationRequest.BUILDING_DATA)
+        builder = get_allocation_data_builder(allocation_request)
+        data = builder.get_allocation_data()
+        metrics["hauki_fetch_time"] = builder.hauki_fetch_time
+        metrics["data_build_time"] = time.perf_counter() - started
+        if settings.ALLOCATION_SNAPSHOT_DIR:
+            try:
+                export_snapshot(
+                    allocation_request,
+                    data,
+                    get_snapshot_path(
+                        allocation_request, settings.ALLOCATION_SNAPSHOT_DIR
+                    ),
+                )
+            except OSError:
+                # Snapshots are for debugging, a full disk must not fail the allocation
+                logger.exception(
+                    "Could not export snapshot of allocation request %s."
+                    % allocation_request.id
+                )
+        if allocation_request.is_cancelled():
+            raise AllocationCancelled()
+
+        allocation_request.set_phase(AllocationRequest.SOLVING)
+        solver = AllocationSolver(
+            allocation_data=data,
+            parameters=AllocationSolverParameters.from_allocation_request(
+                allocation_request
+            ).within_task_time_limit(started),
+            should_stop=allocation_request.is_cancelled,
+        )
+        solve_started = time.perf_counter()
+        if allocation_request.quick:
+            allocation_events = solver.solve_greedy()
+        else:
+            allocation_events = solver.solve()
+        metrics["solve_time"] = time.perf_counter() - solve_started
+        metrics["presolve"] = solver.presolve_statistics.as_dict()
+        allocation_request.solver_statistics = solver.statistics.as_dict()
+        allocation_request.save(update_fields=["solver_statistics", "metrics"])
+        if allocation_request.is_cancelled():
+            raise AllocationCancelled()
+
+        allocation_request.set_phase(AllocationRequest.PERSISTING)
         mapper = AllocationResultMapper(
             allocated_events=allocation_events,
             application_round=allocation_request.application_round,
         )
+        persist_started = time.perf_counter()
         mapper.to_events()
+        metrics["persist_time"] = time.perf_counter() - persist_started
+    except AllocationCancelled:
+        logger.info("Allocation request %s was cancelled." % allocation_request.id)
+        metrics["total_time"] = time.perf_counter() - started
+        finish_allocation(allocation_request, AllocationRequest.CANCELLED)
+        return
     except Exception:
         # Safeguard so we don't lock allocation on unexpected exceptions even though this shouldn't throw anything
-        allocation_request.application_round.allocating = False
-        allocation_request.application_round.save()
-        allocation_request.end_date = datetime.now()
-        allocation_request.completed = False
-        allocation_request.save()
+        metrics["total_time"] = time.perf_counter() - started
+        finish_allocation(allocation_request, AllocationRequest.FAILED)
         raise
 
-    allocation_request.application_round.allocating = False
-    allocation_request.application_round.save()
-    allocation_request.end_date = datetime.now()
-    allocation_request.completed = True
-    allocation_request.save()
+    metrics["total_time"] = time.perf_counter() - started
+    logger.info(
+        "Allocation request %s completed, metrics: %s"
+        % (allocation_request.id, metrics)
+    )
+    finish_allocation(allocation_request, AllocationRequest.COMPLETED)
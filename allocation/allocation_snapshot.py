@@ -0,0 +1,257 @@
+import datetime
+import gzip
+import hashlib
+import json
+from typing import Optional
+
+import numpy as np
+
+from allocation.allocation_models import (
+    AllocationBasket,
+    AllocationData,
+    AllocationEvent,
+    AllocationFixedAssignment,
+    AllocationHint,
+    AllocationOccurrence,
+    AllocationSpace,
+)
+
+# Bump when the layout below changes, old snapshots are then refused on load
+SNAPSHOT_VERSION = 2
+
+
+class AllocationSnapshotError(Exception):
+    pass
+
+
+def _restore(cls, **attributes):
+    """Recreates an allocation model from its already converted attributes.
+
+    The constructors convert dates and durations to integers, the snapshot
+    stores the converted values so they are set as is.
+    """
+    instance = cls.__new__(cls)
+    instance.__dict__.update(attributes)
+    return instance
+
+
+def _date(value: str) -> datetime.date:
+    return datetime.date.fromisoformat(value)
+
+
+def _dump_occurrence(occurrence: AllocationOccurrence) -> list:
+    return [
+        occurrence.weekday,
+        occurrence.first_date.isoformat(),
+        occurrence.begin,
+        occurrence.end,
+    ]
+
+
+def _load_occurrence(values: list) -> AllocationOccurrence:
+    weekday, first_date, begin, end = values
+    # Dates of the single occurrences are not needed by the solver
+    return _restore(
+        AllocationOccurrence,
+        weekday=weekday,
+        first_date=_date(first_date),
+        begin=begin,
+        end=end,
+        occurrences=[],
+    )
+
+
+def _dump_space(space: AllocationSpace) -> list:
+    return [
+        space.id,
+        space.max_persons,
+        np.stack([space.window_starts, space.window_ends], axis=1).tolist(),
+    ]
+
+
+def _load_space(
+    values: list, period_start: datetime.date, period_end: datetime.date
+) -> AllocationSpace:
+    space_id, max_persons, windows = values
+    space = AllocationSpace(
+        id=space_id,
+        max_persons=max_persons,
+        period_start=period_start,
+        period_end=period_end,
+    )
+    for start, end in windows:
+        space.add_window(start, end)
+    return space
+
+
+def _dump_event(event: AllocationEvent) -> dict:
+    return {
+        "id": event.id,
+        "space_ids": event.space_ids,
+        "begin": event.begin.isoformat(),
+        "end": event.end.isoformat(),
+        "min_duration": event.min_duration,
+        "max_duration": event.max_duration,
+        "events_per_week": event.events_per_week,
+        "num_persons": event.num_persons,
+        "occurrences": [
+            [occurrence_id] + _dump_occurrence(occurrence)
+            for occurrence_id, occurrence in event.occurrences.items()
+        ],
+    }
+
+
+def _load_event(
+    values: dict, period_start: datetime.date, period_end: datetime.date
+) -> AllocationEvent:
+    return _restore(
+        AllocationEvent,
+        id=values["id"],
+        space_ids=values["space_ids"],
+        begin=_date(values["begin"]),
+        end=_date(values["end"]),
+        period_start=period_start,
+        period_end=period_end,
+        min_duration=values["min_duration"],
+        max_duration=values["max_duration"],
+        events_per_week=values["events_per_week"],
+        num_persons=values["num_persons"],
+        baskets=[],
+        occurrences={
+            occurrence[0]: _load_occurrence(occurrence[1:])
+            for occurrence in values["occurrences"]
+        },
+    )
+
+
+def allocation_data_to_snapshot(
+    data: AllocationData, metadata: Optional[dict] = None
+) -> dict:
+    """Converts AllocationData to a JSON serializable snapshot.
+
+    Events are stored once even when they are in several baskets, baskets
+    refer to them by id. Times are stored as the integers the solver uses.
+    """
+    events = {}
+    for basket in data.baskets.values():
+        for event in basket.events:
+            events.setdefault(event.id, event)
+
+    return {
+        "version": SNAPSHOT_VERSION,
+        "metadata": metadata or {},
+        "period_start": data.period_start.isoformat(),
+        "period_end": data.period_end.isoformat(),
+        "output_basket_ids": list(data.output_basket_ids),
+        "spaces": [_dump_space(space) for space in data.spaces.values()],
+        "events": [_dump_event(event) for event in events.values()],
+        "baskets": [
+            [
+                basket.id,
+                basket.order_number,
+                basket.allocation_percentage,
+                basket.score,
+                [event.id for event in basket.events],
+            ]
+            for basket in data.baskets.values()
+        ],
+        "fixed_assignments": [
+            [
+                fixed_assignment.space_id,
+                fixed_assignment.event_id,
+                fixed_assignment.occurrence_id,
+            ]
+            + _dump_occurrence(fixed_assignment.occurrence)
+            for fixed_assignment in data.fixed_assignments
+        ],
+        "hints": [
+            [hint.occurrence_id, hint.space_id, hint.basket_id, hint.begin]
+            for hint in data.hints.values()
+        ],
+    }
+
+
+def allocation_data_from_snapshot(snapshot: dict) -> AllocationData:
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        raise AllocationSnapshotError(
+            "Unsupported allocation snapshot version %s, expected %s."
+            % (snapshot.get("version"), SNAPSHOT_VERSION)
+        )
+
+    period_start = _date(snapshot["period_start"])
+    period_end = _date(snapshot["period_end"])
+    spaces = {}
+    for values in snapshot["spaces"]:
+        space = _load_space(values, period_start, period_end)
+        spaces[space.id] = space
+
+    events = {}
+    for values in snapshot["events"]:
+        event = _load_event(values, period_start, period_end)
+        events[event.id] = event
+
+    baskets = {}
+    for basket_id, order_number, allocation_percentage, score, event_ids in snapshot[
+        "baskets"
+    ]:
+        baskets[basket_id] = AllocationBasket(
+            id=basket_id,
+            order_number=order_number,
+            allocation_percentage=allocation_percentage,
+            events=[events[event_id] for event_id in event_ids],
+            score=score,
+        )
+
+    fixed_assignments = [
+        _restore(
+            AllocationFixedAssignment,
+            space_id=values[0],
+            event_id=values[1],
+            occurrence_id=values[2],
+            occurrence=_load_occurrence(values[3:]),
+        )
+        for values in snapshot["fixed_assignments"]
+    ]
+    hints = {
+        occurrence_id: _restore(
+            AllocationHint,
+            space_id=space_id,
+            occurrence_id=occurrence_id,
+            basket_id=basket_id,
+            begin=begin,
+        )
+        for occurrence_id, space_id, basket_id, begin in snapshot["hints"]
+    }
+
+    return AllocationData(
+        period_start=period_start,
+        period_end=period_end,
+        baskets=baskets,
+        spaces=spaces,
+        output_basket_ids=snapshot["output_basket_ids"],
+        fixed_assignments=fixed_assignments,
+        hints=hints,
+    )
+
+
+def snapshot_hash(snapshot: dict) -> str:
+    """Hash of the allocation problem, metadata such as export time is left out"""
+    problem = {key: value for key, value in snapshot.items() if key != "metadata"}
+    return hashlib.sha256(
+        json.dumps(problem, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+def write_snapshot(
+    data: AllocationData, path: str, metadata: Optional[dict] = None
+) -> str:
+    """Writes the data as gzipped JSON to the path and returns the snapshot hash"""
+    snapshot = allocation_data_to_snapshot(data, metadata=metadata)
+    with gzip.open(path, "wt", encoding="utf-8") as snapshot_file:
+        json.dump(snapshot, snapshot_file, separators=(",", ":"))
+    return snapshot_hash(snapshot)
+
+
+def read_snapshot(path: str) -> dict:
+    with gzip.open(path, "rt", encoding="utf-8") as snapshot_file:
+        return json.load(snapshot_file)
@@ -1,113 +1,394 @@
 import datetime
 import logging
-from typing import Dict, Tuple
-
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
 from ortools.sat.python import cp_model
 
+from allocation.allocation_decomposition import AllocationDecomposer
+from allocation.allocation_greedy import GreedyAllocator
+from allocation.allocation_index import (
+    AllocationEligibilityIndex,
+    CandidateKey,
+    PresolveStatistics,
+)
 from allocation.allocation_models import (
     ALLOCATION_PRECISION,
     AllocatedEvent,
     AllocationData,
-    AllocationEvent,
-    AllocationOccurrence,
     AllocationSpace,
 )
 
 logger = logging.getLogger(__name__)
 
+# Seconds between calls to the should_stop callback while solving
+CANCELLATION_CHECK_INTERVAL = 5
 
-def has_room_for_persons(space: AllocationSpace, event: AllocationEvent):
-    return (
-        space.max_persons is None
-        or event.num_persons is None
-        or space.max_persons >= event.num_persons
-    )
+# Time limit of a subproblem started after the deadline of the whole solve,
+# enough for a hinted solution or the greedy fallback
+MIN_COMPONENT_TIME_IN_SECONDS = 0.1
+
+# Seconds of the task time limit left for saving the results after solving
+TASK_TIME_LIMIT_MARGIN_IN_SECONDS = 60
+
+
+class AllocationCancelled(Exception):
+    pass
+
+
+class AllocationSolverParameters(object):
+    """CP-SAT search parameters for one allocation run.
 
+    Values left as None fall back to the ALLOCATION_SOLVER_* settings.
+    """
 
-def suitable_spaces_for_event(
-    allocation_event: AllocationEvent, spaces: Dict[int, AllocationSpace]
-) -> Dict[int, AllocationSpace]:
-    suitable_spaces = {}
-    for space_id, space in spaces.items():
-        if space_id in allocation_event.space_ids and has_room_for_persons(
-            space, allocation_event
+    def __init__(
+        self,
+        num_search_workers: Optional[int] = None,
+        max_time_in_seconds: Optional[float] = None,
+        relative_gap_limit: Optional[float] = None,
+        random_seed: Optional[int] = None,
+        num_processes: Optional[int] = None,
+        greedy_hints: Optional[bool] = None,
+    ):
+        self.num_search_workers = (
+            num_search_workers
+            if num_search_workers is not None
+            else settings.ALLOCATION_SOLVER_NUM_SEARCH_WORKERS
+        )
+        self.max_time_in_seconds = (
+            max_time_in_seconds
+            if max_time_in_seconds is not None
+            else settings.ALLOCATION_SOLVER_MAX_TIME_IN_SECONDS
+        )
+        self.relative_gap_limit = (
+            relative_gap_limit
+            if relative_gap_limit is not None
+            else settings.ALLOCATION_SOLVER_RELATIVE_GAP_LIMIT
+        )
+        self.random_seed = (
+            random_seed
+            if random_seed is not None
+            else settings.ALLOCATION_SOLVER_RANDOM_SEED
+        )
+        self.num_processes = (
+            num_processes
+            if num_processes is not None
+            else settings.ALLOCATION_SOLVER_NUM_PROCESSES
+        )
+        self.greedy_hints = (
+            greedy_hints
+            if greedy_hints is not None
+            else settings.ALLOCATION_SOLVER_GREEDY_HINTS
+        )
+
+    @classmethod
+    def from_allocation_request(cls, allocation_request):
+        return cls(
+            num_search_workers=allocation_request.num_search_workers,
+            max_time_in_seconds=allocation_request.max_time_in_seconds,
+            relative_gap_limit=allocation_request.relative_gap_limit,
+            random_seed=allocation_request.random_seed,
+        )
+
+    def within_task_time_limit(
+        self, task_started: float
+    ) -> "AllocationSolverParameters":
+        """Parameters with the time limit cut to what is left of
+        ALLOCATION_TASK_SOFT_TIME_LIMIT for a task started at task_started
+        (time.perf_counter()).
+
+        Celery's soft time limit can't interrupt CP-SAT while it is solving in
+        native code, so the solver has to stop on its own in time.
+        """
+        time_left = max(
+            settings.ALLOCATION_TASK_SOFT_TIME_LIMIT
+            - (time.perf_counter() - task_started)
+            - TASK_TIME_LIMIT_MARGIN_IN_SECONDS,
+            MIN_COMPONENT_TIME_IN_SECONDS,
+        )
+        return AllocationSolverParameters(
+            num_search_workers=self.num_search_workers,
+            max_time_in_seconds=min(self.max_time_in_seconds or time_left, time_left),
+            relative_gap_limit=self.relative_gap_limit,
+            random_seed=self.random_seed,
+            num_processes=self.num_processes,
+            greedy_hints=self.greedy_hints,
+        )
+
+    def for_component(
+        self, num_processes: int, max_time_in_seconds: Optional[float] = None
+    ) -> "AllocationSolverParameters":
+        """Parameters for one subproblem when num_processes are solved in parallel"""
+        return AllocationSolverParameters(
+            num_search_workers=max(1, self.num_search_workers // num_processes),
+            max_time_in_seconds=max_time_in_seconds or self.max_time_in_seconds,
+            relative_gap_limit=self.relative_gap_limit,
+            random_seed=self.random_seed,
+            num_processes=1,
+            greedy_hints=self.greedy_hints,
+        )
+
+    def apply(self, solver: cp_model.CpSolver):
+        if self.num_search_workers:
+            solver.parameters.num_search_workers = self.num_search_workers
+        if self.max_time_in_seconds:
+            solver.parameters.max_time_in_seconds = self.max_time_in_seconds
+        if self.relative_gap_limit:
+            solver.parameters.relative_gap_limit = self.relative_gap_limit
+        if self.random_seed is not None:
+            solver.parameters.random_seed = self.random_seed
+
+
+class AllocationSolverStatistics(object):
+    """Model size and search outcome of one allocation solve.
+
+    When the problem is decomposed, the statistics of the subproblems are merged:
+    sizes and objectives are summed and the status is the weakest of them.
+    """
+
+    # From the strongest to the weakest outcome
+    STATUS_ORDER = [
+        "OPTIMAL",
+        "FEASIBLE",
+        "GREEDY",
+        "UNKNOWN",
+        "INFEASIBLE",
+        "MODEL_INVALID",
+    ]
+
+    def __init__(self):
+        self.num_components = 1
+        self.num_variables = 0
+        self.num_constraints = 0
+        self.num_intervals = 0
+        self.model_build_time = 0.0
+        self.solve_time = 0.0
+        self.status: Optional[str] = None
+        self.objective_value = 0.0
+        self.best_objective_bound: Optional[float] = None
+        self.num_conflicts = 0
+        self.num_branches = 0
+        self.greedy_fallback = False
+
+    def merge(self, other: "AllocationSolverStatistics"):
+        self.num_variables += other.num_variables
+        self.num_constraints += other.num_constraints
+        self.num_intervals += other.num_intervals
+        self.model_build_time += other.model_build_time
+        self.solve_time = max(self.solve_time, other.solve_time)
+        self.objective_value += other.objective_value
+        # The subproblems are independent, so their bounds add up
+        if self.status is None:
+            self.best_objective_bound = other.best_objective_bound
+        elif other.best_objective_bound is None:
+            self.best_objective_bound = None
+        elif self.best_objective_bound is not None:
+            self.best_objective_bound += other.best_objective_bound
+        self.num_conflicts += other.num_conflicts
+        self.num_branches += other.num_branches
+        self.greedy_fallback = self.greedy_fallback or other.greedy_fallback
+        if self.status is None or (
+            other.status is not None
+            and self.STATUS_ORDER.index(other.status)
+            > self.STATUS_ORDER.index(self.status)
         ):
-            suitable_spaces[space_id] = space
-    return suitable_spaces
+            self.status = other.status
+
+    def as_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+class AllocationSolutionCallback(cp_model.CpSolverSolutionCallback):
+    """Keeps the best solution found so far.
+
+    CP-SAT only reports improving solutions, so the latest one is always the
+    incumbent. Storing it here keeps a usable result even if the search is
+    stopped by the time limit before optimality is proven.
+    """
+
+    def __init__(
+        self,
+        selected: Dict,
+        starts: Dict,
+        ends: Dict,
+    ):
+        super().__init__()
+        self.selected = selected
+        self.starts = starts
+        self.ends = ends
+        self.cancelled = False
+        self.solution_count = 0
+        self.objective_value = None
+        self.assignments: Dict[CandidateKey, Tuple[int, int]] = {}
+
+    def on_solution_callback(self):
+        self.solution_count += 1
+        self.objective_value = self.ObjectiveValue()
+        self.assignments = {
+            key: (self.Value(self.starts[key]), self.Value(self.ends[key]))
+            for key, performed in self.selected.items()
+            if self.BooleanValue(performed)
+        }
+        logger.info(
+            "Allocation solution %i found, objective %i, wall time %f s"
+            % (self.solution_count, self.objective_value, self.WallTime())
+        )
+
+
+class CancellationWatcher(threading.Thread):
+    """Polls should_stop while the solver runs and stops the search when it
+    returns True.
+
+    The search can go on for its whole time limit without finding a solution,
+    so the cancellation can't be checked from the solution callback alone.
+    """
+
+    def __init__(
+        self,
+        callback: AllocationSolutionCallback,
+        should_stop: Callable[[], bool],
+    ):
+        super().__init__(daemon=True)
+        self.callback = callback
+        self.should_stop = should_stop
+        self.interval = CANCELLATION_CHECK_INTERVAL
+        self.finished = threading.Event()
+
+    def run(self):
+        try:
+            while not self.finished.wait(self.interval):
+                if self.should_stop():
+                    self.callback.cancelled = True
+                    self.callback.StopSearch()
+                    return
+        finally:
+            # should_stop may query the database from this thread
+            connections.close_all()
+
+    def stop(self):
+        self.finished.set()
+        self.join()
+
+
+def build_allocated_events(
+    index: AllocationEligibilityIndex,
+    assignments: Dict[CandidateKey, Tuple[int, int]],
+    output_basket_ids: List[int],
+) -> List[AllocatedEvent]:
+    solution = []
+    for key in index.candidates:
+        space_id, event_id, occurrence_id = key
+        basket_id = index.event_basket[event_id]
+        if key not in assignments or (
+            len(output_basket_ids) > 0 and basket_id not in output_basket_ids
+        ):
+            continue
+
+        space = index.spaces[space_id]
+        event = index.events[event_id]
+        basket = index.baskets[basket_id]
+        logger.info(
+            "Space %s assigned to application event %s, duration %s, "
+            "basket order number %s"
+            % (space.id, event.id, event.min_duration, basket.order_number)
+        )
+        start, end = assignments[key]
+        start_delta = datetime.timedelta(minutes=start * ALLOCATION_PRECISION)
+        end_delta = datetime.timedelta(minutes=end * ALLOCATION_PRECISION)
+        solution.append(
+            AllocatedEvent(
+                space=space,
+                event=event,
+                duration=event.min_duration,
+                occurrence_id=occurrence_id,
+                event_id=event.id,
+                start=(datetime.datetime.min + start_delta).time(),
+                end=(datetime.datetime.min + end_delta).time(),
+                basket=basket,
+            )
+        )
+    return solution
 
 
 class AllocationSolutionPrinter(object):
     def __init__(
         self,
         model: cp_model.CpModel,
-        spaces,
+        index: AllocationEligibilityIndex,
         starts,
         ends,
-        baskets,
         selected={},
         output_basket_ids: [int] = [],
+        parameters: Optional[AllocationSolverParameters] = None,
+        statistics: Optional[AllocationSolverStatistics] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+        fallback_assignments: Optional[Dict[CandidateKey, Tuple[int, int]]] = None,
     ):
         self.model = model
+        self.should_stop = should_stop
+        self.fallback_assignments = fallback_assignments
         self.selected = selected
-        self.spaces = spaces
+        self.index = index
         self.starts = starts
         self.ends = ends
-        self.baskets = baskets
         self.output_basket_ids = output_basket_ids
+        self.parameters = parameters or AllocationSolverParameters()
+        self.statistics = statistics or AllocationSolverStatistics()
 
     def print_solution(self):
         solver = cp_model.CpSolver()
-        status = solver.Solve(self.model)
+        self.parameters.apply(solver)
+        callback = AllocationSolutionCallback(
+            selected=self.selected,
+            starts=self.starts,
+            ends=self.ends,
+        )
+        watcher = None
+        if self.should_stop:
+            watcher = CancellationWatcher(callback, self.should_stop)
+            watcher.start()
+        try:
+            status = solver.SolveWithSolutionCallback(self.model, callback)
+        finally:
+            if watcher:
+                watcher.stop()
+        if callback.cancelled:
+            raise AllocationCancelled()
         solution = []
-        if status == cp_model.OPTIMAL:
-            logger.info("Total cost = %i" % solver.ObjectiveValue())
-
-            for basket in self.baskets.values():
-                for event in basket.events:
-                    for occurrence_id, occurrence in event.occurrences.items():
-                        for space_id, space in suitable_spaces_for_event(
-                            event, self.spaces
-                        ).items():
-                            if solver.BooleanValue(
-                                self.selected[
-                                    (space.id, basket.id, event.id, occurrence_id)
-                                ]
-                            ) and (
-                                len(self.output_basket_ids) == 0
-                                or basket.id in self.output_basket_ids
-                            ):
-                                logger.info(
-                                    "Space ",
-                                    space.id,
-                                    " assigned to application event ",
-                                    event.id,
-                                    "  Duration = ",
-                                    event.min_duration,
-                                    "  basket order number = ",
-                                    basket.order_number,
-                                )
-                                start_delta = datetime.timedelta(
-                                    minutes=solver.Value(self.starts[occurrence_id])
-                                    * ALLOCATION_PRECISION
-                                )
-                                end_delta = datetime.timedelta(
-                                    minutes=solver.Value(self.ends[occurrence_id])
-                                    * ALLOCATION_PRECISION
-                                )
-                                solution.append(
-                                    AllocatedEvent(
-                                        space=space,
-                                        event=event,
-                                        duration=event.min_duration,
-                                        occurrence_id=occurrence_id,
-                                        event_id=event.id,
-                                        start=(
-                                            datetime.datetime.min + start_delta
-                                        ).time(),
-                                        end=(datetime.datetime.min + end_delta).time(),
-                                        basket=basket,
-                                    )
-                                )
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            logger.info(
+                "Total cost = %i (%s)"
+                % (callback.objective_value, solver.StatusName(status))
+            )
+            solution = build_allocated_events(
+                self.index, callback.assignments, self.output_basket_ids
+            )
+        elif status == cp_model.UNKNOWN and self.fallback_assignments:
+            logger.info(
+                "Solver found no solution in time, using the greedy allocation."
+            )
+            solution = build_allocated_events(
+                self.index, self.fallback_assignments, self.output_basket_ids
+            )
+            self.statistics.greedy_fallback = True
+
+        self.statistics.status = solver.StatusName(status)
+        self.statistics.objective_value = callback.objective_value or 0.0
+        if self.statistics.greedy_fallback:
+            self.statistics.objective_value = GreedyAllocator(
+                self.index
+            ).objective_value(self.fallback_assignments)
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE, cp_model.UNKNOWN):
+            self.statistics.best_objective_bound = solver.BestObjectiveBound()
+        self.statistics.solve_time = solver.WallTime()
+        self.statistics.num_conflicts = solver.NumConflicts()
+        self.statistics.num_branches = solver.NumBranches()
 
         logger.info("Statistics")
         logger.info("  - conflicts : %i" % solver.NumConflicts())
@@ -116,221 +397,363 @@ class AllocationSolutionPrinter(object):
         return solution
 
 
+def solve_allocation_component(
+    allocation_data: AllocationData,
+    parameters: AllocationSolverParameters,
+    should_stop: Optional[Callable[[], bool]] = None,
+    deadline: Optional[float] = None,
+) -> Tuple[List[AllocatedEvent], AllocationSolverStatistics]:
+    """Solves one subproblem. With a deadline, given as time.time(), the solver
+    gets only the time remaining until it."""
+    if deadline is not None:
+        parameters = parameters.for_component(
+            1, max(deadline - time.time(), MIN_COMPONENT_TIME_IN_SECONDS)
+        )
+    solver = AllocationSolver(
+        allocation_data=allocation_data,
+        parameters=parameters,
+        should_stop=should_stop,
+    )
+    solution = solver.solve_model(AllocationEligibilityIndex(allocation_data))
+    return solution, solver.statistics
+
+
 class AllocationSolver(object):
-    def __init__(self, allocation_data: AllocationData):
+    """Builds and solves the CP-SAT allocation model.
+
+    should_stop is polled during the search. When it returns True the search
+    is stopped and solve raises AllocationCancelled.
+    """
+
+    def __init__(
+        self,
+        allocation_data: AllocationData,
+        parameters: Optional[AllocationSolverParameters] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+    ):
+        self.parameters = parameters or AllocationSolverParameters()
+        self.should_stop = should_stop
         self.spaces: Dict[int, AllocationSpace] = allocation_data.spaces
         self.baskets = allocation_data.baskets
+        self.allocation_data = allocation_data
         self.starts = {}
         self.ends = {}
         self.output_basket_ids = allocation_data.output_basket_ids
+        self.presolve_statistics: Optional[PresolveStatistics] = None
+        self.statistics = AllocationSolverStatistics()
+        # Eligibility index of the latest solve
+        self.index: Optional[AllocationEligibilityIndex] = None
+
+    def solve(self) -> List[AllocatedEvent]:
+        index = self.index = AllocationEligibilityIndex(self.allocation_data)
+        self.presolve_statistics = index.presolve_statistics
+        logger.info("Allocation presolve: %s" % self.presolve_statistics)
+
+        if self.parameters.num_processes > 1:
+            components = AllocationDecomposer(
+                self.allocation_data, index=index
+            ).components()
+            if len(components) > 1:
+                return self.solve_components(components)
+
+        return self.solve_model(index)
+
+    def solve_greedy(self) -> List[AllocatedEvent]:
+        """Quick allocation with GreedyAllocator only, without the solver"""
+        index = self.index = AllocationEligibilityIndex(self.allocation_data)
+        self.presolve_statistics = index.presolve_statistics
+        started = time.perf_counter()
+        allocator = GreedyAllocator(index)
+        assignments = allocator.allocate()
+        self.statistics.solve_time = time.perf_counter() - started
+        self.statistics.status = "GREEDY"
+        self.statistics.objective_value = allocator.objective_value(assignments)
+        return build_allocated_events(index, assignments, self.output_basket_ids)
+
+    def solve_components(self, components: List[AllocationData]):
+        """Solves independent subproblems in a process pool and merges the results"""
+        num_processes = min(self.parameters.num_processes, len(components))
+        logger.info(
+            "Allocation split into %i independent subproblems, solving with %i processes"
+            % (len(components), num_processes)
+        )
+        # Largest subproblems first so that the slowest ones don't start last.
+        ordered = sorted(
+            range(len(components)),
+            key=lambda i: sum(
+                len(event.occurrences) * len(event.space_ids)
+                for basket in components[i].baskets.values()
+                for event in basket.events
+            ),
+            reverse=True,
+        )
+        results: Dict[int, Tuple[List[AllocatedEvent], AllocationSolverStatistics]] = {}
+        started = time.perf_counter()
+        # One time limit for the whole solve, the subproblems started later get
+        # only the time that is left of it.
+        deadline = None
+        if self.parameters.max_time_in_seconds:
+            deadline = time.time() + self.parameters.max_time_in_seconds
+        try:
+            self.solve_components_in_pool(
+                components, ordered, num_processes, deadline, results
+            )
+        except BrokenProcessPool:
+            logger.exception(
+                "Allocation process pool broke, solving the remaining subproblems "
+                "sequentially."
+            )
+        for i in ordered:
+            if i not in results:
+                results[i] = solve_allocation_component(
+                    components[i], self.parameters, self.should_stop, deadline
+                )
 
-    def solve(self):
+        self.statistics = AllocationSolverStatistics()
+        for solution, statistics in results.values():
+            self.statistics.merge(statistics)
+        self.statistics.num_components = len(components)
+        self.statistics.solve_time = time.perf_counter() - started
+        return [
+            allocated_event
+            for i in range(len(components))
+            for allocated_event in results[i][0]
+        ]
+
+    def solve_components_in_pool(
+        self,
+        components: List[AllocationData],
+        ordered: List[int],
+        num_processes: int,
+        deadline: Optional[float],
+        results: Dict[int, Tuple[List[AllocatedEvent], AllocationSolverStatistics]],
+    ):
+        """Solves the subproblems in a process pool into results.
+
+        Returns without solving anything if the pool can't be started, e.g.
+        inside a daemonic process. Errors of the subproblems are raised.
+        """
+        component_parameters = self.parameters.for_component(num_processes)
+        executor = None
+        try:
+            executor = ProcessPoolExecutor(max_workers=num_processes)
+            # The worker processes are started by the first submit
+            futures = {
+                executor.submit(
+                    solve_allocation_component,
+                    components[i],
+                    component_parameters,
+                    None,
+                    deadline,
+                ): i
+                for i in ordered
+            }
+        except (AssertionError, NotImplementedError, OSError):
+            logger.exception(
+                "Allocation process pool could not be started, solving subproblems "
+                "sequentially."
+            )
+            if executor is not None:
+                executor.shutdown(wait=False)
+            return
+
+        with executor:
+            pending = set(futures.keys())
+            while pending:
+                done, pending = wait(
+                    pending,
+                    timeout=CANCELLATION_CHECK_INTERVAL,
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    results[futures[future]] = future.result()
+                if pending and self.should_stop and self.should_stop():
+                    # Subproblems already running finish before the pool exits
+                    for future in pending:
+                        future.cancel()
+                    raise AllocationCancelled()
+
+    def solve_model(self, index: AllocationEligibilityIndex) -> List[AllocatedEvent]:
+        build_started = time.perf_counter()
         model = cp_model.CpModel()
-
         selected = {}
-        for basket in self.baskets.values():
-            for allocation_event in basket.events:
-                for occurrence_id, occurrence in allocation_event.occurrences.items():
-                    for space_id, space in suitable_spaces_for_event(
-                        allocation_event, self.spaces
-                    ).items():
-                        selected[
-                            (space.id, basket.id, allocation_event.id, occurrence_id)
-                        ] = model.NewBoolVar(
-                            "x[%i,%s,%i]" % (space_id, basket.id, occurrence_id)
-                        )
-
-        self.constraint_allocation(model=model, selected=selected)
-        self.constraint_to_one_event_per_schedule(model=model, selected=selected)
-        self.contraint_by_events_per_week(model=model, selected=selected)
-        self.constraint_by_event_time_limits(model=model, selected=selected)
-        self.maximize(model=model, selected=selected)
+        for key in index.candidates:
+            space_id, event_id, occurrence_id = key
+            selected[key] = model.NewBoolVar("x[%i,%i]" % (space_id, occurrence_id))
+
+        self.constraint_to_one_event_per_schedule(
+            model=model, selected=selected, index=index
+        )
+        self.contraint_by_events_per_week(model=model, selected=selected, index=index)
+        self.constraint_by_event_time_limits(
+            model=model, selected=selected, index=index
+        )
+        self.maximize(model=model, selected=selected, index=index)
+        greedy_assignments = GreedyAllocator(index).allocate()
+        self.add_hints(
+            model=model,
+            selected=selected,
+            index=index,
+            greedy_assignments=greedy_assignments,
+        )
+        self.statistics.model_build_time = time.perf_counter() - build_started
+        self.statistics.num_variables = len(model.Proto().variables)
+        self.statistics.num_constraints = len(model.Proto().constraints)
+        self.statistics.num_intervals = sum(
+            1
+            for constraint in model.Proto().constraints
+            if constraint.WhichOneof("constraint") == "interval"
+        )
 
         printer = AllocationSolutionPrinter(
             model=model,
-            spaces=self.spaces,
+            index=index,
             selected=selected,
             starts=self.starts,
             ends=self.ends,
-            baskets=self.baskets,
             output_basket_ids=self.output_basket_ids,
+            parameters=self.parameters,
+            statistics=self.statistics,
+            should_stop=self.should_stop,
+            fallback_assignments=greedy_assignments,
         )
         return printer.print_solution()
 
-    def determine_minumum_and_maximum_times(
-        self, occurrence: AllocationOccurrence, space: AllocationSpace, duration: int
-    ) -> Tuple[int, int]:
-        min_start = 0
-        max_end = 0
-        if occurrence.first_date in space.available_times:
-            space_time = space.available_times[occurrence.first_date]
-            min_start = (
-                occurrence.begin
-                if occurrence.begin >= space_time.start
-                else space_time.start
-            )
-
-            max_end = (
-                occurrence.end if occurrence.end <= space_time.end else space_time.end
-            )
-        if min_start + duration > max_end:
-            min_start = 0
-            max_end = 0
-        return min_start, max_end
+    def constraint_by_event_time_limits(
+        self,
+        model: cp_model.CpModel,
+        selected: Dict,
+        index: AllocationEligibilityIndex,
+    ):
+        for space_id, candidates in index.space_candidates.items():
+            intervals = []
+            for key in candidates:
+                space_id, event_id, occurrence_id = key
+                duration = index.events[event_id].min_duration
+                performed = selected[key]
+                windows = index.windows(key)
+                name_suffix = "_%i_on_space_id%i" % (occurrence_id, space_id)
+
+                # The domains keep the event inside one of the opening windows
+                start = model.NewIntVarFromDomain(
+                    cp_model.Domain.FromIntervals(
+                        [
+                            [window_start, window_end - duration]
+                            for window_start, window_end in windows
+                        ]
+                    ),
+                    "s" + name_suffix,
+                )
+                end = model.NewIntVarFromDomain(
+                    cp_model.Domain.FromIntervals(
+                        [
+                            [window_start + duration, window_end]
+                            for window_start, window_end in windows
+                        ]
+                    ),
+                    "e" + name_suffix,
+                )
 
-    def constraint_by_event_time_limits(self, model: cp_model.CpModel, selected: Dict):
+                interval = model.NewOptionalIntervalVar(
+                    start,
+                    duration,
+                    end,
+                    performed,
+                    "space_%i_event%i_occurrence%i"
+                    % (space_id, event_id, occurrence_id),
+                )
 
-        for space_id, space in self.spaces.items():
-            intervals = []
-            for basket in self.baskets.values():
-                for allocation_event in basket.events:
-                    for (
-                        occurrence_id,
-                        occurrence,
-                    ) in allocation_event.occurrences.items():
-                        if (
-                            space_id,
-                            basket.id,
-                            allocation_event.id,
-                            occurrence_id,
-                        ) in selected:
-                            duration = allocation_event.min_duration
-
-                            performed = selected[
-                                (
-                                    space_id,
-                                    basket.id,
-                                    allocation_event.id,
-                                    occurrence_id,
-                                )
-                            ]
-
-                            (
-                                min_start,
-                                max_end,
-                            ) = self.determine_minumum_and_maximum_times(
-                                occurrence=occurrence, space=space, duration=duration
-                            )
-                            name_suffix = "_%i_on_space_id%i" % (
-                                occurrence_id,
-                                space_id,
-                            )
-
-                            start = model.NewIntVar(
-                                min_start, max_end, "s" + name_suffix
-                            )
-                            end = model.NewIntVar(min_start, max_end, "e" + name_suffix)
-
-                            interval = model.NewOptionalIntervalVar(
-                                start,
-                                duration,
-                                end,
-                                performed,
-                                "space_%i_basket_b%s_event%i_occurrence%i"
-                                % (
-                                    space_id,
-                                    basket.id,
-                                    allocation_event.id,
-                                    occurrence_id,
-                                ),
-                            )
-
-                            model.Add(min_start <= end - duration).OnlyEnforceIf(
-                                performed
-                            )
-                            model.Add(end <= max_end).OnlyEnforceIf(performed)
-
-                            model.Add(start + duration <= max_end).OnlyEnforceIf(
-                                performed
-                            )
-                            model.Add(min_start <= start).OnlyEnforceIf(performed)
-
-                            self.starts[occurrence_id] = start
-                            self.ends[occurrence_id] = end
-                            intervals.append(interval)
+                self.starts[key] = start
+                self.ends[key] = end
+                intervals.append(interval)
+
+            for fixed_assignment in index.fixed_assignments.get(space_id, []):
+                occurrence = fixed_assignment.occurrence
+                intervals.append(
+                    model.NewIntervalVar(
+                        occurrence.begin,
+                        occurrence.end - occurrence.begin,
+                        occurrence.end,
+                        "fixed_space_%i_occurrence%i"
+                        % (space_id, fixed_assignment.occurrence_id),
+                    )
+                )
 
             model.AddNoOverlap(intervals)
 
-    def contraint_by_events_per_week(self, model: cp_model.CpModel, selected: Dict):
-        # No more than requested events per week is allocated
-        all_events = {}
-        for basket in self.baskets.values():
-            for event in basket.events:
-                if all_events.get(event.id):
-                    ev = all_events.get(event.id)
-                    ev["baskets"].append(basket.id)
-                else:
-                    all_events[event.id] = {"event": event, "baskets": [basket.id]}
-        for event_id, event_data in all_events.items():
-            event = event_data["event"]
+    def add_hints(
+        self,
+        model: cp_model.CpModel,
+        selected: Dict,
+        index: AllocationEligibilityIndex,
+        greedy_assignments: Optional[Dict[CandidateKey, Tuple[int, int]]] = None,
+    ):
+        """Warm start the search from the previous allocation results, or from
+        the greedy allocation when the round has not been allocated before"""
+        if index.hints:
+            hinted_starts = {}
+            for key in index.candidates:
+                hint = index.hint(key)
+                if hint is not None:
+                    hinted_starts[key] = hint.begin
+        elif greedy_assignments and self.parameters.greedy_hints:
+            hinted_starts = {
+                key: start for key, (start, end) in greedy_assignments.items()
+            }
+        else:
+            return
+
+        for key in index.candidates:
+            if key not in hinted_starts:
+                model.AddHint(selected[key], 0)
+                continue
+
+            model.AddHint(selected[key], 1)
+            start = hinted_starts[key]
+            duration = index.events[key[1]].min_duration
+            if any(
+                window_start <= start <= window_end - duration
+                for window_start, window_end in index.windows(key)
+            ):
+                model.AddHint(self.starts[key], start)
+                model.AddHint(self.ends[key], start + duration)
+
+    def contraint_by_events_per_week(
+        self,
+        model: cp_model.CpModel,
+        selected: Dict,
+        index: AllocationEligibilityIndex,
+    ):
+        # No more than requested events per week is allocated, including
+        # the already accepted ones.
+        for event_id, candidates in index.event_candidates.items():
             model.Add(
-                sum(
-                    selected[(space_id, basket_id, event.id, occurrence_id)]
-                    for basket_id in event_data["baskets"]
-                    for occurrence_id, occurrence in event.occurrences.items()
-                    for space_id, space in suitable_spaces_for_event(
-                        event, self.spaces
-                    ).items()
-                )
-                <= event.events_per_week
+                sum(selected[key] for key in candidates)
+                <= index.remaining_events_per_week(event_id)
             )
 
-    def constraint_allocation(self, model: cp_model.CpModel, selected: Dict):
-        # Each event is assigned to at most one space.
-        for basket in self.baskets.values():
-            for event in basket.events:
-                for occurrence_id, occurrence in event.occurrences.items():
-                    model.Add(
-                        sum(
-                            selected[(space_id, basket.id, event.id, occurrence_id)]
-                            for space_id, space in suitable_spaces_for_event(
-                                event, self.spaces
-                            ).items()
-                        )
-                        <= 1
-                    )
-
     def constraint_to_one_event_per_schedule(
-        self, model: cp_model.CpModel, selected: Dict
+        self,
+        model: cp_model.CpModel,
+        selected: Dict,
+        index: AllocationEligibilityIndex,
     ):
-        all_occurrences = {}
-        for basket in self.baskets.values():
-            for event in basket.events:
-                for occurrence_id, occurrence in event.occurrences.items():
-                    if all_occurrences.get(occurrence_id):
-                        ev = all_occurrences.get(occurrence_id)
-                        ev["baskets"].append(basket.id)
-                    else:
-                        all_occurrences[occurrence_id] = {
-                            "occurrence": occurrence,
-                            "baskets": [basket.id],
-                            "event": event,
-                        }
-        for occurrence_id, occurrence_data in all_occurrences.items():
-            event = occurrence_data["event"]
-            model.Add(
-                sum(
-                    selected[(space_id, basket_id, event.id, occurrence_id)]
-                    for basket_id in occurrence_data["baskets"]
-                    for space_id, space in suitable_spaces_for_event(
-                        event, self.spaces
-                    ).items()
-                )
-                <= 1
-            )
+        # Each event schedule is assigned to at most one space. Occurrences
+        # are schedules of a single event, so this also keeps an event on one
+        # space per schedule regardless of how many baskets it belongs to.
+        for candidates in index.occurrence_candidates.values():
+            model.Add(sum(selected[key] for key in candidates) <= 1)
 
     # Objective
-    def maximize(self, model: cp_model.CpModel, selected: Dict):
+    def maximize(
+        self,
+        model: cp_model.CpModel,
+        selected: Dict,
+        index: AllocationEligibilityIndex,
+    ):
         model.Maximize(
             sum(
-                selected[(space_id, basket.id, event.id, event_occurrence_id)]
-                * event.min_duration
-                * basket.score
-                for basket in self.baskets.values()
-                for event in basket.events
-                for event_occurrence_id, occurrence in event.occurrences.items()
-                for space_id, space in suitable_spaces_for_event(
-                    event, self.spaces
-                ).items()
+                selected[key] * index.events[key[1]].min_duration * index.score(key[1])
+                for key in index.candidates
             )
         )
@@ -0,0 +1,63 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from allocation.allocation_benchmark import (
+    AllocationBenchmark,
+    SyntheticAllocationDataGenerator,
+)
+from allocation.allocation_solver import AllocationSolverParameters
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the allocation solver for a generated application round and "
+        "prints a JSON report of the timings, model size and memory usage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--spaces", type=int, default=50)
+        parser.add_argument("--applications", type=int, default=200)
+        parser.add_argument("--events-per-week", type=int, default=2)
+        parser.add_argument("--baskets", type=int, default=3)
+        parser.add_argument(
+            "--period-length", type=int, default=90, help="Period length in days."
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--repeat", type=int, default=1, help="Number of runs to report."
+        )
+        parser.add_argument("--num-search-workers", type=int)
+        parser.add_argument("--max-time-in-seconds", type=int)
+        parser.add_argument("--relative-gap-limit", type=float)
+        parser.add_argument("--num-processes", type=int)
+        parser.add_argument(
+            "--output", type=str, help="File to write the report to instead of stdout."
+        )
+
+    def handle(self, *args, **options):
+        parameters = AllocationSolverParameters(
+            num_search_workers=options["num_search_workers"],
+            max_time_in_seconds=options["max_time_in_seconds"],
+            relative_gap_limit=options["relative_gap_limit"],
+            random_seed=options["seed"],
+            num_processes=options["num_processes"],
+        )
+        runs = []
+        for run in range(options["repeat"]):
+            generator = SyntheticAllocationDataGenerator(
+                num_spaces=options["spaces"],
+                num_applications=options["applications"],
+                events_per_week=options["events_per_week"],
+                num_baskets=options["baskets"],
+                period_length=options["period_length"],
+                seed=options["seed"],
+            )
+            runs.append(AllocationBenchmark(generator, parameters).run())
+
+        report = json.dumps({"runs": runs}, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                output.write(report)
+        else:
+            self.stdout.write(report)
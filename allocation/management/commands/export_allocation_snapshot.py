@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from allocation.allocation_runner import (
+    export_snapshot,
+    get_allocation_data,
+    get_snapshot_path,
+)
+from allocation.models import AllocationRequest
+
+
+class Command(BaseCommand):
+    help = (
+        "Exports the allocation data of an allocation request to a snapshot "
+        "file that can be replayed with replay_allocation_snapshot."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("allocation_request_id", type=int)
+        parser.add_argument(
+            "--output",
+            type=str,
+            help="Snapshot file path. Defaults to "
+            "allocation_request_<id>.json.gz in the current directory.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            allocation_request = AllocationRequest.objects.get(
+                pk=options["allocation_request_id"]
+            )
+        except AllocationRequest.DoesNotExist:
+            raise CommandError(
+                "Allocation request %s does not exist."
+                % options["allocation_request_id"]
+            )
+
+        path = options["output"] or get_snapshot_path(allocation_request, ".")
+        snapshot_hash = export_snapshot(
+            allocation_request, get_allocation_data(allocation_request), path
+        )
+        self.stdout.write("Wrote %s (%s)" % (path, snapshot_hash))
@@ -0,0 +1,74 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from allocation.allocation_benchmark import solve_with_report
+from allocation.allocation_snapshot import (
+    allocation_data_from_snapshot,
+    read_snapshot,
+    snapshot_hash,
+)
+from allocation.allocation_solver import AllocationSolverParameters
+
+
+class Command(BaseCommand):
+    help = (
+        "Solves the allocation data of a snapshot file and prints a JSON report "
+        "of the timings, model size and memory usage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("snapshot", type=str, help="Snapshot file to replay.")
+        parser.add_argument(
+            "--repeat", type=int, default=1, help="Number of runs to report."
+        )
+        parser.add_argument("--num-search-workers", type=int)
+        parser.add_argument("--max-time-in-seconds", type=int)
+        parser.add_argument("--relative-gap-limit", type=float)
+        parser.add_argument("--seed", type=int)
+        parser.add_argument("--num-processes", type=int)
+        parser.add_argument(
+            "--output", type=str, help="File to write the report to instead of stdout."
+        )
+
+    def handle(self, *args, **options):
+        parameters = AllocationSolverParameters(
+            num_search_workers=options["num_search_workers"],
+            max_time_in_seconds=options["max_time_in_seconds"],
+            relative_gap_limit=options["relative_gap_limit"],
+            random_seed=options["seed"],
+            num_processes=options["num_processes"],
+        )
+        started = time.perf_counter()
+        snapshot = read_snapshot(options["snapshot"])
+        load_time = time.perf_counter() - started
+
+        runs = []
+        for run in range(options["repeat"]):
+            # The solver must not see state left over from a previous run
+            started = time.perf_counter()
+            allocation_data = allocation_data_from_snapshot(snapshot)
+            data_build_time = time.perf_counter() - started
+            report = {"data_build_time": data_build_time}
+            report.update(solve_with_report(allocation_data, parameters))
+            runs.append(report)
+
+        report = json.dumps(
+            {
+                "snapshot": {
+                    "hash": snapshot_hash(snapshot),
+                    "metadata": snapshot["metadata"],
+                    "spaces": len(snapshot["spaces"]),
+                    "events": len(snapshot["events"]),
+                    "load_time": load_time,
+                },
+                "runs": runs,
+            },
+            indent=2,
+        )
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                output.write(report)
+        else:
+            self.stdout.write(report)
@@ -0,0 +1,33 @@
+# Generated by Django 3.1.14 on 2022-01-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('allocation', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='allocationrequest',
+            name='max_time_in_seconds',
+            field=models.PositiveIntegerField(blank=True, help_text='Defaults to ALLOCATION_SOLVER_MAX_TIME_IN_SECONDS setting.', null=True, verbose_name='Solver time limit in seconds'),
+        ),
+        migrations.AddField(
+            model_name='allocationrequest',
+            name='num_search_workers',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Defaults to ALLOCATION_SOLVER_NUM_SEARCH_WORKERS setting.', null=True, verbose_name='Number of solver search workers'),
+        ),
+        migrations.AddField(
+            model_name='allocationrequest',
+            name='random_seed',
+            field=models.IntegerField(blank=True, help_text='Defaults to ALLOCATION_SOLVER_RANDOM_SEED setting.', null=True, verbose_name='Solver random seed'),
+        ),
+        migrations.AddField(
+            model_name='allocationrequest',
+            name='relative_gap_limit',
+            field=models.FloatField(blank=True, help_text='Defaults to ALLOCATION_SOLVER_RELATIVE_GAP_LIMIT setting.', null=True, verbose_name='Solver relative gap limit'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.1.14 on 2022-01-24 10:31
+
+from django.db import migrations, models
+
+
+def set_phase_of_finished_requests(apps, schema_editor):
+    AllocationRequest = apps.get_model('allocation', 'AllocationRequest')
+    AllocationRequest.objects.filter(completed=True).update(phase='completed')
+    AllocationRequest.objects.filter(
+        completed=False, end_date__isnull=False
+    ).update(phase='failed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('allocation', '0002_allocationrequest_solver_parameters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='allocationrequest',
+            name='cancelled',
+            field=models.BooleanField(blank=True, default=False, verbose_name='Cancelled'),
+        ),
+        migrations.AddField(
+            model_name='allocationrequest',
+            name='phase',
+            field=models.CharField(choices=[('queued', 'Queued'), ('building_data', 'Building data'), ('solving', 'Solving'), ('persisting', 'Persisting results'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='queued', max_length=20, verbose_name='Phase'),
+        ),
+        migrations.AddField(
+            model_name='allocationrequest',
+            name='solver_statistics',
+            field=models.JSONField(blank=True, null=True, verbose_name='Solver statistics'),
+        ),
+        migrations.AddField(
+            model_name='allocationrequest',
+            name='task_id',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Celery task id'),
+        ),
+        migrations.RunPython(set_phase_of_finished_requests, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2022-01-24 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('allocation', '0003_allocationrequest_phase'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='allocationrequest',
+            name='quick',
+            field=models.BooleanField(blank=True, default=False, help_text='Allocate with the greedy heuristic only, for a fast first draft.', verbose_name='Quick allocation'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2022-01-25 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('allocation', '0004_allocationrequest_quick'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='allocationrequest',
+            name='metrics',
+            field=models.JSONField(blank=True, help_text='Durations of the allocation phases and presolve counts.', null=True, verbose_name='Allocation metrics'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.1.14 on 2022-01-27 10:05
+
+import uuid
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('allocation', '0005_allocationrequest_metrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AllocationPreview',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20, verbose_name='Status')),
+                ('preview', models.JSONField(blank=True, null=True, verbose_name='Preview')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+            ],
+        ),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.utils.translation import gettext_lazy as _
@@ -8,6 +10,25 @@ User = get_user_model()
 
 
 class AllocationRequest(models.Model):
+    QUEUED = "queued"
+    BUILDING_DATA = "building_data"
+    SOLVING = "solving"
+    PERSISTING = "persisting"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    PHASE_CHOICES = (
+        (QUEUED, _("Queued")),
+        (BUILDING_DATA, _("Building data")),
+        (SOLVING, _("Solving")),
+        (PERSISTING, _("Persisting results")),
+        (COMPLETED, _("Completed")),
+        (FAILED, _("Failed")),
+        (CANCELLED, _("Cancelled")),
+    )
+
+    FINISHED_PHASES = (COMPLETED, FAILED, CANCELLED)
 
     start_date = models.DateTimeField(
         verbose_name=_("Start time"), null=False, blank=True
@@ -36,3 +57,103 @@ class AllocationRequest(models.Model):
     )
 
     application_round_baskets = models.ManyToManyField(ApplicationRoundBasket)
+
+    phase = models.CharField(
+        verbose_name=_("Phase"),
+        max_length=20,
+        choices=PHASE_CHOICES,
+        default=QUEUED,
+    )
+
+    cancelled = models.BooleanField(
+        verbose_name=_("Cancelled"), null=False, default=False, blank=True
+    )
+
+    task_id = models.CharField(
+        verbose_name=_("Celery task id"), max_length=255, null=True, blank=True
+    )
+
+    solver_statistics = models.JSONField(
+        verbose_name=_("Solver statistics"), null=True, blank=True
+    )
+
+    metrics = models.JSONField(
+        verbose_name=_("Allocation metrics"),
+        null=True,
+        blank=True,
+        help_text=_("Durations of the allocation phases and presolve counts."),
+    )
+
+    num_search_workers = models.PositiveSmallIntegerField(
+        verbose_name=_("Number of solver search workers"),
+        null=True,
+        blank=True,
+        help_text=_("Defaults to ALLOCATION_SOLVER_NUM_SEARCH_WORKERS setting."),
+    )
+
+    max_time_in_seconds = models.PositiveIntegerField(
+        verbose_name=_("Solver time limit in seconds"),
+        null=True,
+        blank=True,
+        help_text=_("Defaults to ALLOCATION_SOLVER_MAX_TIME_IN_SECONDS setting."),
+    )
+
+    relative_gap_limit = models.FloatField(
+        verbose_name=_("Solver relative gap limit"),
+        null=True,
+        blank=True,
+        help_text=_("Defaults to ALLOCATION_SOLVER_RELATIVE_GAP_LIMIT setting."),
+    )
+
+    random_seed = models.IntegerField(
+        verbose_name=_("Solver random seed"),
+        null=True,
+        blank=True,
+        help_text=_("Defaults to ALLOCATION_SOLVER_RANDOM_SEED setting."),
+    )
+
+    quick = models.BooleanField(
+        verbose_name=_("Quick allocation"),
+        null=False,
+        default=False,
+        blank=True,
+        help_text=_("Allocate with the greedy heuristic only, for a fast first draft."),
+    )
+
+    def set_phase(self, phase: str):
+        self.phase = phase
+        self.save(update_fields=["phase"])
+
+    def is_cancelled(self) -> bool:
+        return AllocationRequest.objects.filter(pk=self.pk, cancelled=True).exists()
+
+
+class AllocationPreview(models.Model):
+    """Status and result of an allocation preview solved on the allocation queue.
+
+    Kept in the database so that the web processes polling the preview see what
+    the worker process solving it has stored.
+    """
+
+    PENDING = "pending"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+    STATUS_CHOICES = (
+        (PENDING, _("Pending")),
+        (COMPLETED, _("Completed")),
+        (FAILED, _("Failed")),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    status = models.CharField(
+        verbose_name=_("Status"),
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+    )
+
+    preview = models.JSONField(verbose_name=_("Preview"), null=True, blank=True)
+
+    created_at = models.DateTimeField(verbose_name=_("Created at"), auto_now_add=True)
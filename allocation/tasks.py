@@ -0,0 +1,144 @@
+import logging
+from typing import List
+
+from django.conf import settings
+from django.utils.datetime_safe import datetime
+
+from allocation.allocation_preview import (
+    PREVIEW_COMPLETED,
+    PREVIEW_FAILED,
+    create_preview_id,
+    preview_allocation,
+    set_preview_status,
+)
+from allocation.allocation_runner import finish_allocation, start_allocation
+from allocation.allocation_solver import AllocationSolverParameters
+from allocation.models import AllocationRequest
+from applications.models import ApplicationRound
+from tilavarauspalvelu.celery import app
+
+logger = logging.getLogger(__name__)
+
+
+@app.task(
+    bind=True,
+    acks_late=True,
+    reject_on_worker_lost=True,
+    soft_time_limit=settings.ALLOCATION_TASK_SOFT_TIME_LIMIT,
+    time_limit=settings.ALLOCATION_TASK_SOFT_TIME_LIMIT + 60,
+)
+def run_allocation(self, allocation_request_id: int) -> None:
+    """Runs a queued allocation request.
+
+    soft_time_limit can't interrupt CP-SAT while it is solving in native code,
+    and the allocation worker's threads pool doesn't enforce time limits at all.
+    The solver's time limit is therefore always cut to what is left of
+    ALLOCATION_TASK_SOFT_TIME_LIMIT, see
+    AllocationSolverParameters.within_task_time_limit.
+    """
+    # Only a queued request is started, it may have been cancelled while queued.
+    started = AllocationRequest.objects.filter(
+        pk=allocation_request_id, phase=AllocationRequest.QUEUED
+    ).update(phase=AllocationRequest.BUILDING_DATA)
+    if started:
+        start_allocation(AllocationRequest.objects.get(pk=allocation_request_id))
+        return
+
+    # The task is redelivered when the worker running it was lost. The request
+    # was left in the phase it was in, so it is failed to release the round.
+    interrupted = (
+        AllocationRequest.objects.filter(
+            pk=allocation_request_id, task_id__isnull=False, task_id=self.request.id
+        )
+        .exclude(phase__in=AllocationRequest.FINISHED_PHASES)
+        .select_related("application_round")
+        .first()
+    )
+    if interrupted is not None:
+        logger.warning(
+            "Allocation request %s was interrupted in phase %s, marking it failed"
+            % (allocation_request_id, interrupted.phase)
+        )
+        finish_allocation(interrupted, AllocationRequest.FAILED)
+
+
+def enqueue_allocation(allocation_request: AllocationRequest):
+    """Runs the allocation on the allocation queue, or synchronously when
+    Celery is disabled."""
+    if not settings.CELERY_ENABLED:
+        run_allocation(allocation_request.id)
+        return
+
+    result = run_allocation.apply_async(
+        args=[allocation_request.id], queue=settings.ALLOCATION_CELERY_QUEUE
+    )
+    AllocationRequest.objects.filter(pk=allocation_request.id).update(task_id=result.id)
+
+
+def cancel_allocation(allocation_request: AllocationRequest) -> bool:
+    """Cancels a queued or running allocation.
+
+    A queued request is finished right away. A running one is flagged and the
+    runner stops at the next cancellation check. Returns False if the request
+    had already finished.
+    """
+    if AllocationRequest.objects.filter(
+        pk=allocation_request.id, phase=AllocationRequest.QUEUED
+    ).update(
+        phase=AllocationRequest.CANCELLED,
+        cancelled=True,
+        end_date=datetime.now(),
+    ):
+        return True
+    return bool(
+        AllocationRequest.objects.filter(pk=allocation_request.id)
+        .exclude(phase__in=AllocationRequest.FINISHED_PHASES)
+        .update(cancelled=True)
+    )
+
+
+@app.task(
+    soft_time_limit=settings.ALLOCATION_TASK_SOFT_TIME_LIMIT,
+    time_limit=settings.ALLOCATION_TASK_SOFT_TIME_LIMIT + 60,
+)
+def run_allocation_preview(
+    preview_id: str,
+    application_round_id: int,
+    basket_ids: List[int],
+    parameters: dict,
+    quick: bool = False,
+) -> None:
+    # The solver keeps within the time limit itself, as in run_allocation
+    try:
+        preview = preview_allocation(
+            application_round=ApplicationRound.objects.get(pk=application_round_id),
+            basket_ids=basket_ids,
+            parameters=AllocationSolverParameters(**parameters),
+            quick=quick,
+        )
+    except Exception:
+        set_preview_status(preview_id, PREVIEW_FAILED)
+        raise
+    set_preview_status(preview_id, PREVIEW_COMPLETED, preview)
+
+
+def enqueue_allocation_preview(
+    application_round_id: int,
+    basket_ids: List[int],
+    parameters: dict,
+    quick: bool = False,
+) -> str:
+    """Solves the preview on the allocation queue, or synchronously when
+    Celery is disabled. Returns the id to poll the preview with.
+
+    Quick previews are queued too, building the allocation data fetches the
+    opening hours of every unit in the round."""
+    preview_id = create_preview_id()
+    args = [preview_id, application_round_id, basket_ids, parameters, quick]
+    if not settings.CELERY_ENABLED:
+        run_allocation_preview(*args)
+    else:
+        run_allocation_preview.apply_async(
+            args=args, queue=settings.ALLOCATION_CELERY_QUEUE
+        )
+    return preview_id
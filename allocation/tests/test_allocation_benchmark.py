@@ -0,0 +1,41 @@
+from assertpy import assert_that
+
+from allocation.allocation_benchmark import (
+    AllocationBenchmark,
+    SyntheticAllocationDataGenerator,
+)
+from allocation.allocation_solver import AllocationSolverParameters
+
+
+def test_generator_is_deterministic_for_seed():
+    first = SyntheticAllocationDataGenerator(
+        num_spaces=20, num_applications=10, seed=1
+    ).generate()
+    second = SyntheticAllocationDataGenerator(
+        num_spaces=20, num_applications=10, seed=1
+    ).generate()
+
+    assert_that(first.spaces).is_length(20)
+    assert_that([event.space_ids for event in first.baskets[None].events]).is_equal_to(
+        [event.space_ids for event in second.baskets[None].events]
+    )
+
+
+def test_benchmark_reports_model_and_solver_statistics():
+    generator = SyntheticAllocationDataGenerator(
+        num_spaces=10, num_applications=10, num_baskets=2, period_length=14
+    )
+
+    report = AllocationBenchmark(
+        generator,
+        AllocationSolverParameters(
+            num_search_workers=1, max_time_in_seconds=10, num_processes=1
+        ),
+    ).run()
+
+    assert_that(report).contains_key(
+        "data_build_time", "total_time", "peak_rss_kilobytes", "solver"
+    )
+    assert_that(report["solver"]["num_variables"]).is_greater_than(0)
+    assert_that(report["solver"]["status"]).is_in("OPTIMAL", "FEASIBLE")
+    assert_that(report["allocated_events"]).is_greater_than(0)
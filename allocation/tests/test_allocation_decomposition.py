@@ -0,0 +1,186 @@
+import datetime
+import time
+from concurrent.futures import Future
+from unittest import mock
+
+import pytest
+from assertpy import assert_that
+
+from allocation.allocation_data_builder import AllocationDataBuilder
+from allocation.allocation_decomposition import AllocationDecomposer
+from allocation.allocation_solver import AllocationSolver, AllocationSolverParameters
+from applications.models import (
+    ApplicationEvent,
+    ApplicationEventSchedule,
+    EventReservationUnit,
+)
+
+
+@pytest.fixture
+def event_for_second_reservation_unit(
+    application_with_reservation_units, second_reservation_unit, purpose
+) -> ApplicationEvent:
+    event = ApplicationEvent.objects.create(
+        application=application_with_reservation_units,
+        num_persons=5,
+        min_duration=datetime.timedelta(hours=1),
+        max_duration=datetime.timedelta(hours=1),
+        name="Chess",
+        events_per_week=1,
+        begin=datetime.date(year=2020, month=1, day=1),
+        end=datetime.date(year=2020, month=2, day=28),
+        biweekly=False,
+        purpose=purpose,
+    )
+    ApplicationEventSchedule.objects.create(
+        day=0, begin="10:00", end="12:00", application_event=event
+    )
+    EventReservationUnit.objects.create(
+        priority=100, application_event=event, reservation_unit=second_reservation_unit
+    )
+    return event
+
+
+@pytest.mark.django_db
+def test_events_without_shared_units_are_split_into_components(
+    default_application_round,
+    reservation_unit,
+    second_reservation_unit,
+    recurring_application_event,
+    scheduled_for_monday,
+    matching_event_reservation_unit,
+    event_for_second_reservation_unit,
+):
+    default_application_round.reservation_units.set(
+        [reservation_unit, second_reservation_unit]
+    )
+    data = AllocationDataBuilder(
+        application_round=default_application_round
+    ).get_allocation_data()
+
+    components = AllocationDecomposer(data).components()
+
+    assert_that(components).is_length(2)
+    assert_that(
+        sorted(list(component.spaces.keys()) for component in components)
+    ).is_equal_to(sorted([[reservation_unit.id], [second_reservation_unit.id]]))
+
+    solution = AllocationSolver(
+        allocation_data=data, parameters=AllocationSolverParameters(num_processes=2)
+    ).solve()
+
+    assert_that(
+        sorted((event.event_id, event.space_id) for event in solution)
+    ).is_equal_to(
+        sorted(
+            [
+                (recurring_application_event.id, reservation_unit.id),
+                (event_for_second_reservation_unit.id, second_reservation_unit.id),
+            ]
+        )
+    )
+
+
+@pytest.mark.django_db
+@mock.patch(
+    "allocation.allocation_solver.ProcessPoolExecutor", side_effect=OSError("no pool")
+)
+def test_subproblems_should_share_the_time_limit(
+    mock_executor,
+    default_application_round,
+    reservation_unit,
+    second_reservation_unit,
+    recurring_application_event,
+    scheduled_for_monday,
+    matching_event_reservation_unit,
+    event_for_second_reservation_unit,
+):
+    default_application_round.reservation_units.set(
+        [reservation_unit, second_reservation_unit]
+    )
+    data = AllocationDataBuilder(
+        application_round=default_application_round
+    ).get_allocation_data()
+    time_limits = []
+
+    def solve_model(solver, index):
+        time_limits.append(solver.parameters.max_time_in_seconds)
+        time.sleep(0.3)
+        return []
+
+    with mock.patch.object(AllocationSolver, "solve_model", solve_model):
+        AllocationSolver(
+            allocation_data=data,
+            parameters=AllocationSolverParameters(
+                num_processes=2, max_time_in_seconds=0.5
+            ),
+        ).solve()
+
+    assert_that(time_limits).is_length(2)
+    assert_that(time_limits[0]).is_less_than_or_equal_to(0.5)
+    assert_that(time_limits[1]).is_less_than(0.3)
+
+
+@pytest.mark.django_db
+@mock.patch("allocation.allocation_solver.ProcessPoolExecutor")
+def test_subproblem_errors_should_not_be_solved_again(
+    mock_executor,
+    default_application_round,
+    reservation_unit,
+    second_reservation_unit,
+    recurring_application_event,
+    scheduled_for_monday,
+    matching_event_reservation_unit,
+    event_for_second_reservation_unit,
+):
+    def submit(*args):
+        future = Future()
+        future.set_exception(AssertionError("broken subproblem"))
+        return future
+
+    mock_executor.return_value.submit.side_effect = submit
+    default_application_round.reservation_units.set(
+        [reservation_unit, second_reservation_unit]
+    )
+    data = AllocationDataBuilder(
+        application_round=default_application_round
+    ).get_allocation_data()
+    solver = AllocationSolver(
+        allocation_data=data,
+        parameters=AllocationSolverParameters(num_processes=2),
+    )
+
+    with mock.patch.object(AllocationSolver, "solve_model") as solve_model:
+        assert_that(solver.solve).raises(AssertionError).when_called_with()
+    solve_model.assert_not_called()
+
+
+@pytest.mark.django_db
+@mock.patch("allocation.allocation_solver.ProcessPoolExecutor")
+def test_should_solve_sequentially_when_pool_processes_cannot_start(
+    mock_executor,
+    default_application_round,
+    reservation_unit,
+    second_reservation_unit,
+    recurring_application_event,
+    scheduled_for_monday,
+    matching_event_reservation_unit,
+    event_for_second_reservation_unit,
+):
+    mock_executor.return_value.submit.side_effect = AssertionError(
+        "daemonic processes are not allowed to have children"
+    )
+    default_application_round.reservation_units.set(
+        [reservation_unit, second_reservation_unit]
+    )
+    data = AllocationDataBuilder(
+        application_round=default_application_round
+    ).get_allocation_data()
+
+    solution = AllocationSolver(
+        allocation_data=data,
+        parameters=AllocationSolverParameters(num_processes=2),
+    ).solve()
+
+    assert_that(solution).is_length(2)
+    mock_executor.return_value.shutdown.assert_called_once_with(wait=False)
@@ -0,0 +1,87 @@
+from unittest import mock
+
+from assertpy import assert_that
+from ortools.sat.python import cp_model
+
+from allocation.allocation_benchmark import SyntheticAllocationDataGenerator
+from allocation.allocation_greedy import GreedyAllocator, earliest_free_start
+from allocation.allocation_index import AllocationEligibilityIndex
+from allocation.allocation_solver import AllocationSolver, AllocationSolverParameters
+
+
+def generate_allocation_data():
+    return SyntheticAllocationDataGenerator(
+        num_spaces=10, num_applications=20, num_baskets=2, period_length=14
+    ).generate()
+
+
+def test_earliest_free_start_should_skip_busy_intervals():
+    busy = [(10, 20), (24, 30)]
+
+    assert_that(earliest_free_start(busy, 0, 40, 10)).is_equal_to(0)
+    assert_that(earliest_free_start(busy, 12, 40, 4)).is_equal_to(20)
+    assert_that(earliest_free_start(busy, 12, 40, 5)).is_equal_to(30)
+    assert_that(earliest_free_start(busy, 12, 34, 5)).is_none()
+
+
+def test_greedy_allocation_should_be_feasible():
+    index = AllocationEligibilityIndex(generate_allocation_data())
+
+    assignments = GreedyAllocator(index).allocate()
+
+    assert_that(assignments).is_not_empty()
+    occurrence_ids = [key[2] for key in assignments]
+    assert_that(occurrence_ids).does_not_contain_duplicates()
+    for event_id in index.events:
+        assert_that(
+            len([key for key in assignments if key[1] == event_id])
+        ).is_less_than_or_equal_to(index.remaining_events_per_week(event_id))
+    for space_id in index.spaces:
+        intervals = sorted(
+            interval for key, interval in assignments.items() if key[0] == space_id
+        )
+        for (_, previous_end), (next_start, _) in zip(intervals, intervals[1:]):
+            assert_that(previous_end).is_less_than_or_equal_to(next_start)
+    for key, (start, end) in assignments.items():
+        assert_that(
+            any(
+                window_start <= start and end <= window_end
+                for window_start, window_end in index.windows(key)
+            )
+        ).is_true()
+
+
+def test_should_fall_back_to_greedy_allocation_when_solver_finds_nothing():
+    data = generate_allocation_data()
+    solver = AllocationSolver(
+        allocation_data=data,
+        parameters=AllocationSolverParameters(num_processes=1),
+    )
+
+    # Without time to search CP-SAT stops before finding any solution
+    with mock.patch.object(
+        AllocationSolverParameters,
+        "apply",
+        lambda parameters, cp_solver: setattr(
+            cp_solver.parameters, "max_time_in_seconds", 0.0
+        ),
+    ):
+        solution = solver.solve()
+
+    assert_that(solution).is_length(
+        len(GreedyAllocator(AllocationEligibilityIndex(data)).allocate())
+    )
+    assert_that(solver.statistics.status).is_equal_to("UNKNOWN")
+    assert_that(solver.statistics.greedy_fallback).is_true()
+    assert_that(solver.statistics.objective_value).is_greater_than(0)
+
+
+def test_quick_allocation_should_not_use_solver():
+    solver = AllocationSolver(allocation_data=generate_allocation_data())
+
+    with mock.patch.object(cp_model.CpSolver, "SolveWithSolutionCallback") as solve:
+        solution = solver.solve_greedy()
+
+    solve.assert_not_called()
+    assert_that(solution).is_not_empty()
+    assert_that(solver.statistics.status).is_equal_to("GREEDY")
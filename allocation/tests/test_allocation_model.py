@@ -4,12 +4,20 @@ from unittest import mock
 import pytest
 from assertpy import assert_that
 from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from allocation.allocation_data_builder import AllocationDataBuilder
-from allocation.allocation_models import ALLOCATION_PRECISION
+from allocation.allocation_models import ALLOCATION_PRECISION, AllocationSpace
 from allocation.tests.conftest import get_default_end, get_default_start
-from applications.models import ApplicationStatus
+from applications.models import (
+    Application,
+    ApplicationEvent,
+    ApplicationEventSchedule,
+    ApplicationStatus,
+    EventReservationUnit,
+)
 from opening_hours.hours import TimeElement
 
 
@@ -26,13 +34,16 @@ def every_second_day(p_start, p_end):
 def get_opening_hour_data(*args, **kwargs):
     if len(args) < 3:
         return []
-    (id, start, end) = args
+    (ids, start, end) = args
+    if not isinstance(ids, list):
+        ids = [ids]
     dates = every_second_day(start, end)
     response = []
-    for date in dates:
+    for id, date in [(id, date) for id in ids for date in dates]:
         response.append(
             {
                 "resource_id": id,
+                "origin_id": id,
                 "date": date,
                 "times": [
                     TimeElement(
@@ -78,9 +89,10 @@ def test_should_map_reservation_unit_open_times_with_mock_data(
 
     times = [
         [available.start, available.end]
-        for available in data.spaces[
+        for windows in data.spaces[
             application_round_with_reservation_units.reservation_units.all()[0].id
         ].available_times.values()
+        for available in windows
     ]
 
     # Open every day in application period from 10.00 to 22.00
@@ -110,9 +122,10 @@ def test_should_map_reservation_unit_open_times_from_hauki(
 
     times = [
         [available.start, available.end]
-        for available in data.spaces[
+        for windows in data.spaces[
             application_round_with_reservation_units.reservation_units.all()[0].id
         ].available_times.values()
+        for available in windows
     ]
 
     # Open every second day from 14 to 18
@@ -127,6 +140,84 @@ def test_should_map_reservation_unit_open_times_from_hauki(
     assert_that(times).is_equal_to(expected)
 
 
+def get_split_opening_hour_data(*args, **kwargs):
+    response = get_opening_hour_data(*args, **kwargs)
+    for opening_hour in response:
+        opening_hour["times"] = [
+            TimeElement(
+                start_time=datetime.time(hour=16),
+                end_time=datetime.time(hour=22),
+                end_time_on_next_day=False,
+            ),
+            TimeElement(
+                start_time=datetime.time(hour=8),
+                end_time=datetime.time(hour=12),
+                end_time_on_next_day=False,
+            ),
+        ]
+    return response
+
+
+@mock.patch(
+    "allocation.allocation_data_builder.get_opening_hours",
+    side_effect=get_split_opening_hour_data,
+)
+@pytest.mark.django_db
+def test_should_keep_all_opening_windows_of_a_day(
+    mocked_opening_hours,
+    application_with_reservation_units,
+    application_round_with_reservation_units,
+):
+    settings.HAUKI_API_URL = "http://test.com"
+    data = AllocationDataBuilder(
+        application_round=application_round_with_reservation_units
+    ).get_allocation_data()
+
+    available_times = data.spaces[
+        application_round_with_reservation_units.reservation_units.all()[0].id
+    ].available_times
+    first_day = [
+        [available.start, available.end]
+        for available in available_times[min(available_times.keys())]
+    ]
+
+    # Open from 8 to 12 and from 16 to 22 every second day
+    assert_that(available_times).is_length(16)
+    assert_that(first_day).is_equal_to(
+        [
+            [8 * 60 // ALLOCATION_PRECISION, 12 * 60 // ALLOCATION_PRECISION],
+            [16 * 60 // ALLOCATION_PRECISION, 22 * 60 // ALLOCATION_PRECISION],
+        ]
+    )
+
+
+@mock.patch(
+    "allocation.allocation_data_builder.get_opening_hours",
+    side_effect=get_opening_hour_data,
+)
+@pytest.mark.django_db
+def test_should_fetch_opening_hours_of_all_units_at_once(
+    mocked_opening_hours,
+    application_round_with_reservation_units,
+    reservation_unit,
+    second_reservation_unit,
+):
+    application_round_with_reservation_units.reservation_units.add(
+        second_reservation_unit
+    )
+    settings.HAUKI_API_URL = "http://test.com"
+    data = AllocationDataBuilder(
+        application_round=application_round_with_reservation_units
+    ).get_allocation_data()
+
+    assert_that(mocked_opening_hours.call_count).is_equal_to(1)
+    assert_that(mocked_opening_hours.call_args[0][0]).contains_only(
+        str(reservation_unit.uuid), str(second_reservation_unit.uuid)
+    )
+    for unit in [reservation_unit, second_reservation_unit]:
+        assert_that(data.spaces[unit.id].available_times).is_length(16)
+
+
 @pytest.mark.django_db
 def test_should_map_application_events(
     application_round_with_reservation_units,
@@ -174,6 +265,40 @@ def test_should_exclude_already_accepted_schedules(
     assert_that(data.baskets[None].events[0].occurrences).is_empty()
 
 
+@pytest.mark.django_db
+def test_should_map_previous_results_to_fixed_assignments_and_hints(
+    application_round_with_reservation_units,
+    application_with_reservation_units,
+    recurring_application_event,
+    scheduled_for_monday,
+    result_scheduled_for_monday,
+    reservation_unit,
+):
+
+    data = AllocationDataBuilder(
+        application_round=application_round_with_reservation_units
+    ).get_allocation_data()
+
+    assert_that(data.fixed_assignments).is_length(1)
+    assert_that(data.fixed_assignments[0]).has_space_id(
+        reservation_unit.id
+    ).has_occurrence_id(scheduled_for_monday.id)
+    assert_that(data.hints).is_empty()
+
+    result_scheduled_for_monday.accepted = False
+    result_scheduled_for_monday.save()
+    data = AllocationDataBuilder(
+        application_round=application_round_with_reservation_units
+    ).get_allocation_data()
+
+    # Monday 6.1.2020 10:00 from the start of the period
+    hour = 60 // ALLOCATION_PRECISION
+    assert_that(data.fixed_assignments).is_empty()
+    assert_that(data.hints[scheduled_for_monday.id]).has_space_id(
+        reservation_unit.id
+    ).has_begin((5 * 24 + 10) * hour)
+
+
 @pytest.mark.django_db
 def test_should_map_units_to_spaces(
     application_round_with_reservation_units,
@@ -322,3 +447,116 @@ def test_should_include_not_cancelled_or_declined_applications(
     ).get_allocation_data()
 
     assert_that(data.baskets[None].events).is_length(1)
+
+
+def create_applications_with_events(
+    application_round, reservation_unit, purpose, count
+):
+    for _ in range(count):
+        application = Application.objects.create(
+            application_round_id=application_round.id
+        )
+        event = ApplicationEvent.objects.create(
+            application=application,
+            num_persons=10,
+            min_duration=datetime.timedelta(hours=1),
+            max_duration=datetime.timedelta(hours=1),
+            events_per_week=1,
+            begin=datetime.date(year=2020, month=1, day=1),
+            end=datetime.date(year=2020, month=2, day=28),
+            biweekly=False,
+            purpose=purpose,
+        )
+        ApplicationEventSchedule.objects.create(
+            day=1, begin="10:00", end="12:00", application_event=event
+        )
+        EventReservationUnit.objects.create(
+            priority=100, application_event=event, reservation_unit=reservation_unit
+        )
+
+
+@pytest.mark.django_db
+def test_should_load_allocation_data_with_constant_number_of_queries(
+    application_round_with_reservation_units,
+    application_round_basket_one,
+    application_round_basket_two,
+    reservation_unit,
+    purpose,
+):
+    def count_queries():
+        with CaptureQueriesContext(connection) as context:
+            data = AllocationDataBuilder(
+                application_round=application_round_with_reservation_units
+            ).get_allocation_data()
+        return data, len(context.captured_queries)
+
+    create_applications_with_events(
+        application_round_with_reservation_units, reservation_unit, purpose, 1
+    )
+    small_data, small_round_queries = count_queries()
+
+    create_applications_with_events(
+        application_round_with_reservation_units, reservation_unit, purpose, 10
+    )
+    large_data, large_round_queries = count_queries()
+
+    assert_that(small_data.baskets[None].events).is_length(1)
+    assert_that(large_data.baskets[None].events).is_length(11)
+    assert_that(large_data.baskets[application_round_basket_one.id].events).is_length(
+        11
+    )
+    assert_that(large_round_queries).is_equal_to(small_round_queries)
+
+
+def test_space_opening_hours_should_match_time_of_day_conversion():
+    period_start = datetime.date(2021, 1, 4)
+    period_end = datetime.date(2021, 1, 10)
+    by_time = AllocationSpace(
+        id=1, max_persons=None, period_start=period_start, period_end=period_end
+    )
+    by_hours = AllocationSpace(
+        id=1, max_persons=None, period_start=period_start, period_end=period_end
+    )
+    day = datetime.date(2021, 1, 6)
+    by_time.add_time(
+        start=datetime.datetime(
+            2021, 1, 6, 8, 10, tzinfo=timezone.get_default_timezone()
+        ),
+        end=datetime.datetime(
+            2021, 1, 6, 21, 50, tzinfo=timezone.get_default_timezone()
+        ),
+    )
+    by_hours.add_opening_hours(
+        date=day, start=datetime.time(8, 10), end=datetime.time(21, 50)
+    )
+    # Outside of the period
+    by_hours.add_opening_hours(
+        date=datetime.date(2021, 1, 11),
+        start=datetime.time(8),
+        end=datetime.time(22),
+    )
+
+    assert_that(by_hours.window_starts.tolist()).is_equal_to(
+        by_time.window_starts.tolist()
+    )
+    assert_that(by_hours.window_ends.tolist()).is_equal_to(by_time.window_ends.tolist())
+    assert_that(list(by_hours.available_times.keys())).is_equal_to([day])
+
+
+def test_space_should_merge_overlapping_windows():
+    space = AllocationSpace(
+        id=1,
+        max_persons=None,
+        period_start=datetime.date(2021, 1, 4),
+        period_end=datetime.date(2021, 1, 10),
+    )
+    space.add_window(64, 80)
+    space.add_window(32, 48)
+    space.add_window(44, 56)
+    space.add_window(80, 88)
+
+    assert_that(space.window_starts.tolist()).is_equal_to([32, 64])
+    assert_that(space.window_ends.tolist()).is_equal_to([56, 88])
+    assert_that(space.fits(40, 56)).is_true()
+    assert_that(space.fits(50, 66)).is_false()
+    assert_that(space.windows_between(50, 70)).is_equal_to([(50, 56), (64, 70)])
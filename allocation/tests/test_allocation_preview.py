@@ -0,0 +1,124 @@
+from unittest import mock
+
+import pytest
+from assertpy import assert_that
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+
+from allocation.allocation_preview import (
+    create_preview_id,
+    get_preview_status,
+    preview_allocation,
+)
+from allocation.tasks import run_allocation_preview
+from applications.models import ApplicationEventScheduleResult
+
+
+@pytest.fixture(autouse=True)
+def clear_preview_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_should_preview_allocation_without_persisting_results(
+    application_round_with_reservation_units,
+    recurring_application_event,
+    scheduled_for_monday,
+    matching_event_reservation_unit,
+):
+    preview = preview_allocation(application_round_with_reservation_units, [])
+
+    assert_that(preview["cached"]).is_false()
+    assert_that(preview["solver_statistics"]["status"]).is_equal_to("OPTIMAL")
+    assert_that(preview["allocated_events"]).is_length(1)
+    assert_that(preview["allocated_events"][0]).has_event_id(
+        recurring_application_event.id
+    ).has_occurrence_id(scheduled_for_monday.id)
+    assert_that(ApplicationEventScheduleResult.objects.count()).is_zero()
+
+
+@pytest.mark.django_db
+def test_should_report_basket_utilisation_in_preview(
+    application_round_with_reservation_units,
+    recurring_application_event,
+    scheduled_for_monday,
+    matching_event_reservation_unit,
+):
+    preview = preview_allocation(application_round_with_reservation_units, [])
+
+    catch_all = [basket for basket in preview["baskets"] if basket["basket_id"] is None]
+    assert_that(catch_all).is_length(1)
+    assert_that(catch_all[0]["requested_duration"]).is_greater_than(0)
+    assert_that(catch_all[0]["allocated_duration"]).is_equal_to(
+        preview["allocated_events"][0]["duration"]
+    )
+
+
+@pytest.mark.django_db
+def test_should_return_cached_preview_for_unchanged_input(
+    application_round_with_reservation_units,
+    recurring_application_event,
+    scheduled_for_monday,
+    matching_event_reservation_unit,
+):
+    first = preview_allocation(application_round_with_reservation_units, [])
+    second = preview_allocation(application_round_with_reservation_units, [])
+    quick = preview_allocation(application_round_with_reservation_units, [], quick=True)
+
+    assert_that(second["cached"]).is_true()
+    assert_that(second["snapshot_hash"]).is_equal_to(first["snapshot_hash"])
+    assert_that(second["allocated_events"]).is_equal_to(first["allocated_events"])
+    assert_that(quick["cached"]).is_false()
+    assert_that(quick["solver_statistics"]["status"]).is_equal_to("GREEDY")
+
+
+@pytest.mark.django_db
+def test_should_store_preview_solved_in_task(
+    application_round_with_reservation_units,
+    recurring_application_event,
+    scheduled_for_monday,
+    matching_event_reservation_unit,
+):
+    preview_id = create_preview_id()
+    assert_that(get_preview_status(preview_id)["status"]).is_equal_to("pending")
+
+    run_allocation_preview(
+        preview_id, application_round_with_reservation_units.id, [], {}
+    )
+
+    preview = get_preview_status(preview_id)
+    assert_that(preview["status"]).is_equal_to("completed")
+    assert_that(preview["preview_id"]).is_equal_to(preview_id)
+    assert_that(preview["allocated_events"]).is_length(1)
+
+
+@pytest.mark.django_db
+def test_should_poll_preview_solved_in_another_process(
+    application_round_with_reservation_units,
+    recurring_application_event,
+    scheduled_for_monday,
+    matching_event_reservation_unit,
+):
+    # The worker and the web process each have a cache of their own
+    with mock.patch("allocation.allocation_preview.cache", LocMemCache("web", {})):
+        preview_id = create_preview_id()
+    with mock.patch("allocation.allocation_preview.cache", LocMemCache("worker", {})):
+        run_allocation_preview(
+            preview_id, application_round_with_reservation_units.id, [], {}
+        )
+    with mock.patch("allocation.allocation_preview.cache", LocMemCache("web", {})):
+        preview = get_preview_status(preview_id)
+
+    assert_that(preview["status"]).is_equal_to("completed")
+    assert_that(preview["allocated_events"]).is_length(1)
+
+
+@pytest.mark.django_db
+def test_should_not_find_unknown_or_expired_preview(settings):
+    preview_id = create_preview_id()
+    settings.ALLOCATION_PREVIEW_CACHE_TIMEOUT = -1
+
+    assert_that(get_preview_status(preview_id)).is_none()
+    assert_that(get_preview_status("abc")).is_none()
@@ -0,0 +1,173 @@
+import datetime
+
+import pytest
+from assertpy import assert_that
+
+from allocation.allocation_runner import start_allocation
+from allocation.allocation_snapshot import read_snapshot
+from allocation.models import AllocationRequest
+from allocation.tasks import run_allocation
+from applications.models import ApplicationEventScheduleResult
+
+
+@pytest.fixture
+def allocation_request(application_round_with_reservation_units) -> AllocationRequest:
+    return AllocationRequest.objects.create(
+        application_round=application_round_with_reservation_units,
+        start_date=datetime.datetime.now(),
+    )
+
+
+@pytest.mark.django_db
+def test_should_complete_allocation_and_store_statistics(
+    allocation_request,
+    recurring_application_event,
+    scheduled_for_monday,
+    matching_event_reservation_unit,
+):
+    start_allocation(allocation_request)
+
+    allocation_request.refresh_from_db()
+    assert_that(allocation_request.phase).is_equal_to(AllocationRequest.COMPLETED)
+    assert_that(allocation_request.completed).is_true()
+    assert_that(allocation_request.end_date).is_not_none()
+    assert_that(allocation_request.solver_statistics["status"]).is_equal_to("OPTIMAL")
+    assert_that(allocation_request.application_round.allocating).is_false()
+    assert_that(ApplicationEventScheduleResult.objects.count()).is_equal_to(1)
+
+
+@pytest.mark.django_db
+def test_should_not_persist_cancelled_allocation(
+    allocation_request,
+    recurring_application_event,
+    scheduled_for_monday,
+    matching_event_reservation_unit,
+):
+    allocation_request.cancelled = True
+    allocation_request.save()
+
+    start_allocation(allocation_request)
+
+    allocation_request.refresh_from_db()
+    assert_that(allocation_request.phase).is_equal_to(AllocationRequest.CANCELLED)
+    assert_that(allocation_request.completed).is_false()
+    assert_that(allocation_request.application_round.allocating).is_false()
+    assert_that(ApplicationEventScheduleResult.objects.count()).is_zero()
+
+
+@pytest.mark.django_db
+def test_task_should_skip_request_cancelled_while_queued(
+    allocation_request,
+    recurring_application_event,
+    scheduled_for_monday,
+    matching_event_reservation_unit,
+):
+    allocation_request.phase = AllocationRequest.CANCELLED
+    allocation_request.save()
+
+    run_allocation(allocation_request.id)
+
+    assert_that(ApplicationEventScheduleResult.objects.count()).is_zero()
+
+
+@pytest.mark.django_db
+def test_redelivered_task_should_fail_interrupted_request(
+    allocation_request,
+    recurring_application_event,
+    scheduled_for_monday,
+    matching_event_reservation_unit,
+):
+    allocation_request.phase = AllocationRequest.SOLVING
+    allocation_request.task_id = "interrupted-task"
+    allocation_request.save()
+    allocation_request.application_round.allocating = True
+    allocation_request.application_round.save()
+
+    run_allocation.apply(args=[allocation_request.id], task_id="interrupted-task")
+
+    allocation_request.refresh_from_db()
+    assert_that(allocation_request.phase).is_equal_to(AllocationRequest.FAILED)
+    assert_that(allocation_request.end_date).is_not_none()
+    assert_that(allocation_request.application_round.allocating).is_false()
+    assert_that(ApplicationEventScheduleResult.objects.count()).is_zero()
+
+
+@pytest.mark.django_db
+def test_task_should_not_touch_request_running_in_another_task(
+    allocation_request,
+    recurring_application_event,
+    scheduled_for_monday,
+    matching_event_reservation_unit,
+):
+    allocation_request.phase = AllocationRequest.SOLVING
+    allocation_request.task_id = "running-task"
+    allocation_request.save()
+
+    run_allocation.apply(args=[allocation_request.id], task_id="other-task")
+
+    allocation_request.refresh_from_db()
+    assert_that(allocation_request.phase).is_equal_to(AllocationRequest.SOLVING)
+
+
+@pytest.mark.django_db
+def test_should_export_snapshot_when_snapshot_dir_is_set(
+    allocation_request,
+    recurring_application_event,
+    scheduled_for_monday,
+    matching_event_reservation_unit,
+    settings,
+    tmp_path,
+):
+    settings.ALLOCATION_SNAPSHOT_DIR = str(tmp_path)
+
+    start_allocation(allocation_request)
+
+    snapshot = read_snapshot(
+        str(tmp_path / ("allocation_request_%s.json.gz" % allocation_request.id))
+    )
+    assert_that(snapshot["metadata"]["allocation_request_id"]).is_equal_to(
+        allocation_request.id
+    )
+    assert_that(snapshot["events"]).is_length(1)
+
+
+@pytest.mark.django_db
+def test_should_allocate_quick_request_with_greedy_heuristic(
+    allocation_request,
+    recurring_application_event,
+    scheduled_for_monday,
+    matching_event_reservation_unit,
+):
+    allocation_request.quick = True
+    allocation_request.save()
+
+    start_allocation(allocation_request)
+
+    allocation_request.refresh_from_db()
+    assert_that(allocation_request.phase).is_equal_to(AllocationRequest.COMPLETED)
+    assert_that(allocation_request.solver_statistics["status"]).is_equal_to("GREEDY")
+    assert_that(ApplicationEventScheduleResult.objects.count()).is_equal_to(1)
+
+
+@pytest.mark.django_db
+def test_should_store_allocation_metrics(
+    allocation_request,
+    recurring_application_event,
+    scheduled_for_monday,
+    matching_event_reservation_unit,
+):
+    start_allocation(allocation_request)
+
+    allocation_request.refresh_from_db()
+    assert_that(allocation_request.metrics).contains_key(
+        "hauki_fetch_time",
+        "data_build_time",
+        "solve_time",
+        "persist_time",
+        "total_time",
+    )
+    assert_that(allocation_request.metrics["presolve"]["candidates"]).is_equal_to(1)
+    assert_that(allocation_request.solver_statistics["num_intervals"]).is_equal_to(1)
+    assert_that(
+        allocation_request.solver_statistics["best_objective_bound"]
+    ).is_equal_to(allocation_request.solver_statistics["objective_value"])
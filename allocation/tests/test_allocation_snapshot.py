@@ -0,0 +1,101 @@
+import datetime
+
+import pytest
+from assertpy import assert_that
+
+from allocation.allocation_benchmark import SyntheticAllocationDataGenerator
+from allocation.allocation_models import AllocationFixedAssignment, AllocationHint
+from allocation.allocation_snapshot import (
+    AllocationSnapshotError,
+    allocation_data_from_snapshot,
+    allocation_data_to_snapshot,
+    read_snapshot,
+    snapshot_hash,
+    write_snapshot,
+)
+from allocation.allocation_solver import AllocationSolver, AllocationSolverParameters
+from applications.models import EventOccurrence
+
+
+def generate_allocation_data():
+    data = SyntheticAllocationDataGenerator(
+        num_spaces=10, num_applications=10, num_baskets=2, period_length=14
+    ).generate()
+    event = data.baskets[None].events[0]
+    first_occurrence_id, second_occurrence_id = list(event.occurrences.keys())[:2]
+    occurrence = EventOccurrence(
+        weekday=event.occurrences[first_occurrence_id].weekday,
+        begin=datetime.time(hour=12),
+        end=datetime.time(hour=13),
+        occurrences=[],
+    )
+    data.fixed_assignments = [
+        AllocationFixedAssignment(
+            space_id=event.space_ids[0],
+            event_id=event.id,
+            occurrence_id=first_occurrence_id,
+            occurrence=occurrence,
+            period_start=data.period_start,
+            event_begin=event.begin,
+        )
+    ]
+    data.hints = {
+        second_occurrence_id: AllocationHint(
+            space_id=event.space_ids[0],
+            occurrence_id=second_occurrence_id,
+            basket_id=None,
+            occurrence=occurrence,
+            period_start=data.period_start,
+            event_begin=event.begin,
+        )
+    }
+    return data
+
+
+def solve(data):
+    solution = AllocationSolver(
+        allocation_data=data,
+        parameters=AllocationSolverParameters(
+            num_search_workers=1,
+            max_time_in_seconds=10,
+            random_seed=1,
+            num_processes=1,
+        ),
+    ).solve()
+    return sorted(
+        (event.space_id, event.occurrence_id, event.begin, event.basket_id)
+        for event in solution
+    )
+
+
+def test_snapshot_round_trip_gives_the_same_solution(tmp_path):
+    data = generate_allocation_data()
+    path = str(tmp_path / "snapshot.json.gz")
+
+    written_hash = write_snapshot(data, path, metadata={"allocation_request_id": 1})
+    snapshot = read_snapshot(path)
+    replayed = allocation_data_from_snapshot(snapshot)
+
+    assert_that(snapshot_hash(snapshot)).is_equal_to(written_hash)
+    assert_that(snapshot["metadata"]).is_equal_to({"allocation_request_id": 1})
+    assert_that(replayed.fixed_assignments[0].occurrence.begin).is_equal_to(
+        data.fixed_assignments[0].occurrence.begin
+    )
+    assert_that(list(replayed.hints.keys())).is_equal_to(list(data.hints.keys()))
+    assert_that(solve(replayed)).is_equal_to(solve(data))
+
+
+def test_snapshot_hash_does_not_depend_on_metadata():
+    data = generate_allocation_data()
+
+    assert_that(
+        snapshot_hash(allocation_data_to_snapshot(data, metadata={"run": 1}))
+    ).is_equal_to(snapshot_hash(allocation_data_to_snapshot(data)))
+
+
+def test_should_refuse_snapshot_of_other_version():
+    snapshot = allocation_data_to_snapshot(generate_allocation_data())
+    snapshot["version"] = 0
+
+    with pytest.raises(AllocationSnapshotError):
+        allocation_data_from_snapshot(snapshot)
@@ -1,10 +1,32 @@
 import datetime
+import time
+from unittest import mock
 
 import pytest
+from assertpy import assert_that
+from ortools.sat.python import cp_model
 
 from allocation.allocation_data_builder import AllocationDataBuilder
-from allocation.allocation_solver import AllocationSolver
-from applications.models import EventReservationUnit
+from allocation.allocation_models import (
+    ALLOCATION_PRECISION,
+    AllocationBasket,
+    AllocationData,
+    AllocationEvent,
+    AllocationSpace,
+)
+from allocation.allocation_solver import (
+    MIN_COMPONENT_TIME_IN_SECONDS,
+    AllocationSolutionCallback,
+    AllocationSolver,
+    AllocationSolverParameters,
+    CancellationWatcher,
+)
+from applications.models import (
+    ApplicationEvent,
+    ApplicationEventSchedule,
+    EventOccurrence,
+    EventReservationUnit,
+)
 
 
 @pytest.mark.django_db
@@ -730,3 +752,299 @@ def test_can_allocate_multiple_to_different_schedules(
     solution = solver.solve()
 
     assert len(solution) == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "multiple_applications",
+    (
+        [
+            {
+                "applications": [
+                    {
+                        "events": [
+                            {
+                                "duration": 780,
+                                "events_per_week": 1,
+                                "schedules": [{"day": 0}],
+                            },
+                            {
+                                "duration": 60,
+                                "events_per_week": 1,
+                                "schedules": [{"day": 1}],
+                            },
+                        ]
+                    }
+                ]
+            }
+        ]
+    ),
+    indirect=True,
+)
+def test_presolve_removes_candidates_not_fitting_opening_hours(
+    application_round_with_reservation_units, multiple_applications
+):
+    data = AllocationDataBuilder(
+        application_round=application_round_with_reservation_units
+    ).get_allocation_data()
+
+    solver = AllocationSolver(allocation_data=data)
+
+    solution = solver.solve()
+
+    # Open 12 hours each day, 13 hour event can never fit
+    assert len(solution) == 1
+    assert solver.presolve_statistics.candidates == 2
+    assert solver.presolve_statistics.removed_no_opening_window == 1
+    assert solver.presolve_statistics.remaining == 1
+
+
+@pytest.mark.django_db
+def test_should_not_allocate_over_accepted_results(
+    application_round_with_reservation_units,
+    application_with_reservation_units,
+    recurring_application_event,
+    scheduled_for_monday,
+    matching_event_reservation_unit,
+    result_scheduled_for_monday,
+    reservation_unit,
+    purpose,
+):
+    competing_event = ApplicationEvent.objects.create(
+        application=application_with_reservation_units,
+        num_persons=10,
+        min_duration=datetime.timedelta(hours=1),
+        max_duration=datetime.timedelta(hours=1),
+        name="Floorball",
+        events_per_week=1,
+        begin=datetime.date(year=2020, month=1, day=1),
+        end=datetime.date(year=2020, month=2, day=28),
+        biweekly=False,
+        purpose=purpose,
+    )
+    ApplicationEventSchedule.objects.create(
+        day=0, begin="10:00", end="11:00", application_event=competing_event
+    )
+    EventReservationUnit.objects.create(
+        priority=100,
+        application_event=competing_event,
+        reservation_unit=reservation_unit,
+    )
+
+    data = AllocationDataBuilder(
+        application_round=application_round_with_reservation_units
+    ).get_allocation_data()
+
+    solver = AllocationSolver(allocation_data=data)
+
+    solution = solver.solve()
+
+    # Accepted result already holds monday 10-11 on the only unit
+    assert len(data.fixed_assignments) == 1
+    assert len(solution) == 0
+
+
+def get_allocation_data_with_two_opening_windows() -> AllocationData:
+    """One space open 8-12 and 16-22 on monday and two four hour events"""
+    period_start = datetime.date(2021, 1, 4)
+    period_end = datetime.date(2021, 1, 10)
+    space = AllocationSpace(
+        id=1, max_persons=None, period_start=period_start, period_end=period_end
+    )
+    space.add_opening_hours(period_start, datetime.time(8), datetime.time(12))
+    space.add_opening_hours(period_start, datetime.time(16), datetime.time(22))
+    events = [
+        AllocationEvent(
+            id=event_id,
+            occurrences={
+                event_id
+                * 10: EventOccurrence(
+                    weekday=0,
+                    begin=datetime.time(8),
+                    end=datetime.time(22),
+                    occurrences=[],
+                )
+            },
+            period_start=period_start,
+            period_end=period_end,
+            space_ids=[space.id],
+            begin=period_start,
+            end=period_end,
+            min_duration=datetime.timedelta(hours=4),
+            max_duration=datetime.timedelta(hours=4),
+            events_per_week=1,
+            num_persons=None,
+        )
+        for event_id in [1, 2]
+    ]
+    return AllocationData(
+        period_start=period_start,
+        period_end=period_end,
+        baskets={
+            None: AllocationBasket(
+                id=None,
+                order_number=1000,
+                allocation_percentage=None,
+                events=events,
+                score=1,
+            )
+        },
+        spaces={space.id: space},
+    )
+
+
+def test_should_allocate_events_to_each_opening_window_of_a_day():
+    data = get_allocation_data_with_two_opening_windows()
+
+    solution = AllocationSolver(allocation_data=data).solve()
+
+    morning, evening = sorted(solution, key=lambda event: event.begin)
+    assert_that(morning.begin).is_equal_to(datetime.time(8))
+    assert_that(morning.end).is_equal_to(datetime.time(12))
+    assert_that(evening.begin).is_greater_than_or_equal_to(datetime.time(16))
+    assert_that(evening.end).is_less_than_or_equal_to(datetime.time(22))
+
+
+@mock.patch("allocation.allocation_solver.CANCELLATION_CHECK_INTERVAL", 0.1)
+def test_should_stop_search_that_finds_no_solutions_when_cancelled():
+    # Pigeonhole problem, infeasible but slow to prove without presolve
+    model = cp_model.CpModel()
+    holes = 12
+    placed = {
+        (pigeon, hole): model.NewBoolVar(f"p{pigeon}h{hole}")
+        for pigeon in range(holes + 1)
+        for hole in range(holes)
+    }
+    for pigeon in range(holes + 1):
+        model.AddBoolOr([placed[pigeon, hole] for hole in range(holes)])
+    for hole in range(holes):
+        model.Add(sum(placed[pigeon, hole] for pigeon in range(holes + 1)) <= 1)
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = 60
+    solver.parameters.num_search_workers = 1
+    solver.parameters.cp_model_presolve = False
+    solver.parameters.symmetry_level = 0
+    callback = AllocationSolutionCallback(selected={}, starts={}, ends={})
+
+    watcher = CancellationWatcher(callback, should_stop=lambda: True)
+    watcher.start()
+    status = solver.SolveWithSolutionCallback(model, callback)
+    watcher.stop()
+
+    assert_that(callback.cancelled).is_true()
+    assert_that(callback.solution_count).is_zero()
+    assert_that(status).is_equal_to(cp_model.UNKNOWN)
+    assert_that(solver.WallTime()).is_less_than(10)
+
+
+def test_solver_parameters_should_fall_back_to_settings(settings):
+    settings.ALLOCATION_SOLVER_NUM_SEARCH_WORKERS = 3
+    settings.ALLOCATION_SOLVER_MAX_TIME_IN_SECONDS = 60
+    settings.ALLOCATION_SOLVER_RELATIVE_GAP_LIMIT = 0.05
+    settings.ALLOCATION_SOLVER_RANDOM_SEED = 42
+    settings.ALLOCATION_SOLVER_NUM_PROCESSES = 2
+    settings.ALLOCATION_SOLVER_GREEDY_HINTS = False
+
+    parameters = AllocationSolverParameters(max_time_in_seconds=10, random_seed=0)
+
+    assert_that(parameters.num_search_workers).is_equal_to(3)
+    assert_that(parameters.max_time_in_seconds).is_equal_to(10)
+    assert_that(parameters.relative_gap_limit).is_equal_to(0.05)
+    assert_that(parameters.random_seed).is_equal_to(0)
+    assert_that(parameters.num_processes).is_equal_to(2)
+    assert_that(parameters.greedy_hints).is_false()
+
+
+def test_solver_parameters_should_be_applied_to_cp_sat():
+    solver = cp_model.CpSolver()
+
+    AllocationSolverParameters(
+        num_search_workers=3,
+        max_time_in_seconds=2.5,
+        relative_gap_limit=0.1,
+        random_seed=7,
+    ).apply(solver)
+
+    assert_that(solver.parameters.num_search_workers).is_equal_to(3)
+    assert_that(solver.parameters.max_time_in_seconds).is_equal_to(2.5)
+    assert_that(solver.parameters.relative_gap_limit).is_close_to(0.1, 1e-9)
+    assert_that(solver.parameters.random_seed).is_equal_to(7)
+
+
+def test_solver_time_limit_should_be_cut_to_task_time_limit(settings):
+    settings.ALLOCATION_TASK_SOFT_TIME_LIMIT = 600
+    task_started = time.perf_counter() - 500
+
+    parameters = AllocationSolverParameters(
+        max_time_in_seconds=0, random_seed=7
+    ).within_task_time_limit(task_started)
+    late_parameters = AllocationSolverParameters(
+        max_time_in_seconds=20
+    ).within_task_time_limit(task_started - 100)
+
+    # 100 seconds are left of the task, 60 of them for saving the results
+    assert_that(parameters.max_time_in_seconds).is_between(39, 40)
+    assert_that(parameters.random_seed).is_equal_to(7)
+    assert_that(late_parameters.max_time_in_seconds).is_equal_to(
+        MIN_COMPONENT_TIME_IN_SECONDS
+    )
+    assert_that(
+        AllocationSolverParameters(max_time_in_seconds=20)
+        .within_task_time_limit(time.perf_counter())
+        .max_time_in_seconds
+    ).is_equal_to(20)
+
+
+def mock_cp_solver(mock_solver_class, status, status_name, solve=None):
+    """Makes the mocked CpSolver return the status, after passing the solution
+    callback to solve"""
+
+    def solve_with_solution_callback(model, callback):
+        if solve:
+            solve(callback)
+        return status
+
+    cp_solver = mock_solver_class.return_value
+    cp_solver.SolveWithSolutionCallback.side_effect = solve_with_solution_callback
+    cp_solver.StatusName.return_value = status_name
+    cp_solver.BestObjectiveBound.return_value = 0.0
+    cp_solver.WallTime.return_value = 1.0
+    cp_solver.NumConflicts.return_value = 0
+    cp_solver.NumBranches.return_value = 0
+
+
+def test_should_read_time_limited_feasible_solution_from_callback():
+    data = get_allocation_data_with_two_opening_windows()
+    solver = AllocationSolver(allocation_data=data)
+    # Only the first event is in the best solution found before the time limit
+    begin = 8 * 60 // ALLOCATION_PRECISION
+    end = 12 * 60 // ALLOCATION_PRECISION
+
+    def find_solution(callback):
+        callback.objective_value = 1.0
+        callback.assignments = {(1, 1, 10): (begin, end)}
+
+    with mock.patch("allocation.allocation_solver.cp_model.CpSolver") as cp_solver:
+        mock_cp_solver(cp_solver, cp_model.FEASIBLE, "FEASIBLE", find_solution)
+        solution = solver.solve()
+
+    assert_that(solution).is_length(1)
+    assert_that(solution[0].event_id).is_equal_to(1)
+    assert_that(solution[0].begin).is_equal_to(datetime.time(8))
+    assert_that(solution[0].end).is_equal_to(datetime.time(12))
+    assert_that(solver.statistics.status).is_equal_to("FEASIBLE")
+    assert_that(solver.statistics.greedy_fallback).is_false()
+
+
+def test_should_fall_back_to_greedy_allocation_when_solver_finds_nothing():
+    data = get_allocation_data_with_two_opening_windows()
+    solver = AllocationSolver(allocation_data=data)
+
+    with mock.patch("allocation.allocation_solver.cp_model.CpSolver") as cp_solver:
+        mock_cp_solver(cp_solver, cp_model.UNKNOWN, "UNKNOWN")
+        solution = solver.solve()
+
+    assert_that(sorted(event.event_id for event in solution)).is_equal_to([1, 2])
+    assert_that(solver.statistics.status).is_equal_to("UNKNOWN")
+    assert_that(solver.statistics.greedy_fallback).is_true()
+    assert_that(solver.statistics.objective_value).is_greater_than(0)
@@ -432,3 +432,49 @@ def test_should_restrict_output_by_output_basket_ids(
     assert_that(solution[0]).has_basket_id(
         application_round_basket_two.id
     ).has_event_id(basket_two_event.id)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "multiple_applications",
+    (
+        [
+            {
+                "applications": [
+                    {
+                        "events": [
+                            {
+                                "duration": 60,
+                                "events_per_week": 1,
+                                "schedules": [
+                                    {"day": 0, "start": "10:00", "end": "22:00"},
+                                ],
+                            },
+                        ]
+                    }
+                ]
+            }
+        ]
+    ),
+    indirect=True,
+)
+def test_should_share_variables_of_event_in_multiple_baskets(
+    application_round_with_reservation_units,
+    multiple_applications,
+    application_round_basket_one,
+    application_round_basket_two,
+):
+    data = AllocationDataBuilder(
+        application_round=application_round_with_reservation_units
+    ).get_allocation_data()
+    event = multiple_applications["created_events"][0]
+
+    solver = AllocationSolver(allocation_data=data)
+    solution = solver.solve()
+
+    # The event belongs to both baskets and the catch-all basket
+    assert_that(solver.presolve_statistics.candidates).is_equal_to(1)
+    assert_that(solution).is_length(1)
+    assert_that(solution[0]).has_basket_id(
+        application_round_basket_one.id
+    ).has_event_id(event.id)
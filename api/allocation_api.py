@@ -1,12 +1,18 @@
-import threading
-
 from django.conf import settings
+from django.db import transaction
 from django.utils.datetime_safe import datetime
-from rest_framework import permissions, serializers, viewsets
-from rest_framework.exceptions import ValidationError
+from rest_framework import permissions, serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
 
-from allocation.allocation_runner import start_allocation
+from allocation.allocation_preview import get_preview_status
 from allocation.models import AllocationRequest
+from allocation.tasks import (
+    cancel_allocation,
+    enqueue_allocation,
+    enqueue_allocation_preview,
+)
 from api.applications_api.serializers import NullableCurrentUserDefault
 from applications.models import (
     ApplicationRound,
@@ -24,6 +30,17 @@ class UnsuitableStatusForAllocationException(Exception):
     pass
 
 
+def validate_allocatable(application_round: ApplicationRound):
+    if application_round.get_status().status not in [
+        ApplicationRoundStatus.REVIEW_DONE,
+        ApplicationRoundStatus.ALLOCATED,
+    ]:
+        raise ValidationError(
+            f"Can only allocate application rounds when "
+            f"{ApplicationRoundStatus.REVIEW_DONE} or {ApplicationRoundStatus.ALLOCATED}"
+        )
+
+
 class AllocationRequestSerializer(serializers.ModelSerializer):
     start_date = serializers.DateTimeField(read_only=True)
     end_date = serializers.DateTimeField(read_only=True)
@@ -35,6 +52,28 @@ class AllocationRequestSerializer(serializers.ModelSerializer):
         source="application_round_baskets",
         many=True,
     )
+    # The settings are the limits the allocation worker is sized for
+    num_search_workers = serializers.IntegerField(
+        required=False,
+        allow_null=True,
+        min_value=1,
+        max_value=settings.ALLOCATION_SOLVER_NUM_SEARCH_WORKERS,
+    )
+    max_time_in_seconds = serializers.IntegerField(
+        required=False,
+        allow_null=True,
+        min_value=1,
+        max_value=settings.ALLOCATION_SOLVER_MAX_TIME_IN_SECONDS,
+    )
+    relative_gap_limit = serializers.FloatField(
+        required=False, allow_null=True, min_value=0
+    )
+    random_seed = serializers.IntegerField(required=False, allow_null=True)
+    quick = serializers.BooleanField(required=False, default=False)
+    phase = serializers.CharField(read_only=True)
+    cancelled = serializers.BooleanField(read_only=True)
+    solver_statistics = serializers.JSONField(read_only=True)
+    metrics = serializers.JSONField(read_only=True)
 
     class Meta:
         model = AllocationRequest
@@ -46,6 +85,15 @@ class AllocationRequestSerializer(serializers.ModelSerializer):
             "completed",
             "user",
             "application_round_basket_ids",
+            "num_search_workers",
+            "max_time_in_seconds",
+            "relative_gap_limit",
+            "random_seed",
+            "quick",
+            "phase",
+            "cancelled",
+            "solver_statistics",
+            "metrics",
         ]
 
     def create(self, validated_data):
@@ -54,15 +102,7 @@ class AllocationRequestSerializer(serializers.ModelSerializer):
         application_round_id = validated_data["application_round_id"]
 
         application_round = ApplicationRound.objects.get(pk=application_round_id)
-
-        if application_round.get_status().status not in [
-            ApplicationRoundStatus.REVIEW_DONE,
-            ApplicationRoundStatus.ALLOCATED,
-        ]:
-            raise ValidationError(
-                f"Can only allocate application rounds when "
-                f"{ApplicationRoundStatus.REVIEW_DONE} or {ApplicationRoundStatus.ALLOCATED}"
-            )
+        validate_allocatable(application_round)
 
         matching_requests = AllocationRequest.objects.filter(
             application_round__id=application_round_id, end_date=None
@@ -74,16 +114,68 @@ class AllocationRequestSerializer(serializers.ModelSerializer):
             )
 
         allocation_request = super().create(validated_data)
-        t = threading.Thread(
-            target=start_allocation, args=[allocation_request], daemon=True
-        )
-        t.start()
+        transaction.on_commit(lambda: enqueue_allocation(allocation_request))
         return allocation_request
 
     def update(self, instance, validated_data):
         return AllocationRequest.objects.get(pk=instance.id)
 
 
+class AllocationPreviewSerializer(serializers.Serializer):
+    """Input of an allocation preview, the options of an AllocationRequest"""
+
+    application_round_id = serializers.PrimaryKeyRelatedField(
+        queryset=ApplicationRound.objects.all(), source="application_round"
+    )
+    application_round_basket_ids = serializers.PrimaryKeyRelatedField(
+        queryset=ApplicationRoundBasket.objects.all(),
+        source="application_round_baskets",
+        many=True,
+    )
+    # Previews can't ask for more than a real allocation gets
+    num_search_workers = serializers.IntegerField(
+        required=False,
+        allow_null=True,
+        min_value=1,
+        max_value=settings.ALLOCATION_SOLVER_NUM_SEARCH_WORKERS,
+    )
+    max_time_in_seconds = serializers.IntegerField(
+        required=False,
+        allow_null=True,
+        min_value=1,
+        max_value=settings.ALLOCATION_SOLVER_MAX_TIME_IN_SECONDS,
+    )
+    relative_gap_limit = serializers.FloatField(
+        required=False, allow_null=True, min_value=0
+    )
+    random_seed = serializers.IntegerField(required=False, allow_null=True)
+    quick = serializers.BooleanField(required=False, default=False)
+
+    def validate_application_round_id(self, application_round):
+        validate_allocatable(application_round)
+        return application_round
+
+    def get_parameters(self) -> dict:
+        return {
+            name: self.validated_data.get(name)
+            for name in [
+                "num_search_workers",
+                "max_time_in_seconds",
+                "relative_gap_limit",
+                "random_seed",
+            ]
+        }
+
+    def enqueue_preview(self) -> str:
+        data = self.validated_data
+        return enqueue_allocation_preview(
+            application_round_id=data["application_round"].id,
+            basket_ids=[basket.id for basket in data["application_round_baskets"]],
+            parameters=self.get_parameters(),
+            quick=data["quick"],
+        )
+
+
 class AllocationRequestViewSet(viewsets.ModelViewSet):
     queryset = AllocationRequest.objects.all()
     serializer_class = AllocationRequestSerializer
@@ -92,3 +184,42 @@ class AllocationRequestViewSet(viewsets.ModelViewSet):
         if not settings.TMP_PERMISSIONS_DISABLED
         else [permissions.AllowAny]
     )
+
+    @action(detail=True, methods=["post"])
+    def cancel(self, request, pk=None):
+        allocation_request = self.get_object()
+        if not cancel_allocation(allocation_request):
+            raise ValidationError(
+                f"Allocation request {allocation_request.id} has already finished."
+            )
+        allocation_request.refresh_from_db()
+        return Response(
+            self.get_serializer(allocation_request).data, status=status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=["post"])
+    def preview(self, request):
+        """Solves the allocation without saving the results.
+
+        The preview is solved on the allocation queue and polled with the
+        returned preview_id.
+        """
+        serializer = AllocationPreviewSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        preview_id = serializer.enqueue_preview()
+        return Response(
+            get_preview_status(preview_id) or {"preview_id": preview_id},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path=r"preview/(?P<preview_id>[0-9a-f]+)",
+        url_name="preview-status",
+    )
+    def preview_status(self, request, preview_id=None):
+        preview = get_preview_status(preview_id)
+        if preview is None:
+            raise NotFound(f"Allocation preview {preview_id} not found.")
+        return Response(preview, status=status.HTTP_200_OK)
@@ -2,7 +2,7 @@ from django.utils.datetime_safe import datetime
 from rest_framework import serializers, viewsets
 from rest_framework.response import Response
 
-from opening_hours.hours import get_opening_hours
+from opening_hours.hours_cache import get_opening_hours
 from reservation_units.models import ReservationUnit
 
 
@@ -1,7 +1,11 @@
+from unittest import mock
+
 import pytest
 from assertpy import assert_that
+from django.conf import settings
 from rest_framework.reverse import reverse
 
+from allocation.models import AllocationRequest
 from applications.models import ApplicationRoundStatus
 
 
@@ -58,6 +62,32 @@ def test_should_not_allocate_in_wrong_statuses(
     assert_that(response).has_status_code = 400
 
 
+@pytest.mark.parametrize(
+    "solver_option",
+    [
+        {"num_search_workers": settings.ALLOCATION_SOLVER_NUM_SEARCH_WORKERS + 1},
+        {"max_time_in_seconds": settings.ALLOCATION_SOLVER_MAX_TIME_IN_SECONDS + 1},
+    ],
+)
+@pytest.mark.django_db
+def test_should_not_allocate_with_solver_options_over_settings(
+    service_sector_admin_api_client,
+    application_round,
+    valid_allocation_request_data,
+    solver_option,
+):
+    application_round.set_status(ApplicationRoundStatus.REVIEW_DONE)
+    application_round.save()
+    response = service_sector_admin_api_client.post(
+        reverse("allocation_request-list"),
+        data={**valid_allocation_request_data, **solver_option},
+        format="json",
+    )
+
+    assert_that(response.status_code).is_equal_to(400)
+    assert_that(AllocationRequest.objects.count()).is_zero()
+
+
 @pytest.mark.django_db
 def test_should_not_allocate_when_allocation_in_process(
     service_sector_admin_api_client,
@@ -75,3 +105,130 @@ def test_should_not_allocate_when_allocation_in_process(
     )
 
     assert_that(response).has_status_code = 400
+
+
+@pytest.mark.django_db
+def test_should_cancel_queued_allocation_request(
+    service_sector_admin_api_client, allocation_request_in_progress
+):
+    response = service_sector_admin_api_client.post(
+        reverse(
+            "allocation_request-cancel",
+            kwargs={"pk": allocation_request_in_progress.id},
+        ),
+        format="json",
+    )
+
+    assert_that(response.status_code).is_equal_to(200)
+    assert_that(response.data["phase"]).is_equal_to(AllocationRequest.CANCELLED)
+    assert_that(response.data["cancelled"]).is_true()
+    allocation_request_in_progress.refresh_from_db()
+    assert_that(allocation_request_in_progress.end_date).is_not_none()
+
+
+@pytest.mark.django_db
+def test_should_flag_running_allocation_request_as_cancelled(
+    service_sector_admin_api_client, allocation_request_in_progress
+):
+    allocation_request_in_progress.set_phase(AllocationRequest.SOLVING)
+    response = service_sector_admin_api_client.post(
+        reverse(
+            "allocation_request-cancel",
+            kwargs={"pk": allocation_request_in_progress.id},
+        ),
+        format="json",
+    )
+
+    assert_that(response.status_code).is_equal_to(200)
+    assert_that(response.data["phase"]).is_equal_to(AllocationRequest.SOLVING)
+    assert_that(response.data["cancelled"]).is_true()
+
+
+@pytest.mark.django_db
+def test_should_not_cancel_finished_allocation_request(
+    service_sector_admin_api_client, allocation_request_in_progress
+):
+    allocation_request_in_progress.set_phase(AllocationRequest.COMPLETED)
+    response = service_sector_admin_api_client.post(
+        reverse(
+            "allocation_request-cancel",
+            kwargs={"pk": allocation_request_in_progress.id},
+        ),
+        format="json",
+    )
+
+    assert_that(response.status_code).is_equal_to(400)
+
+
+@pytest.mark.django_db
+def test_should_expose_allocation_metrics(
+    service_sector_admin_api_client, allocation_request_in_progress
+):
+    allocation_request_in_progress.metrics = {"data_build_time": 1.5}
+    allocation_request_in_progress.save()
+    response = service_sector_admin_api_client.get(
+        reverse(
+            "allocation_request-detail",
+            kwargs={"pk": allocation_request_in_progress.id},
+        ),
+        format="json",
+    )
+
+    assert_that(response.status_code).is_equal_to(200)
+    assert_that(response.data["metrics"]).is_equal_to({"data_build_time": 1.5})
+
+
+@pytest.mark.django_db
+def test_should_preview_allocation_without_creating_request(
+    service_sector_admin_api_client,
+    application_round,
+    valid_allocation_request_data,
+    settings,
+):
+    # Without Celery the preview is solved before the response
+    settings.CELERY_ENABLED = False
+    application_round.set_status(ApplicationRoundStatus.REVIEW_DONE)
+    application_round.save()
+    response = service_sector_admin_api_client.post(
+        reverse("allocation_request-preview"),
+        data={**valid_allocation_request_data, "quick": True},
+        format="json",
+    )
+
+    assert_that(response.status_code).is_equal_to(202)
+    assert_that(response.data["status"]).is_equal_to("completed")
+    assert_that(response.data).contains_key(
+        "snapshot_hash", "solver_statistics", "baskets", "allocated_events"
+    )
+    assert_that(AllocationRequest.objects.count()).is_zero()
+
+
+@pytest.mark.django_db
+@mock.patch("allocation.tasks.run_allocation_preview.apply_async")
+def test_should_solve_preview_in_background_and_poll_it(
+    mock_apply_async,
+    service_sector_admin_api_client,
+    application_round,
+    valid_allocation_request_data,
+):
+    application_round.set_status(ApplicationRoundStatus.REVIEW_DONE)
+    application_round.save()
+    response = service_sector_admin_api_client.post(
+        reverse("allocation_request-preview"),
+        data=valid_allocation_request_data,
+        format="json",
+    )
+
+    assert_that(response.status_code).is_equal_to(202)
+    assert_that(response.data["status"]).is_equal_to("pending")
+    assert_that(mock_apply_async.call_args.kwargs["queue"]).is_equal_to("allocation")
+    preview_id = response.data["preview_id"]
+    status_response = service_sector_admin_api_client.get(
+        reverse("allocation_request-preview-status", kwargs={"preview_id": preview_id})
+    )
+    assert_that(status_response.status_code).is_equal_to(200)
+    assert_that(status_response.data["status"]).is_equal_to("pending")
+    missing_response = service_sector_admin_api_client.get(
+        reverse("allocation_request-preview-status", kwargs={"preview_id": "abc"})
+    )
+    assert_that(missing_response.status_code).is_equal_to(404)
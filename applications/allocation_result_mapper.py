@@ -1,4 +1,7 @@
 import logging
+from typing import List
+
+from django.db import transaction
 
 from allocation.allocation_solver import AllocatedEvent
 from applications.models import (
@@ -13,6 +16,8 @@ from applications.utils.aggregate_data import (
 
 logger = logging.getLogger(__name__)
 
+BULK_CREATE_BATCH_SIZE = 1000
+
 
 class AllocationResultMapper(object):
     def __init__(
@@ -22,19 +27,49 @@ class AllocationResultMapper(object):
         self.application_round = application_round
 
     def to_events(self):
+        """Replaces the round's not accepted results with the allocated events.
+
+        Results and statuses are written with bulk_create in one transaction.
+        Each allocated application event gets one ALLOCATED status, and its
+        aggregate data is recalculated once after the transaction commits.
+        """
+        try:
+            with transaction.atomic():
+                application_event_ids = self._write_results()
+                transaction.on_commit(
+                    lambda: self.create_aggregate_data(application_event_ids)
+                )
+        except Exception:
+            logger.exception(
+                "AllocationResultMapper: error occurred while creating event schedule results."
+            )
+            raise
+
+    def _write_results(self) -> List[int]:
         ApplicationEventScheduleResult.objects.filter(
             accepted=False,
             application_event_schedule__application_event__application__application_round=self.application_round,
             # noqa: E501
         ).delete()
-        application_events = []
+
+        schedules = ApplicationEventSchedule.objects.only(
+            "id", "day", "application_event_id"
+        ).in_bulk(
+            [allocated_event.occurrence_id for allocated_event in self.allocated_events]
+        )
+
+        results = []
+        application_event_ids = []
         for allocated_event in self.allocated_events:
-            try:
-                application_event_schedule = ApplicationEventSchedule.objects.get(
-                    pk=allocated_event.occurrence_id
+            application_event_schedule = schedules.get(allocated_event.occurrence_id)
+            if application_event_schedule is None:
+                raise ApplicationEventSchedule.DoesNotExist(
+                    "Application event schedule {} does not exist.".format(
+                        allocated_event.occurrence_id
+                    )
                 )
-
-                ApplicationEventScheduleResult.objects.create(
+            results.append(
+                ApplicationEventScheduleResult(
                     application_event_schedule=application_event_schedule,
                     accepted=False,
                     allocated_reservation_unit_id=allocated_event.space_id,
@@ -44,19 +79,30 @@ class AllocationResultMapper(object):
                     allocated_day=application_event_schedule.day,
                     basket_id=allocated_event.basket_id,
                 )
+            )
+            application_event_ids.append(
+                application_event_schedule.application_event_id
+            )
 
-                ApplicationEventStatus.objects.create(
+        ApplicationEventScheduleResult.objects.bulk_create(
+            results, batch_size=BULK_CREATE_BATCH_SIZE
+        )
+        # One status per event, however many of its schedules were allocated
+        application_event_ids = list(dict.fromkeys(application_event_ids))
+        ApplicationEventStatus.objects.bulk_create(
+            [
+                ApplicationEventStatus(
                     status=ApplicationEventStatus.ALLOCATED,
-                    application_event=application_event_schedule.application_event,
-                )
-                application_events.append(application_event_schedule.application_event)
-            except Exception:
-                logger.exception(
-                    "AllocationResultMapper: error occurred while creating event schedule results."
+                    application_event_id=application_event_id,
                 )
-                raise
+                for application_event_id in application_event_ids
+            ],
+            batch_size=BULK_CREATE_BATCH_SIZE,
+        )
+        return application_event_ids
 
-        for event in set(application_events):
+    def create_aggregate_data(self, application_event_ids: List[int]):
+        for application_event_id in application_event_ids:
             ApplicationEventScheduleResultAggregateDataRunner(
-                application_event_id=event.id
+                application_event_id=application_event_id
             ).run()
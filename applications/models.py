@@ -4,7 +4,6 @@ import math
 import uuid
 from typing import Dict, List, Optional
 
-import recurrence
 from django.contrib.auth import get_user_model
 from django.contrib.postgres.fields import ArrayField
 from django.db import Error, models
@@ -22,8 +21,8 @@ from applications.utils.aggregate_data import (
 from reservation_units.models import ReservationUnit
 from spaces.models import District
 from tilavarauspalvelu.utils.date_util import (
-    next_or_current_matching_weekday,
-    previous_or_current_matching_weekday,
+    count_weekly_occurrences,
+    weekly_occurrences,
 )
 
 logger = logging.getLogger(__name__)
@@ -480,6 +479,32 @@ class ApplicationRoundBasket(CUSTOMER_TYPE_CONST, models.Model):
             )
         return list(events.all())
 
+    def is_application_event_in_basket(self, application_event: "ApplicationEvent"):
+        """In-memory counterpart of get_application_events_in_basket.
+
+        Does not query the database when the basket's purposes and age groups
+        are prefetched and the event's application is selected.
+        """
+        if (
+            self.home_city_id is not None
+            and application_event.application.home_city_id != self.home_city_id
+        ):
+            return False
+        purpose_ids = [purpose.id for purpose in self.purposes.all()]
+        if len(purpose_ids) > 0 and application_event.purpose_id not in purpose_ids:
+            return False
+        age_group_ids = [age_group.id for age_group in self.age_groups.all()]
+        if (
+            len(age_group_ids) > 0
+            and application_event.age_group_id not in age_group_ids
+        ):
+            return False
+        if self.customer_type is not None and len(self.customer_type) > 0:
+            return application_event.application.applicant_type in (
+                customer_types_to_applicant_types(self.customer_type)
+            )
+        return True
+
     def get_score(self):
         # TODO: Super scoring, needs to be defined how to use this properly.
         # Used for allocation scoring logic, so something is needed atm.
@@ -834,7 +859,7 @@ class ApplicationEvent(models.Model):
         total_events = []
         total_events_durations = []
         for schedule in self.application_event_schedules.all():
-            events_count = len(schedule.get_occurences().occurrences)
+            events_count = schedule.get_occurrence_count()
             total_events.append(events_count)
 
             total_events_durations.append(
@@ -882,8 +907,8 @@ class ApplicationEvent(models.Model):
             if schedule.application_event_schedule_result.declined:
                 continue
 
-            amount_of_events = len(
-                schedule.application_event_schedule_result.get_result_occurrences().occurrences
+            amount_of_events = (
+                schedule.application_event_schedule_result.get_result_occurrence_count()
             )
             total_amount_of_events.append(amount_of_events)
             total_events_duration.append(
@@ -1001,43 +1026,28 @@ class ApplicationEventSchedule(models.Model):
     )
 
     def get_occurences(self) -> [EventOccurrence]:
-        first_matching_day = next_or_current_matching_weekday(
-            self.application_event.begin, self.day
-        )
-        previous_match = previous_or_current_matching_weekday(
-            self.application_event.end, self.day
-        )
-        myrule = recurrence.Rule(
-            recurrence.WEEKLY,
-            interval=1 if not self.application_event.biweekly else 2,
-            byday=self.day,
-            until=datetime.datetime(
-                year=previous_match.year,
-                month=previous_match.month,
-                day=previous_match.day,
-                hour=self.end.hour,
-                minute=self.end.minute,
-                second=0,
-            ),
-        )
-        pattern = recurrence.Recurrence(
-            dtstart=datetime.datetime(
-                year=first_matching_day.year,
-                month=first_matching_day.month,
-                day=first_matching_day.day,
-                hour=self.begin.hour,
-                minute=self.begin.minute,
-                second=0,
-            ),
-            rrules=[
-                myrule,
-            ],
-        )
         return EventOccurrence(
             weekday=self.day,
             begin=self.begin,
             end=self.end,
-            occurrences=list(pattern.occurrences()),
+            occurrences=weekly_occurrences(
+                self.application_event.begin,
+                self.application_event.end,
+                self.day,
+                self.begin,
+                self.end,
+                interval=1 if not self.application_event.biweekly else 2,
+            ),
+        )
+
+    def get_occurrence_count(self) -> int:
+        return count_weekly_occurrences(
+            self.application_event.begin,
+            self.application_event.end,
+            self.day,
+            self.begin,
+            self.end,
+            interval=1 if not self.application_event.biweekly else 2,
         )
 
 
@@ -1106,46 +1116,33 @@ class ApplicationEventScheduleResult(models.Model):
 
     def get_result_occurrences(self) -> [EventOccurrence]:
         application_event = self.application_event_schedule.application_event
-        begin = application_event.begin
-        end = application_event.end
-
-        first_matching_day = next_or_current_matching_weekday(begin, self.allocated_day)
-        previous_match = previous_or_current_matching_weekday(end, self.allocated_day)
-        myrule = recurrence.Rule(
-            recurrence.WEEKLY,
-            interval=1 if not application_event.biweekly else 2,
-            byday=self.allocated_day,
-            until=datetime.datetime(
-                year=previous_match.year,
-                month=previous_match.month,
-                day=previous_match.day,
-                hour=self.allocated_end.hour,
-                minute=self.allocated_end.minute,
-                second=0,
-            ),
-        )
-        pattern = recurrence.Recurrence(
-            dtstart=datetime.datetime(
-                year=first_matching_day.year,
-                month=first_matching_day.month,
-                day=first_matching_day.day,
-                hour=self.allocated_begin.hour,
-                minute=self.allocated_begin.minute,
-                second=0,
-            ),
-            rrules=[
-                myrule,
-            ],
-        )
         return EventOccurrence(
             weekday=self.allocated_day,
             begin=self.allocated_begin,
             end=self.allocated_end,
-            occurrences=list(pattern.occurrences()),
+            occurrences=weekly_occurrences(
+                application_event.begin,
+                application_event.end,
+                self.allocated_day,
+                self.allocated_begin,
+                self.allocated_end,
+                interval=1 if not application_event.biweekly else 2,
+            ),
+        )
+
+    def get_result_occurrence_count(self) -> int:
+        application_event = self.application_event_schedule.application_event
+        return count_weekly_occurrences(
+            application_event.begin,
+            application_event.end,
+            self.allocated_day,
+            self.allocated_begin,
+            self.allocated_end,
+            interval=1 if not application_event.biweekly else 2,
         )
 
     def create_aggregate_data(self):
-        total_amount_of_events = len(self.get_result_occurrences().occurrences)
+        total_amount_of_events = self.get_result_occurrence_count()
         total_events_duration = (
             total_amount_of_events * self.allocated_duration
         ).total_seconds()
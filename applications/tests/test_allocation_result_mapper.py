@@ -1,4 +1,5 @@
 import datetime
+from unittest import mock
 
 import pytest
 from assertpy import assert_that
@@ -6,7 +7,7 @@ from assertpy import assert_that
 from allocation.allocation_data_builder import AllocationDataBuilder
 from allocation.allocation_solver import AllocationSolver
 from applications.allocation_result_mapper import AllocationResultMapper
-from applications.models import ApplicationEventScheduleResult
+from applications.models import ApplicationEventScheduleResult, ApplicationEventStatus
 
 
 @pytest.mark.django_db
@@ -86,3 +87,43 @@ def test_should_delete_not_accepted(
     )
     mapper.to_events()
     assert_that(ApplicationEventScheduleResult.objects.count()).is_equal_to(0)
+
+
+@mock.patch(
+    "applications.allocation_result_mapper.ApplicationEventScheduleResultAggregateDataRunner"
+)
+@mock.patch(
+    "applications.allocation_result_mapper.transaction.on_commit",
+    side_effect=lambda func: func(),
+)
+@pytest.mark.django_db
+def test_should_create_one_status_and_aggregate_data_per_event(
+    mocked_on_commit,
+    mocked_aggregate_data_runner,
+    application_round_with_reservation_units,
+    application_with_reservation_units,
+    recurring_application_event,
+    scheduled_for_monday,
+    scheduled_for_tuesday,
+    matching_event_reservation_unit,
+):
+    data = AllocationDataBuilder(
+        application_round=application_round_with_reservation_units,
+    ).get_allocation_data()
+    allocation_events = AllocationSolver(allocation_data=data).solve()
+    assert_that(allocation_events).is_length(2)
+
+    AllocationResultMapper(
+        allocation_events, application_round_with_reservation_units
+    ).to_events()
+
+    assert_that(ApplicationEventScheduleResult.objects.count()).is_equal_to(2)
+    assert_that(
+        ApplicationEventStatus.objects.filter(
+            application_event=recurring_application_event,
+            status=ApplicationEventStatus.ALLOCATED,
+        ).count()
+    ).is_equal_to(1)
+    mocked_aggregate_data_runner.assert_called_once_with(
+        application_event_id=recurring_application_event.id
+    )
@@ -8,7 +8,7 @@ from applications.utils.aggregate_data import (
     ApplicationAggregateDataCreator,
     ApplicationRoundAggregateDataCreator,
 )
-from opening_hours.hours import get_opening_hours
+from opening_hours.hours_cache import get_opening_hours
 from reservations.models import STATE_CHOICES, RecurringReservation, Reservation
 from tilavarauspalvelu.utils.date_util import next_or_current_matching_weekday
 
@@ -156,7 +156,6 @@ class ReservationScheduler:
         )
 
     def get_opening_hours(self):
-        # TODO: Cache opening hours per unit.
         return get_opening_hours(
             self.reservation_unit.uuid,
             start_date=self.begin.date(),
@@ -11,12 +11,27 @@ function _log_boxed () {
     _log ---------------------------------
 }
 
+# Allocation runs in its own worker so that solving doesn't delay other tasks.
+# ALLOCATION_WORKER_CONCURRENCY limits how many allocations run at once.
+# The tasks run in threads, because the children of the prefork pool are daemonic
+# and can't start the process pool that the solver uses for subproblems.
+function start_allocation_worker () {
+    celery -A tilavarauspalvelu worker \
+        --queues "${ALLOCATION_CELERY_QUEUE:-allocation}" \
+        --hostname "allocation@%h" \
+        --pool threads \
+        --concurrency "${ALLOCATION_WORKER_CONCURRENCY:-1}" \
+        --prefetch-multiplier 1 \
+        --detach
+}
+
 _log_boxed "Tilavarauspalvelu container"
 
 if [ "$1" = "start_django_development_server" ]; then
     _log_boxed "Running development server"
     if [ "$CELERY_ENABLED" = true ] ; then
       _log_boxed "Running with celery"
+      start_allocation_worker
       exec celery -A tilavarauspalvelu worker --beat --detach & deploy/start_dev_server.sh
     else
       _log_boxed "Running without celery"
@@ -60,6 +75,7 @@ elif [ "$1" = "e" ]; then
 else
     _log_boxed "Starting production server"
     if [ "$CELERY_ENABLED" = true ] ; then
+      start_allocation_worker
       exec celery -A tilavarauspalvelu worker --beat --detach & uwsgi -y deploy/uwsgi.yml
     else
       exec uwsgi -y deploy/uwsgi.yml
@@ -0,0 +1,292 @@
+import datetime
+import json
+import random
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode
+
+DEFAULT_TIMEZONE = "Europe/Helsinki"
+CREATED = "2021-01-01T00:00:00+02:00"
+
+RESOURCE_DETAIL_PATH = re.compile(r"^/v1/resource/(?P<id>\d+)/$")
+
+# Opening and closing times the weekly schedules are generated from
+OPENING_TIMES = [datetime.time(hour=hour) for hour in (6, 7, 8, 9, 10)]
+CLOSING_TIMES = [datetime.time(hour=hour) for hour in (16, 18, 20, 21, 22)]
+
+
+class FakeHauki:
+    """WSGI app that serves a Hauki compatible API from generated data.
+
+    Serves GET /v1/opening_hours/, /v1/date_period/ and /v1/resource/, and
+    accepts resources with POST /v1/resource/ and PUT /v1/resource/<id>/.
+    Every resource gets a weekly schedule generated from the seed and its
+    origin id, so the same resource always has the same opening hours. Unknown
+    resources are created when they are first asked for.
+
+    Each request waits latency seconds plus up to latency_jitter seconds, and
+    fails with error_status with the probability of error_rate.
+    """
+
+    def __init__(
+        self,
+        resources: Optional[Iterable[Tuple[str, str]]] = None,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        page_size: int = 50,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.page_size = page_size
+        self.seed = seed
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._resources: Dict[int, dict] = {}
+        self._resource_ids: Dict[Tuple[str, str], int] = {}
+        for data_source, origin_id in resources or []:
+            self.get_or_create_resource(data_source, origin_id)
+
+    def get_or_create_resource(self, data_source: str, origin_id: str) -> dict:
+        with self._lock:
+            resource_id = self._resource_ids.get((data_source, origin_id))
+            if resource_id is None:
+                resource_id = len(self._resources) + 1
+                self._resource_ids[(data_source, origin_id)] = resource_id
+                self._resources[resource_id] = {
+                    "id": resource_id,
+                    "name": {"fi": f"{data_source}:{origin_id}"},
+                    "description": None,
+                    "address": None,
+                    "resource_type": "reservable",
+                    "children": [],
+                    "parents": [],
+                    "organization": None,
+                    "origins": [
+                        {
+                            "data_source": {"id": data_source, "name": data_source},
+                            "origin_id": origin_id,
+                        }
+                    ],
+                    "extra_data": {},
+                    "is_public": True,
+                    "timezone": DEFAULT_TIMEZONE,
+                    "created": CREATED,
+                    "modified": CREATED,
+                }
+            return self._resources[resource_id]
+
+    def get_schedule(self, resource: dict) -> List[Optional[tuple]]:
+        """Opening and closing time of the resource for each weekday, None
+        when closed"""
+        origin = resource["origins"][0]
+        schedule_random = random.Random(
+            f"{self.seed}:{origin['data_source']['id']}:{origin['origin_id']}"
+        )
+        opens = schedule_random.choice(OPENING_TIMES)
+        closes = schedule_random.choice(CLOSING_TIMES)
+        schedule = [(opens, closes)] * 5
+        for _ in range(2):
+            if schedule_random.random() < 0.3:
+                schedule.append(None)
+            else:
+                schedule.append((max(opens, datetime.time(hour=10)), closes))
+        return schedule
+
+    def __call__(self, environ, start_response):
+        # The server handles requests in threads, they share the seeded random
+        with self._lock:
+            jitter = self._random.uniform(0, self.latency_jitter)
+            fail = self._random.random() < self.error_rate
+        if self.latency or self.latency_jitter:
+            time.sleep(self.latency + jitter)
+        if self.error_rate and fail:
+            return self._respond(
+                start_response,
+                {"detail": "Injected error"},
+                status=self.error_status,
+                headers=[("Retry-After", "1")],
+            )
+
+        method = environ["REQUEST_METHOD"]
+        path = environ.get("PATH_INFO", "")
+        query = {
+            key: values[-1]
+            for key, values in parse_qs(environ.get("QUERY_STRING", "")).items()
+        }
+        if method == "GET" and path == "/v1/opening_hours/":
+            return self._respond(start_response, self.opening_hours(environ, query))
+        if method == "GET" and path == "/v1/date_period/":
+            return self._respond(start_response, self.date_periods(query))
+        if method == "GET" and path == "/v1/resource/":
+            return self._respond(start_response, self.resource_list(environ, query))
+        if method == "POST" and path == "/v1/resource/":
+            return self._respond(
+                start_response, self.save_resource(_read_json(environ)), status=201
+            )
+        match = RESOURCE_DETAIL_PATH.match(path)
+        if match and int(match.group("id")) in self._resources:
+            resource = self._resources[int(match.group("id"))]
+            if method == "PUT":
+                resource = self.save_resource(_read_json(environ), resource)
+            return self._respond(start_response, resource)
+        return self._respond(start_response, {"detail": "Not found."}, status=404)
+
+    def _respond(self, start_response, data, status: int = 200, headers=None):
+        body = json.dumps(data).encode("utf-8")
+        reason = {200: "OK", 201: "Created", 404: "Not Found"}.get(status, "Error")
+        start_response(
+            f"{status} {reason}",
+            [
+                ("Content-Type", "application/json"),
+                ("Content-Length", str(len(body))),
+            ]
+            + (headers or []),
+        )
+        return [body]
+
+    def _get_resources(self, resource_param: str) -> List[dict]:
+        resources = []
+        for key in resource_param.split(","):
+            data_source, _, origin_id = key.partition(":")
+            if origin_id:
+                resources.append(self.get_or_create_resource(data_source, origin_id))
+            elif key.isdigit() and int(key) in self._resources:
+                resources.append(self._resources[int(key)])
+        return resources
+
+    def _paginate(self, environ, query: dict, items: list) -> dict:
+        page_size = int(query.get("page_size", self.page_size))
+        page = int(query.get("page", 1))
+        next_url = None
+        if page * page_size < len(items):
+            next_url = "http://{}{}?{}".format(
+                environ.get("HTTP_HOST", "localhost"),
+                environ["PATH_INFO"],
+                urlencode({**query, "page": page + 1}),
+            )
+        return {
+            "count": len(items),
+            "next": next_url,
+            "previous": None,
+            "results": items[(page - 1) * page_size : page * page_size],  # noqa: E203
+        }
+
+    def opening_hours(self, environ, query: dict) -> dict:
+        start_date = datetime.date.fromisoformat(query["start_date"])
+        end_date = datetime.date.fromisoformat(query["end_date"])
+        dates = [
+            start_date + datetime.timedelta(days=i)
+            for i in range((end_date - start_date).days + 1)
+        ]
+        results = []
+        for resource in self._get_resources(query.get("resource", "")):
+            schedule = self.get_schedule(resource)
+            opening_hours = []
+            for date in dates:
+                times = []
+                if schedule[date.weekday()]:
+                    opens, closes = schedule[date.weekday()]
+                    times.append(
+                        {
+                            "name": "",
+                            "description": "",
+                            "start_time": opens.isoformat(),
+                            "end_time": closes.isoformat(),
+                            "end_time_on_next_day": False,
+                            "resource_state": "open",
+                            "override": False,
+                            "full_day": False,
+                            "periods": [resource["id"]],
+                        }
+                    )
+                opening_hours.append({"date": date.isoformat(), "times": times})
+            results.append(
+                {
+                    "resource": {
+                        "id": resource["id"],
+                        "name": resource["name"],
+                        "timezone": resource["timezone"],
+                        "origins": resource["origins"],
+                    },
+                    "opening_hours": opening_hours,
+                }
+            )
+        # Hauki pages the opening hours by resource
+        return self._paginate(environ, query, results)
+
+    def date_periods(self, query: dict) -> List[dict]:
+        periods = []
+        for resource in self._get_resources(query.get("resource", "")):
+            time_spans = []
+            for weekday, hours in enumerate(self.get_schedule(resource), start=1):
+                if not hours:
+                    continue
+                time_spans.append(
+                    {
+                        "id": resource["id"] * 10 + weekday,
+                        "group": resource["id"],
+                        "start_time": hours[0].isoformat(),
+                        "end_time": hours[1].isoformat(),
+                        "end_time_on_next_day": False,
+                        "name": {"fi": None, "sv": None, "en": None},
+                        "description": {"fi": None, "sv": None, "en": None},
+                        "created": CREATED,
+                        "modified": CREATED,
+                        "resource_state": "open",
+                        "full_day": False,
+                        "weekdays": [weekday],
+                    }
+                )
+            periods.append(
+                {
+                    "id": resource["id"],
+                    "resource": resource["id"],
+                    "name": {"fi": "Perusaukiolo", "sv": None, "en": None},
+                    "description": {"fi": None, "sv": None, "en": None},
+                    "start_date": None,
+                    "end_date": None,
+                    "resource_state": "undefined",
+                    "time_span_groups": [
+                        {"id": resource["id"], "time_spans": time_spans, "rules": []}
+                    ],
+                }
+            )
+        return periods
+
+    def resource_list(self, environ, query: dict) -> dict:
+        data_source = query.get("data_source")
+        resources = [
+            resource
+            for resource in self._resources.values()
+            if not data_source
+            or any(
+                origin["data_source"]["id"] == data_source
+                for origin in resource["origins"]
+            )
+        ]
+        return self._paginate(environ, query, resources)
+
+    def save_resource(self, data: dict, resource: Optional[dict] = None) -> dict:
+        if resource is None:
+            origin = data["origins"][0]
+            resource = self.get_or_create_resource(
+                origin["data_source"]["id"], origin["origin_id"]
+            )
+        with self._lock:
+            resource.update(
+                {key: value for key, value in data.items() if key != "id"},
+                modified=datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            )
+        return resource
+
+
+def _read_json(environ) -> dict:
+    length = int(environ.get("CONTENT_LENGTH") or 0)
+    return json.loads(environ["wsgi.input"].read(length) or b"{}")
@@ -1,19 +1,121 @@
 import logging
+import random
+import threading
+import time
+from typing import Optional
 
 import requests
 from django.conf import settings
 from kombu.utils import json
+from requests.adapters import HTTPAdapter
 
 from opening_hours.errors import HaukiAPIError, HaukiRequestError
 
-REQUESTS_TIMEOUT = 15
+# Responses that are worth asking again after a while
+RETRY_STATUS_CODES = frozenset([429, 502, 503, 504])
+# Only requests that can be repeated safely are retried
+IDEMPOTENT_METHODS = frozenset(["GET", "PUT"])
+MAX_BACKOFF_SECONDS = 10.0
 
 logger = logging.getLogger(__name__)
 
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_hauki_session() -> requests.Session:
+    """Session shared by all Hauki requests of the process.
+
+    Connections are kept alive in a pool of HAUKI_REQUEST_POOL_SIZE per host,
+    so requests don't pay for a new TCP and TLS handshake each time.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=settings.HAUKI_REQUEST_POOL_SIZE,
+                    pool_maxsize=settings.HAUKI_REQUEST_POOL_SIZE,
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def get_backoff_delay(attempt: int, response: Optional[requests.Response] = None):
+    """Seconds to wait before the retry after the given attempt.
+
+    Exponential backoff with full jitter, so concurrent clients don't retry in
+    step. A Retry-After header in seconds is respected.
+    """
+    delay = random.uniform(
+        0,
+        min(
+            MAX_BACKOFF_SECONDS,
+            settings.HAUKI_REQUEST_BACKOFF_FACTOR * (2 ** attempt),
+        ),
+    )
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        delay = max(delay, min(float(retry_after), MAX_BACKOFF_SECONDS))
+    return delay
+
+
+def send_hauki_request(method: str, url: str, **kwargs) -> requests.Response:
+    """Sends the request with the shared session.
+
+    Idempotent requests are retried up to HAUKI_REQUEST_MAX_RETRIES times on
+    connection errors, timeouts and RETRY_STATUS_CODES. The latency of each
+    call is logged.
+    """
+    max_retries = (
+        settings.HAUKI_REQUEST_MAX_RETRIES if method in IDEMPOTENT_METHODS else 0
+    )
+    timeout = (
+        settings.HAUKI_REQUEST_CONNECT_TIMEOUT,
+        settings.HAUKI_REQUEST_READ_TIMEOUT,
+    )
+    started = time.perf_counter()
+    attempt = 0
+    while True:
+        response = None
+        try:
+            response = get_hauki_session().request(
+                method, url, timeout=timeout, **kwargs
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= max_retries:
+                logger.info(
+                    "Hauki %s %s failed in %.0f ms after %i attempts: %s"
+                    % (method, url, _elapsed_ms(started), attempt + 1, e)
+                )
+                raise
+        else:
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= max_retries:
+                logger.info(
+                    "Hauki %s %s returned %i in %.0f ms after %i attempts"
+                    % (
+                        method,
+                        url,
+                        response.status_code,
+                        _elapsed_ms(started),
+                        attempt + 1,
+                    )
+                )
+                return response
+        time.sleep(get_backoff_delay(attempt, response))
+        attempt += 1
+
+
+def _elapsed_ms(started: float) -> float:
+    return (time.perf_counter() - started) * 1000
+
 
 def make_hauki_get_request(url, params):
     try:
-        response = requests.get(url, params=params, timeout=REQUESTS_TIMEOUT)
+        response = send_hauki_request("GET", url, params=params)
     except Exception as e:
         logger.error(f"Request to Hauki API failed: {e}")
         raise HaukiRequestError("Resource opening hours request failed")
@@ -33,10 +135,10 @@ def make_hauki_get_request(url, params):
 
 def make_hauki_post_request(url: str, data: dict):
     try:
-        response = requests.post(
+        response = send_hauki_request(
+            "POST",
             url,
             data=json.dumps(data),
-            timeout=REQUESTS_TIMEOUT,
             headers={
                 "Content-Type": "application/json",
                 "Authorization": f"APIToken {settings.HAUKI_API_KEY}",
@@ -61,10 +163,10 @@ def make_hauki_post_request(url: str, data: dict):
 
 def make_hauki_put_request(url: str, data: dict):
     try:
-        response = requests.put(
+        response = send_hauki_request(
+            "PUT",
             url,
             data=json.dumps(data),
-            timeout=REQUESTS_TIMEOUT,
             headers={
                 "Content-Type": "application/json",
                 "Authorization": f"APIToken {settings.HAUKI_API_KEY}",
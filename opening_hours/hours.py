@@ -1,7 +1,10 @@
 import datetime
 import logging
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+from itertools import chain
+from typing import Dict, List, Optional, Tuple, Union
 
 import pytz
 from django.conf import settings
@@ -17,6 +20,56 @@ DEFAULT_TIMEZONE = get_default_timezone()
 logger = logging.getLogger(__name__)
 
 
+def _get_slotted_state(self) -> list:
+    return [getattr(self, f.name) for f in fields(self)]
+
+
+def _set_slotted_state(self, state: list):
+    for f, value in zip(fields(self), state):
+        object.__setattr__(self, f.name, value)
+
+
+def slotted_dataclass(cls):
+    """Recreates a frozen dataclass with __slots__ for its fields.
+
+    Backport of dataclass(slots=True) of Python 3.10. The instances have no
+    __dict__, which makes them several times smaller. The field defaults
+    are removed from the class attributes, where they would conflict with the
+    slots, and stay only in __init__.
+    """
+    field_names = tuple(f.name for f in fields(cls))
+    cls_dict = dict(cls.__dict__)
+    for name in field_names:
+        cls_dict.pop(name, None)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    cls_dict["__slots__"] = field_names
+    # The frozen __setattr__ prevents the default unpickling of slots
+    cls_dict["__getstate__"] = _get_slotted_state
+    cls_dict["__setstate__"] = _set_slotted_state
+    return type(cls)(cls.__name__, cls.__bases__, cls_dict)
+
+
+@lru_cache(maxsize=None)
+def get_timezone(name: str):
+    """pytz.timezone, which is slow to look up for every day"""
+    return pytz.timezone(name)
+
+
+@lru_cache(maxsize=4096)
+def parse_date(value: str) -> datetime.date:
+    """Parses the ISO dates of Hauki. The same dates repeat for every resource,
+    so they are parsed once and the date objects are shared."""
+    return datetime.date.fromisoformat(value)
+
+
+@lru_cache(maxsize=4096)
+def parse_time(value: str) -> datetime.time:
+    """Parses the ISO times of Hauki, sharing the time objects"""
+    return datetime.time.fromisoformat(value)
+
+
+@slotted_dataclass
 @dataclass(order=True, frozen=True)
 class TimeElement:
     """Represents one time span in a days opening hours
@@ -57,6 +110,7 @@ class TimeElement:
         )
 
 
+@slotted_dataclass
 @dataclass(order=True, frozen=True)
 class TimeSpan:
     """Represents one TimeSpan in Period's time span group's time_spans."""
@@ -75,6 +129,7 @@ class TimeSpan:
     weekdays: Optional[list] = field(default=None, compare=False)
 
 
+@slotted_dataclass
 @dataclass(order=True, frozen=True)
 class Period:
     """Represents one period in date_period end point"""
@@ -89,13 +144,87 @@ class Period:
     resource_state: State = State.UNDEFINED
 
 
+def chunks(items: list, size: int) -> List[list]:
+    return [
+        items[start : start + size]  # noqa: E203
+        for start in range(0, len(items), max(size, 1))
+    ]
+
+
+def split_date_range(
+    start_date: datetime.date, end_date: datetime.date, days: int
+) -> List[Tuple[datetime.date, datetime.date]]:
+    """Consecutive ranges of at most days days covering start_date to end_date"""
+    ranges = []
+    range_start = start_date
+    while range_start <= end_date:
+        range_end = min(
+            range_start + datetime.timedelta(days=max(days, 1) - 1), end_date
+        )
+        ranges.append((range_start, range_end))
+        range_start = range_end + datetime.timedelta(days=1)
+    return ranges
+
+
+def _to_date(value: Union[str, datetime.date, None]) -> Optional[datetime.date]:
+    if isinstance(value, str):
+        return datetime.date.fromisoformat(value)
+    return value
+
+
+def _fetch_opening_hours_pages(url: str, query_params: dict) -> List[dict]:
+    """Results of all pages, following the next links of the response"""
+    results = []
+    while url:
+        data = make_hauki_get_request(url, query_params)
+        results.extend(data["results"])
+        url = data.get("next")
+        # The next link has the query parameters already
+        query_params = None
+    return results
+
+
+def _parse_opening_hours(day_data_in: dict) -> List[dict]:
+    timezone = get_timezone(
+        day_data_in.get("resource", {}).get("timezone", DEFAULT_TIMEZONE.zone)
+    )
+    resource_id = day_data_in["resource"]["id"]
+    origin_id = day_data_in["resource"]["origins"][0]["origin_id"]
+    days_data_out = []
+    for opening_hours in day_data_in["opening_hours"]:
+        day_data_out = {
+            "timezone": timezone,
+            "resource_id": resource_id,
+            "origin_id": origin_id,
+            "date": parse_date(opening_hours["date"]),
+            "times": [],
+        }
+        for time_data_in in opening_hours["times"]:
+            day_data_out["times"].append(
+                TimeElement(
+                    start_time=parse_time(time_data_in.pop("start_time")),
+                    end_time=parse_time(time_data_in.pop("end_time")),
+                    **time_data_in,
+                )
+            )
+        days_data_out.append(day_data_out)
+    return days_data_out
+
+
 def get_opening_hours(
     resource_id: Union[str, int, list],
     start_date: Union[str, datetime.date],
     end_date: Union[str, datetime.date],
     hauki_origin_id=None,
 ) -> List[dict]:
-    """Get opening hours for Hauki resource"""
+    """Get opening hours for Hauki resource
+
+    The request is split into chunks of HAUKI_FETCH_RESOURCE_CHUNK_SIZE resources
+    and HAUKI_FETCH_DATE_RANGE_DAYS days, which are fetched concurrently by up to
+    HAUKI_FETCH_MAX_WORKERS threads. Each chunk follows the pagination of the
+    response. The days are returned per resource in the requested order, and
+    by date within a resource.
+    """
     if hauki_origin_id:
         hauki_origin_id = hauki_origin_id
     else:
@@ -106,56 +235,59 @@ def get_opening_hours(
         raise HaukiConfigurationError(
             "Both hauki api url and hauki origin id need to be configured"
         )
-    if isinstance(resource_id, list):
-        resource_id = [str(uuid) for uuid in resource_id]
-        resource_id = "%s:%s" % (
-            resource_prefix,
-            f",{resource_prefix}:".join(resource_id),
+    resource_ids = [
+        str(uuid)
+        for uuid in (resource_id if isinstance(resource_id, list) else [resource_id])
+    ]
+    start_date = _to_date(start_date)
+    end_date = _to_date(end_date)
+    if start_date and end_date:
+        date_ranges = split_date_range(
+            start_date, end_date, settings.HAUKI_FETCH_DATE_RANGE_DAYS
         )
     else:
-        resource_id = f"{resource_prefix}:{resource_id}"
-    if isinstance(start_date, datetime.date):
-        start_date = start_date.isoformat()
-    if isinstance(end_date, datetime.date):
-        end_date = end_date.isoformat()
+        date_ranges = [(start_date, end_date)]
 
-    resource_opening_hours_url = (
-        f"{settings.HAUKI_API_URL}/v1/opening_hours/?resource={resource_id}"
-    )
-    query_params = {
-        "start_date": start_date,
-        "end_date": end_date,
-    }
-    days_data_in = make_hauki_get_request(resource_opening_hours_url, query_params)
+    def fetch(resource_chunk: List[str], date_range: tuple) -> List[dict]:
+        resources = "%s:%s" % (
+            resource_prefix,
+            f",{resource_prefix}:".join(resource_chunk),
+        )
+        resource_opening_hours_url = (
+            f"{settings.HAUKI_API_URL}/v1/opening_hours/?resource={resources}"
+        )
+        query_params = {
+            "start_date": date_range[0].isoformat() if date_range[0] else None,
+            "end_date": date_range[1].isoformat() if date_range[1] else None,
+        }
+        return _fetch_opening_hours_pages(resource_opening_hours_url, query_params)
 
-    days_data_out = []
-    for day_data_in in days_data_in["results"]:
-        timezone = pytz.timezone(
-            day_data_in.get("resource", {}).get("timezone", DEFAULT_TIMEZONE.zone)
+    jobs = [
+        (resource_chunk, date_range)
+        for resource_chunk in chunks(
+            resource_ids, settings.HAUKI_FETCH_RESOURCE_CHUNK_SIZE
         )
-        for opening_hours in day_data_in["opening_hours"]:
-            day_data_out = {
-                "timezone": timezone,
-                "resource_id": day_data_in["resource"]["id"],
-                "origin_id": day_data_in["resource"]["origins"][0]["origin_id"],
-                "date": datetime.datetime.strptime(
-                    opening_hours["date"], "%Y-%m-%d"
-                ).date(),
-                "times": [],
-            }
-            for time_data_in in opening_hours["times"]:
-                day_data_out["times"].append(
-                    TimeElement(
-                        start_time=datetime.time.fromisoformat(
-                            time_data_in.pop("start_time")
-                        ),
-                        end_time=datetime.time.fromisoformat(
-                            time_data_in.pop("end_time")
-                        ),
-                        **time_data_in,
-                    )
-                )
-            days_data_out.append(day_data_out)
+        for date_range in date_ranges
+    ]
+    max_workers = min(settings.HAUKI_FETCH_MAX_WORKERS, len(jobs))
+    if max_workers > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(lambda job: fetch(*job), jobs))
+    else:
+        results = [fetch(*job) for job in jobs]
+
+    days_data_out = [
+        day_data_out
+        for day_data_in in chain(*results)
+        for day_data_out in _parse_opening_hours(day_data_in)
+    ]
+    resource_order = {resource: i for i, resource in enumerate(resource_ids)}
+    days_data_out.sort(
+        key=lambda day: (
+            resource_order.get(str(day["origin_id"]), len(resource_order)),
+            day["date"],
+        )
+    )
     return days_data_out
 
 
@@ -193,16 +325,10 @@ def get_periods_for_resource(
         period_data_out = {
             "id": period["id"],
             "resource": period["resource"],
-            "start_date": datetime.datetime.strptime(
-                period["start_date"], "%Y-%m-%d"
-            ).date()
+            "start_date": parse_date(period["start_date"])
             if period["start_date"]
             else None,
-            "end_date": datetime.datetime.strptime(
-                period["end_date"], "%Y-%m-%d"
-            ).date()
-            if period["end_date"]
-            else None,
+            "end_date": parse_date(period["end_date"]) if period["end_date"] else None,
             "description": period["description"],
             "name": period["name"],
             "resource_state": period["resource_state"],
@@ -212,12 +338,8 @@ def get_periods_for_resource(
             for time_data_in in time_span_group["time_spans"]:
                 period_data_out["time_spans"].append(
                     TimeSpan(
-                        start_time=datetime.time.fromisoformat(
-                            time_data_in.pop("start_time")
-                        ),
-                        end_time=datetime.time.fromisoformat(
-                            time_data_in.pop("end_time")
-                        ),
+                        start_time=parse_time(time_data_in.pop("start_time")),
+                        end_time=parse_time(time_data_in.pop("end_time")),
                         **time_data_in,
                     )
                 )
@@ -0,0 +1,228 @@
+import datetime
+import logging
+import uuid
+from typing import Dict, List, Optional, Tuple, Union
+
+from django.conf import settings
+from django.core.cache import caches
+
+from opening_hours import hours, store
+from opening_hours.hours import Period
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = "opening_hours"
+
+CACHE_KEY_PREFIX = "opening_hours"
+
+
+def _to_date(value: Union[str, datetime.date]) -> datetime.date:
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(value)
+
+
+def _copy_day(day: dict) -> dict:
+    return {**day, "times": list(day["times"])}
+
+
+def _new_version() -> str:
+    return uuid.uuid4().hex
+
+
+class OpeningHoursCache(object):
+    """Cache of the parsed opening hours and periods from Hauki.
+
+    The entries are kept in the opening_hours cache of settings.CACHES, a
+    LocMemCache in each process. Opening hours are kept per (origin, resource,
+    date) with the days that opening_hours.store.get_opening_hours returned for
+    them, so any sub-range of an already fetched range is served without a
+    request. Only the resources and the date span that are missing or expired
+    are fetched, in one request.
+
+    Entries expire after HAUKI_OPENING_HOURS_CACHE_TIMEOUT seconds, a timeout
+    of 0 disables the cache. invalidate drops a resource or everything from the
+    cache of the calling process only, the other processes see the change when
+    their entries expire, so the timeout is kept short.
+    """
+
+    def __init__(self, timeout: Optional[int] = None):
+        self._timeout = timeout
+
+    @property
+    def timeout(self) -> int:
+        if self._timeout is not None:
+            return self._timeout
+        return settings.HAUKI_OPENING_HOURS_CACHE_TIMEOUT
+
+    @property
+    def _cache(self):
+        return caches[CACHE_ALIAS]
+
+    def _origin(self, hauki_origin_id) -> str:
+        return str(hauki_origin_id or settings.HAUKI_ORIGIN_ID)
+
+    def _version_key(self, origin: str, resource: str) -> str:
+        return "%s:%s:%s:version" % (CACHE_KEY_PREFIX, origin, resource)
+
+    def _versions(self, origin: str, resources: List[str]) -> Dict[str, str]:
+        """The keys of a resource contain its version, so that invalidate can
+        drop all its days by deleting the version"""
+        keys = {resource: self._version_key(origin, resource) for resource in resources}
+        found = self._cache.get_many(keys.values())
+        return {
+            resource: found.get(key) or self._cache.get_or_set(key, _new_version, None)
+            for resource, key in keys.items()
+        }
+
+    def _day_key(
+        self, origin: str, resource: str, version: str, date: datetime.date
+    ) -> str:
+        return "%s:%s:%s:%s:%s" % (
+            CACHE_KEY_PREFIX,
+            origin,
+            resource,
+            version,
+            date.isoformat(),
+        )
+
+    def get_opening_hours(
+        self,
+        resource_id: Union[str, int, list],
+        start_date: Union[str, datetime.date],
+        end_date: Union[str, datetime.date],
+        hauki_origin_id=None,
+    ) -> List[dict]:
+        if self.timeout <= 0 or not (start_date and end_date):
+            return store.get_opening_hours(
+                resource_id, start_date, end_date, hauki_origin_id
+            )
+
+        origin = self._origin(hauki_origin_id)
+        resources = [
+            str(resource)
+            for resource in (
+                resource_id if isinstance(resource_id, list) else [resource_id]
+            )
+        ]
+        start, end = _to_date(start_date), _to_date(end_date)
+        dates = [
+            start + datetime.timedelta(days=i) for i in range((end - start).days + 1)
+        ]
+
+        versions = self._versions(origin, resources)
+        keys: Dict[Tuple[str, datetime.date], str] = {
+            (resource, date): self._day_key(origin, resource, versions[resource], date)
+            for resource in resources
+            for date in dates
+        }
+        cached = self._cache.get_many(keys.values())
+
+        missing = [
+            (resource, date)
+            for (resource, date), key in keys.items()
+            if key not in cached
+        ]
+        if missing:
+            missing_resources = list(dict.fromkeys(resource for resource, _ in missing))
+            missing_dates = [date for _, date in missing]
+            cached.update(
+                self._fetch(
+                    origin,
+                    {resource: versions[resource] for resource in missing_resources},
+                    min(missing_dates),
+                    max(missing_dates),
+                )
+            )
+
+        days = []
+        for resource in resources:
+            for date in dates:
+                days.extend(
+                    _copy_day(day) for day in cached.get(keys[(resource, date)], [])
+                )
+        return days
+
+    def _fetch(
+        self,
+        origin: str,
+        versions: Dict[str, str],
+        start: datetime.date,
+        end: datetime.date,
+    ) -> Dict[str, List[dict]]:
+        resources = list(versions.keys())
+        fetched = store.get_opening_hours(resources, start, end, origin)
+        # Days Hauki doesn't return are cached empty, so they aren't asked again
+        days: Dict[str, List[dict]] = {
+            self._day_key(
+                origin, resource, version, start + datetime.timedelta(days=i)
+            ): []
+            for resource, version in versions.items()
+            for i in range((end - start).days + 1)
+        }
+        for day in fetched:
+            resource = str(day["origin_id"])
+            if resource not in versions:
+                continue
+            key = self._day_key(origin, resource, versions[resource], day["date"])
+            if key in days:
+                days[key].append(day)
+
+        self._cache.set_many(days, self.timeout)
+        logger.debug(
+            "Cached opening hours of %i resources from %s to %s"
+            % (len(resources), start, end)
+        )
+        return days
+
+    def get_periods_for_resource(
+        self, resource_id: Union[str, int, list], hauki_origin_id=None
+    ) -> List[Period]:
+        if self.timeout <= 0 or isinstance(resource_id, list):
+            return hours.get_periods_for_resource(resource_id, hauki_origin_id)
+
+        origin = self._origin(hauki_origin_id)
+        resource = str(resource_id)
+        version = self._versions(origin, [resource])[resource]
+        key = "%s:%s:%s:%s:periods" % (CACHE_KEY_PREFIX, origin, resource, version)
+        periods = self._cache.get(key)
+        if periods is None:
+            periods = hours.get_periods_for_resource(resource_id, hauki_origin_id)
+            self._cache.set(key, periods, self.timeout)
+        return list(periods)
+
+    def invalidate(
+        self, resource_id: Union[str, int, None] = None, hauki_origin_id=None
+    ):
+        """Drops the cached opening hours and periods of the resource, or of
+        all resources when no resource is given"""
+        if resource_id is None:
+            self._cache.clear()
+            return
+        self._cache.delete(
+            self._version_key(self._origin(hauki_origin_id), str(resource_id))
+        )
+
+
+opening_hours_cache = OpeningHoursCache()
+
+
+def get_opening_hours(
+    resource_id: Union[str, int, list],
+    start_date: Union[str, datetime.date],
+    end_date: Union[str, datetime.date],
+    hauki_origin_id=None,
+) -> List[dict]:
+    """Cached opening_hours.hours.get_opening_hours"""
+    return opening_hours_cache.get_opening_hours(
+        resource_id, start_date, end_date, hauki_origin_id
+    )
+
+
+def get_periods_for_resource(
+    resource_id: Union[str, int, list], hauki_origin_id=None
+) -> List[Period]:
+    """Cached opening_hours.hours.get_periods_for_resource"""
+    return opening_hours_cache.get_periods_for_resource(resource_id, hauki_origin_id)
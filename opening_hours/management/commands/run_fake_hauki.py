@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.servers.basehttp import run
+
+from opening_hours.fake_hauki import FakeHauki
+from reservation_units.models import ReservationUnit
+from spaces.models import Unit
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs a local stand-in for the Hauki API with generated opening hours. "
+        "Set HAUKI_USE_FAKE_SERVER to point HAUKI_API_URL at it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "address",
+            nargs="?",
+            default=settings.HAUKI_FAKE_SERVER_ADDRESS,
+            help="Address to listen to as host:port.",
+        )
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.0,
+            help="Seconds each request waits before responding.",
+        )
+        parser.add_argument(
+            "--latency-jitter",
+            type=float,
+            default=0.0,
+            help="Up to this many seconds of random latency added to each request.",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0.0,
+            help="Share of requests, from 0 to 1, that fail with --error-status.",
+        )
+        parser.add_argument(
+            "--error-status",
+            type=int,
+            default=503,
+            help="Status code of the failing requests.",
+        )
+        parser.add_argument(
+            "--page-size", type=int, default=50, help="Results per page."
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Seed of the generated opening hours."
+        )
+        parser.add_argument(
+            "--no-database",
+            action="store_true",
+            help="Don't create the resources of the reservation units and units "
+            "up front, resources are then created as they are asked for.",
+        )
+
+    def handle(self, *args, **options):
+        resources = []
+        if not options["no_database"]:
+            resources = [
+                (settings.HAUKI_ORIGIN_ID, str(uuid))
+                for uuid in ReservationUnit.objects.values_list("uuid", flat=True)
+            ] + [
+                ("tprek", str(tprek_id))
+                for tprek_id in Unit.objects.exclude(tprek_id=None).values_list(
+                    "tprek_id", flat=True
+                )
+            ]
+        app = FakeHauki(
+            resources=resources,
+            latency=options["latency"],
+            latency_jitter=options["latency_jitter"],
+            error_rate=options["error_rate"],
+            error_status=options["error_status"],
+            page_size=options["page_size"],
+            seed=options["seed"],
+        )
+        host, _, port = options["address"].rpartition(":")
+        self.stdout.write(
+            f"Fake Hauki with {len(resources)} resources at "
+            f"http://{host or 'localhost'}:{port}/"
+        )
+        run(host or "localhost", int(port), app, threading=True)
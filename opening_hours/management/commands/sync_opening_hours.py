@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from opening_hours.store import sync_opening_hours
+
+
+class Command(BaseCommand):
+    help = "Syncs the opening hours of the reservation units from Hauki."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Sync all resources, also the ones that haven't changed in Hauki.",
+        )
+
+    def handle(self, *args, **options):
+        synced = sync_opening_hours(force=options["force"])
+        self.stdout.write(f"Synced opening hours of {synced} resources.")
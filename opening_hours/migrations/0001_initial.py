@@ -0,0 +1,53 @@
+# Generated by Django 3.1.14 on 2022-01-27 10:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OpeningHoursResource',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origin', models.CharField(max_length=255, verbose_name='Hauki origin id')),
+                ('resource_id', models.CharField(max_length=255, verbose_name='Resource id in the origin')),
+                ('hauki_id', models.IntegerField(blank=True, null=True, verbose_name='Hauki resource id')),
+                ('timezone', models.CharField(max_length=64, verbose_name='Timezone')),
+                ('hauki_modified', models.DateTimeField(blank=True, null=True, verbose_name='Modified in Hauki')),
+                ('synced_at', models.DateTimeField(verbose_name='Synced at')),
+                ('synced_from', models.DateField(verbose_name='Opening times from')),
+                ('synced_until', models.DateField(verbose_name='Opening times until')),
+            ],
+            options={
+                'unique_together': {('origin', 'resource_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='OpeningTime',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('start_time', models.TimeField(blank=True, null=True, verbose_name='Start time')),
+                ('end_time', models.TimeField(blank=True, null=True, verbose_name='End time')),
+                ('end_time_on_next_day', models.BooleanField(default=False, verbose_name='Ends on the next day')),
+                ('resource_state', models.CharField(default='undefined', max_length=50, verbose_name='Resource state')),
+                ('override', models.BooleanField(default=False, verbose_name='Override')),
+                ('full_day', models.BooleanField(default=False, verbose_name='Full day')),
+                ('name', models.CharField(blank=True, max_length=255, verbose_name='Name')),
+                ('description', models.TextField(blank=True, verbose_name='Description')),
+                ('periods', models.JSONField(blank=True, null=True, verbose_name='Periods')),
+                ('resource', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='opening_times', to='opening_hours.openinghoursresource', verbose_name='Resource')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='openingtime',
+            index=models.Index(fields=['resource', 'date'], name='opening_hou_resourc_32cddb_idx'),
+        ),
+    ]
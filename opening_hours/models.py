@@ -1 +1,82 @@
-# Create your models here.
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class OpeningHoursResource(models.Model):
+    """Hauki resource whose opening hours are kept in OpeningTime.
+
+    The opening times are stored for the dates from synced_from to
+    synced_until. hauki_modified is the modified time of the resource in
+    Hauki when it was last synced.
+    """
+
+    origin = models.CharField(verbose_name=_("Hauki origin id"), max_length=255)
+
+    resource_id = models.CharField(
+        verbose_name=_("Resource id in the origin"), max_length=255
+    )
+
+    hauki_id = models.IntegerField(
+        verbose_name=_("Hauki resource id"), null=True, blank=True
+    )
+
+    timezone = models.CharField(verbose_name=_("Timezone"), max_length=64)
+
+    hauki_modified = models.DateTimeField(
+        verbose_name=_("Modified in Hauki"), null=True, blank=True
+    )
+
+    synced_at = models.DateTimeField(verbose_name=_("Synced at"))
+
+    synced_from = models.DateField(verbose_name=_("Opening times from"))
+
+    synced_until = models.DateField(verbose_name=_("Opening times until"))
+
+    class Meta:
+        unique_together = ("origin", "resource_id")
+
+    def __str__(self):
+        return "{}:{}".format(self.origin, self.resource_id)
+
+
+class OpeningTime(models.Model):
+    """One opening window of a resource on a day, as returned by Hauki"""
+
+    resource = models.ForeignKey(
+        OpeningHoursResource,
+        verbose_name=_("Resource"),
+        related_name="opening_times",
+        on_delete=models.CASCADE,
+    )
+
+    date = models.DateField(verbose_name=_("Date"))
+
+    start_time = models.TimeField(verbose_name=_("Start time"), null=True, blank=True)
+
+    end_time = models.TimeField(verbose_name=_("End time"), null=True, blank=True)
+
+    end_time_on_next_day = models.BooleanField(
+        verbose_name=_("Ends on the next day"), default=False
+    )
+
+    resource_state = models.CharField(
+        verbose_name=_("Resource state"), max_length=50, default="undefined"
+    )
+
+    override = models.BooleanField(verbose_name=_("Override"), default=False)
+
+    full_day = models.BooleanField(verbose_name=_("Full day"), default=False)
+
+    name = models.CharField(verbose_name=_("Name"), max_length=255, blank=True)
+
+    description = models.TextField(verbose_name=_("Description"), blank=True)
+
+    periods = models.JSONField(verbose_name=_("Periods"), null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["resource", "date"])]
+
+    def __str__(self):
+        return "{} {} {}-{}".format(
+            self.resource, self.date, self.start_time, self.end_time
+        )
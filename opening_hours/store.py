@@ -0,0 +1,285 @@
+import datetime
+import logging
+from typing import Dict, List, Union
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from opening_hours import hours
+from opening_hours.hauki_request import make_hauki_get_request
+from opening_hours.hours import TimeElement, chunks, get_timezone
+from opening_hours.models import OpeningHoursResource, OpeningTime
+from reservation_units.models import ReservationUnit
+
+logger = logging.getLogger(__name__)
+
+
+def _to_date(value: Union[str, datetime.date]) -> datetime.date:
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(value)
+
+
+def _state_value(state) -> str:
+    return getattr(state, "value", state) or "undefined"
+
+
+def get_opening_hours(
+    resource_id: Union[str, int, list],
+    start_date: Union[str, datetime.date],
+    end_date: Union[str, datetime.date],
+    hauki_origin_id=None,
+) -> List[dict]:
+    """Opening hours from the synced OpeningTime table.
+
+    Returns the days in the format of opening_hours.hours.get_opening_hours.
+    Resources whose synced dates don't cover the range are fetched from Hauki.
+    Without HAUKI_OPENING_HOURS_SYNC_ENABLED everything is fetched from Hauki.
+    """
+    if not (settings.HAUKI_OPENING_HOURS_SYNC_ENABLED and start_date and end_date):
+        return hours.get_opening_hours(
+            resource_id, start_date, end_date, hauki_origin_id
+        )
+
+    origin = str(hauki_origin_id or settings.HAUKI_ORIGIN_ID)
+    resources = [
+        str(resource)
+        for resource in (
+            resource_id if isinstance(resource_id, list) else [resource_id]
+        )
+    ]
+    start, end = _to_date(start_date), _to_date(end_date)
+    stored = {
+        resource.resource_id: resource
+        for resource in OpeningHoursResource.objects.filter(
+            origin=origin,
+            resource_id__in=resources,
+            synced_from__lte=start,
+            synced_until__gte=end,
+        )
+    }
+
+    days = []
+    missing = [resource for resource in resources if resource not in stored]
+    if missing:
+        days.extend(hours.get_opening_hours(missing, start, end, origin))
+    if stored:
+        days.extend(_get_stored_days(list(stored.values()), start, end))
+
+    resource_order = {resource: i for i, resource in enumerate(resources)}
+    days.sort(
+        key=lambda day: (
+            resource_order.get(str(day["origin_id"]), len(resource_order)),
+            day["date"],
+        )
+    )
+    return days
+
+
+def _get_stored_days(
+    resources: List[OpeningHoursResource], start: datetime.date, end: datetime.date
+) -> List[dict]:
+    times: Dict[tuple, List[TimeElement]] = {}
+    for opening_time in OpeningTime.objects.filter(
+        resource__in=resources, date__range=(start, end)
+    ).order_by("resource_id", "date", "pk"):
+        times.setdefault((opening_time.resource_id, opening_time.date), []).append(
+            TimeElement(
+                start_time=opening_time.start_time,
+                end_time=opening_time.end_time,
+                end_time_on_next_day=opening_time.end_time_on_next_day,
+                resource_state=opening_time.resource_state,
+                override=opening_time.override,
+                full_day=opening_time.full_day,
+                name=opening_time.name,
+                description=opening_time.description,
+                periods=opening_time.periods,
+            )
+        )
+
+    # Hauki returns every day of the range, also the ones without times
+    dates = [start + datetime.timedelta(days=i) for i in range((end - start).days + 1)]
+    days = []
+    for resource in resources:
+        resource_timezone = get_timezone(resource.timezone)
+        for date in dates:
+            days.append(
+                {
+                    "timezone": resource_timezone,
+                    "resource_id": resource.hauki_id,
+                    "origin_id": resource.resource_id,
+                    "date": date,
+                    "times": times.get((resource.pk, date), []),
+                }
+            )
+    return days
+
+
+def get_hauki_resources(hauki_origin_id=None) -> Dict[str, dict]:
+    """Hauki resources of the origin by their id in the origin"""
+    origin = str(hauki_origin_id or settings.HAUKI_ORIGIN_ID)
+    url = f"{settings.HAUKI_API_URL}/v1/resource/"
+    query_params = {"data_source": origin, "page_size": 500}
+    resources = {}
+    while url:
+        data = make_hauki_get_request(url, query_params)
+        for resource in data["results"]:
+            for resource_origin in resource.get("origins", []):
+                if resource_origin["data_source"]["id"] == origin:
+                    resources[str(resource_origin["origin_id"])] = resource
+        url = data.get("next")
+        # The next link has the query parameters already
+        query_params = None
+    return resources
+
+
+def needs_sync(
+    stored: OpeningHoursResource,
+    hauki_resource: dict,
+    start: datetime.date,
+    end: datetime.date,
+    now: datetime.datetime,
+) -> bool:
+    """Whether the stored opening times of the resource are out of date.
+
+    The modified time of a Hauki resource doesn't change with all edits of its
+    date periods, so the resources are also synced at least once in
+    HAUKI_OPENING_HOURS_SYNC_MAX_AGE seconds.
+    """
+    if stored is None:
+        return True
+    max_age = datetime.timedelta(seconds=settings.HAUKI_OPENING_HOURS_SYNC_MAX_AGE)
+    return (
+        stored.hauki_modified != parse_datetime(hauki_resource.get("modified") or "")
+        or stored.synced_at < now - max_age
+        or stored.synced_from > start
+        or stored.synced_until < end
+    )
+
+
+def store_opening_hours(
+    origin: str,
+    hauki_resources: Dict[str, dict],
+    days: List[dict],
+    start: datetime.date,
+    end: datetime.date,
+    now: datetime.datetime,
+):
+    """Replaces the stored opening times of the resources with the days"""
+    with transaction.atomic():
+        resources = {}
+        for resource_id, hauki_resource in hauki_resources.items():
+            resources[resource_id], _ = OpeningHoursResource.objects.update_or_create(
+                origin=origin,
+                resource_id=resource_id,
+                defaults={
+                    "hauki_id": hauki_resource["id"],
+                    "timezone": hauki_resource.get("timezone")
+                    or hours.DEFAULT_TIMEZONE.zone,
+                    "hauki_modified": parse_datetime(
+                        hauki_resource.get("modified") or ""
+                    ),
+                    "synced_at": now,
+                    "synced_from": start,
+                    "synced_until": end,
+                },
+            )
+        OpeningTime.objects.filter(resource__in=resources.values()).delete()
+        OpeningTime.objects.bulk_create(
+            [
+                OpeningTime(
+                    resource=resources[str(day["origin_id"])],
+                    date=day["date"],
+                    start_time=time.start_time,
+                    end_time=time.end_time,
+                    end_time_on_next_day=time.end_time_on_next_day,
+                    resource_state=_state_value(time.resource_state),
+                    override=time.override,
+                    full_day=time.full_day,
+                    name=time.name or "",
+                    description=time.description or "",
+                    periods=time.periods,
+                )
+                for day in days
+                if str(day["origin_id"]) in resources
+                for time in day["times"]
+            ]
+        )
+
+
+def sync_opening_hours(force=False) -> int:
+    """Syncs the opening hours of the reservation units from Hauki.
+
+    The opening times from today to HAUKI_OPENING_HOURS_SYNC_DAYS days ahead
+    are stored for the reservation units that have a resource in Hauki. Only
+    the resources that changed since the last sync are fetched, unless forced.
+    The opening times of past days are deleted. Returns the number of synced
+    resources.
+    """
+    origin = settings.HAUKI_ORIGIN_ID
+    now = timezone.now()
+    start = timezone.localdate(now)
+    end = start + datetime.timedelta(days=settings.HAUKI_OPENING_HOURS_SYNC_DAYS)
+
+    resource_ids = [
+        str(uuid) for uuid in ReservationUnit.objects.values_list("uuid", flat=True)
+    ]
+    hauki_resources = get_hauki_resources(origin)
+    stored = {
+        resource.resource_id: resource
+        for resource in OpeningHoursResource.objects.filter(origin=origin)
+    }
+    changed = [
+        resource_id
+        for resource_id in resource_ids
+        if resource_id in hauki_resources
+        and (
+            force
+            or needs_sync(
+                stored.get(resource_id), hauki_resources[resource_id], start, end, now
+            )
+        )
+    ]
+
+    for resource_chunk in chunks(changed, settings.HAUKI_FETCH_RESOURCE_CHUNK_SIZE):
+        days = hours.get_opening_hours(resource_chunk, start, end, origin)
+        store_opening_hours(
+            origin,
+            {
+                resource_id: hauki_resources[resource_id]
+                for resource_id in resource_chunk
+            },
+            days,
+            start,
+            end,
+            now,
+        )
+
+    OpeningHoursResource.objects.filter(origin=origin).exclude(
+        resource_id__in=[
+            resource_id
+            for resource_id in resource_ids
+            if resource_id in hauki_resources
+        ]
+    ).delete()
+    OpeningTime.objects.filter(date__lt=start).delete()
+    OpeningHoursResource.objects.filter(synced_from__lt=start).update(synced_from=start)
+
+    if changed:
+        # Local import, hours_cache reads through this module
+        from opening_hours.hours_cache import opening_hours_cache
+
+        # Clears only the cache of this process, the other processes read the
+        # synced hours once their HAUKI_OPENING_HOURS_CACHE_TIMEOUT has passed
+
+        for resource_id in changed:
+            opening_hours_cache.invalidate(resource_id, origin)
+    logger.info(
+        "Synced opening hours of %i of %i resources from Hauki"
+        % (len(changed), len(resource_ids))
+    )
+    return len(changed)
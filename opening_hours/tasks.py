@@ -0,0 +1,18 @@
+from django.conf import settings
+
+from tilavarauspalvelu.celery import app
+
+from .store import sync_opening_hours
+
+
+@app.task
+def _sync_opening_hours() -> None:
+    sync_opening_hours()
+
+
+@app.on_after_finalize.connect
+def setup_periodic_tasks(sender, **kwargs) -> None:
+    if settings.HAUKI_OPENING_HOURS_SYNC_ENABLED:
+        sender.add_periodic_task(
+            settings.HAUKI_OPENING_HOURS_SYNC_INTERVAL, _sync_opening_hours.s()
+        )
@@ -0,0 +1,92 @@
+import datetime
+import io
+import json
+from unittest import mock
+from urllib.parse import urlencode, urlparse
+from wsgiref.util import setup_testing_defaults
+
+from assertpy import assert_that
+from django.test import override_settings
+
+from opening_hours.fake_hauki import FakeHauki
+from opening_hours.hours import get_opening_hours, get_periods_for_resource
+
+
+def call(app, method, url, params=None, data=None):
+    parsed = urlparse(url)
+    body = json.dumps(data).encode("utf-8") if data is not None else b""
+    environ = {
+        "REQUEST_METHOD": method,
+        "PATH_INFO": parsed.path,
+        "QUERY_STRING": "&".join(
+            query for query in [parsed.query, urlencode(params or {})] if query
+        ),
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.input": io.BytesIO(body),
+    }
+    setup_testing_defaults(environ)
+    response = {}
+
+    def start_response(status, headers):
+        response["status"] = int(status.split()[0])
+        response["headers"] = dict(headers)
+
+    response["data"] = json.loads(b"".join(app(environ, start_response)))
+    return response
+
+
+def test_should_serve_paged_opening_hours_that_parse():
+    app = FakeHauki(page_size=1)
+
+    with override_settings(HAUKI_ORIGIN_ID="tvp", HAUKI_API_URL="http://hauki"):
+        with mock.patch(
+            "opening_hours.hours.make_hauki_get_request",
+            side_effect=lambda url, params: call(app, "GET", url, params)["data"],
+        ) as mock_request:
+            days = get_opening_hours(["a", "b"], "2021-01-04", "2021-01-10")
+            periods = get_periods_for_resource("a")
+
+    # One page per resource
+    assert_that(mock_request.call_count).is_equal_to(3)
+    assert_that(days).is_length(14)
+    assert_that([day["origin_id"] for day in days[:7]]).is_equal_to(["a"] * 7)
+    monday = days[0]["times"][0]
+    assert_that(monday.start_time).is_equal_to(periods[0].time_spans[0].start_time)
+    assert_that(days[0]["date"]).is_equal_to(datetime.date(2021, 1, 4))
+
+
+def test_should_generate_the_same_hours_for_the_same_seed():
+    params = {"resource": "tvp:a", "start_date": "2021-01-01", "end_date": "2021-01-31"}
+
+    first = call(FakeHauki(seed=1), "GET", "/v1/opening_hours/", params)
+    second = call(FakeHauki(seed=1), "GET", "/v1/opening_hours/", params)
+
+    assert_that(first["data"]).is_equal_to(second["data"])
+
+
+def test_should_list_and_create_resources():
+    app = FakeHauki(resources=[("tvp", "a"), ("tprek", "1")])
+
+    created = call(
+        app,
+        "POST",
+        "/v1/resource/",
+        data={"origins": [{"data_source": {"id": "tvp"}, "origin_id": "b"}]},
+    )
+    listed = call(app, "GET", "/v1/resource/", {"data_source": "tvp"})
+
+    assert_that(created["status"]).is_equal_to(201)
+    assert_that(created["data"]["id"]).is_equal_to(3)
+    assert_that(listed["data"]["count"]).is_equal_to(2)
+    assert_that(
+        [resource["origins"][0]["origin_id"] for resource in listed["data"]["results"]]
+    ).is_equal_to(["a", "b"])
+
+
+def test_should_inject_errors():
+    app = FakeHauki(error_rate=1, error_status=429)
+
+    response = call(app, "GET", "/v1/resource/")
+
+    assert_that(response["status"]).is_equal_to(429)
+    assert_that(response["headers"]["Retry-After"]).is_equal_to("1")
@@ -0,0 +1,112 @@
+import datetime
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from assertpy import assert_that
+from django.test import override_settings
+
+from opening_hours.hours import get_opening_hours, split_date_range
+
+
+def get_resource_days(origin_id, start_date, end_date):
+    dates = []
+    date = start_date
+    while date <= end_date:
+        dates.append(date)
+        date += datetime.timedelta(days=1)
+    return {
+        "resource": {
+            "id": 1,
+            "timezone": "Europe/Helsinki",
+            "origins": [{"origin_id": origin_id}],
+        },
+        "opening_hours": [
+            {
+                "date": date.isoformat(),
+                "times": [
+                    {
+                        "start_time": "10:00:00",
+                        "end_time": "22:00:00",
+                        "end_time_on_next_day": False,
+                    }
+                ],
+            }
+            for date in dates
+        ],
+    }
+
+
+def mocked_hauki_response(url, params):
+    """One page per resource, linked with next"""
+    query = parse_qs(urlparse(url).query)
+    if params is not None:
+        query.update({key: [value] for key, value in params.items()})
+    resources = query["resource"][0].split(",")
+    page = int(query.get("page", ["0"])[0])
+    start_date = datetime.date.fromisoformat(query["start_date"][0])
+    end_date = datetime.date.fromisoformat(query["end_date"][0])
+    next_url = None
+    if page + 1 < len(resources):
+        next_url = (
+            f"{url.split('?')[0]}?resource={query['resource'][0]}"
+            f"&start_date={start_date}&end_date={end_date}&page={page + 1}"
+        )
+    return {
+        "next": next_url,
+        "results": [
+            get_resource_days(resources[page].split(":")[1], start_date, end_date)
+        ],
+    }
+
+
+def test_split_date_range():
+    ranges = split_date_range(datetime.date(2021, 1, 1), datetime.date(2021, 1, 10), 4)
+
+    assert_that(ranges).is_equal_to(
+        [
+            (datetime.date(2021, 1, 1), datetime.date(2021, 1, 4)),
+            (datetime.date(2021, 1, 5), datetime.date(2021, 1, 8)),
+            (datetime.date(2021, 1, 9), datetime.date(2021, 1, 10)),
+        ]
+    )
+
+
+@override_settings(
+    HAUKI_ORIGIN_ID="tvp",
+    HAUKI_API_URL="url",
+    HAUKI_FETCH_RESOURCE_CHUNK_SIZE=2,
+    HAUKI_FETCH_DATE_RANGE_DAYS=5,
+    HAUKI_FETCH_MAX_WORKERS=3,
+)
+@mock.patch(
+    "opening_hours.hours.make_hauki_get_request", side_effect=mocked_hauki_response
+)
+def test_should_fetch_chunks_and_pages_and_merge_in_order(mock_request):
+    days = get_opening_hours(
+        ["a", "b", "c"], datetime.date(2021, 1, 1), datetime.date(2021, 1, 12)
+    )
+
+    # Two resource chunks by three date ranges, the first chunk has two pages
+    assert_that(mock_request.call_count).is_equal_to(9)
+    assert_that(days).is_length(36)
+    assert_that([day["origin_id"] for day in days]).is_equal_to(
+        ["a"] * 12 + ["b"] * 12 + ["c"] * 12
+    )
+    assert_that([day["date"] for day in days[:12]]).is_equal_to(
+        [datetime.date(2021, 1, day) for day in range(1, 13)]
+    )
+    assert_that(days[0]["times"][0].start_time).is_equal_to(datetime.time(10))
+
+
+@override_settings(HAUKI_ORIGIN_ID="tvp", HAUKI_API_URL="url")
+@mock.patch(
+    "opening_hours.hours.make_hauki_get_request", side_effect=mocked_hauki_response
+)
+def test_should_fetch_short_range_in_one_request(mock_request):
+    days = get_opening_hours("a", "2021-01-01", "2021-01-03")
+
+    assert_that(mock_request.call_count).is_equal_to(1)
+    assert_that(mock_request.call_args[0][1]).is_equal_to(
+        {"start_date": "2021-01-01", "end_date": "2021-01-03"}
+    )
+    assert_that(days).is_length(3)
@@ -0,0 +1,95 @@
+from unittest import mock
+
+import pytest
+import requests
+from assertpy import assert_that
+from django.test import override_settings
+
+from opening_hours.errors import HaukiRequestError
+from opening_hours.hauki_request import (
+    get_backoff_delay,
+    make_hauki_get_request,
+    make_hauki_post_request,
+    send_hauki_request,
+)
+
+
+def get_response(status_code=200, data=None, headers=None):
+    response = mock.Mock()
+    response.status_code = status_code
+    response.ok = status_code < 400
+    response.headers = headers or {}
+    response.json.return_value = data if data is not None else {}
+    return response
+
+
+@pytest.fixture
+def session():
+    with mock.patch("opening_hours.hauki_request.get_hauki_session") as get_session:
+        yield get_session.return_value
+
+
+@pytest.fixture(autouse=True)
+def no_sleep():
+    with mock.patch("opening_hours.hauki_request.time.sleep") as sleep:
+        yield sleep
+
+
+@override_settings(
+    HAUKI_REQUEST_CONNECT_TIMEOUT=2,
+    HAUKI_REQUEST_READ_TIMEOUT=7,
+    HAUKI_REQUEST_MAX_RETRIES=2,
+)
+def test_should_retry_get_after_connection_error(session, no_sleep):
+    session.request.side_effect = [
+        requests.ConnectionError(),
+        get_response(503),
+        get_response(data={"results": []}),
+    ]
+
+    data = make_hauki_get_request("http://hauki/v1/opening_hours/", {"a": "b"})
+
+    assert_that(data).is_equal_to({"results": []})
+    assert_that(session.request.call_count).is_equal_to(3)
+    assert_that(no_sleep.call_count).is_equal_to(2)
+    assert_that(session.request.call_args[1]["timeout"]).is_equal_to((2, 7))
+
+
+@override_settings(HAUKI_REQUEST_MAX_RETRIES=2)
+def test_should_fail_get_when_retries_run_out(session):
+    session.request.side_effect = requests.Timeout()
+
+    with pytest.raises(HaukiRequestError):
+        make_hauki_get_request("http://hauki/v1/opening_hours/", None)
+    assert_that(session.request.call_count).is_equal_to(3)
+
+
+@override_settings(HAUKI_REQUEST_MAX_RETRIES=2)
+def test_should_return_last_response_when_status_retries_run_out(session):
+    session.request.return_value = get_response(503)
+
+    response = send_hauki_request("GET", "http://hauki/v1/resource/")
+
+    assert_that(response.status_code).is_equal_to(503)
+    assert_that(session.request.call_count).is_equal_to(3)
+
+
+@override_settings(HAUKI_REQUEST_MAX_RETRIES=2)
+def test_should_not_retry_post(session):
+    session.request.side_effect = requests.ConnectionError()
+
+    with pytest.raises(HaukiRequestError):
+        make_hauki_post_request("http://hauki/v1/resource/", {"name": "a"})
+    assert_that(session.request.call_count).is_equal_to(1)
+
+
+@override_settings(HAUKI_REQUEST_BACKOFF_FACTOR=1)
+def test_backoff_delay_is_jittered_and_respects_retry_after():
+    delays = [get_backoff_delay(3) for i in range(50)]
+
+    assert_that(delays).is_not_empty()
+    assert_that(max(delays)).is_less_than_or_equal_to(8)
+    assert_that(len(set(delays))).is_greater_than(1)
+    assert_that(
+        get_backoff_delay(0, get_response(429, headers={"Retry-After": "2"}))
+    ).is_greater_than_or_equal_to(2)
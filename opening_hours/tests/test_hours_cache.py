@@ -0,0 +1,134 @@
+import datetime
+from unittest import mock
+
+import pytest
+from assertpy import assert_that
+from django.core.cache import caches
+
+from opening_hours.hours import TimeElement
+from opening_hours.hours_cache import OpeningHoursCache
+
+START = datetime.date(2021, 1, 1)
+
+
+def get_mocked_days(resources, start_date, end_date, hauki_origin_id=None):
+    days = []
+    for resource in resources:
+        date = start_date
+        while date <= end_date:
+            days.append(
+                {
+                    "timezone": None,
+                    "resource_id": f"{hauki_origin_id}:{resource}",
+                    "origin_id": resource,
+                    "date": date,
+                    "times": [
+                        TimeElement(
+                            start_time=datetime.time(hour=10),
+                            end_time=datetime.time(hour=22),
+                            end_time_on_next_day=False,
+                        )
+                    ],
+                }
+            )
+            date += datetime.timedelta(days=1)
+    return days
+
+
+@pytest.fixture(autouse=True)
+def clear_opening_hours_cache():
+    caches["opening_hours"].clear()
+    yield
+    caches["opening_hours"].clear()
+
+
+@mock.patch("opening_hours.hours.get_opening_hours", side_effect=get_mocked_days)
+def test_should_serve_sub_range_from_cache(mock_get_opening_hours):
+    hours_cache = OpeningHoursCache(timeout=60)
+
+    hours_cache.get_opening_hours("abc", START, START + datetime.timedelta(days=9))
+    days = hours_cache.get_opening_hours(
+        "abc", START + datetime.timedelta(days=2), START + datetime.timedelta(days=4)
+    )
+
+    assert_that(mock_get_opening_hours.call_count).is_equal_to(1)
+    assert_that([day["date"] for day in days]).is_equal_to(
+        [START + datetime.timedelta(days=i) for i in range(2, 5)]
+    )
+    assert_that(days[0]["times"]).is_length(1)
+
+
+@mock.patch("opening_hours.hours.get_opening_hours", side_effect=get_mocked_days)
+def test_should_fetch_only_missing_resources_and_dates(mock_get_opening_hours):
+    hours_cache = OpeningHoursCache(timeout=60)
+
+    hours_cache.get_opening_hours("abc", START, START + datetime.timedelta(days=4))
+    hours_cache.get_opening_hours(
+        ["abc", "def"], START, START + datetime.timedelta(days=3)
+    )
+    days = hours_cache.get_opening_hours(
+        ["abc", "def"], START, START + datetime.timedelta(days=6)
+    )
+
+    second_call, third_call = mock_get_opening_hours.call_args_list[1:]
+    assert_that(second_call[0][:3]).is_equal_to(
+        (["def"], START, START + datetime.timedelta(days=3))
+    )
+    assert_that(third_call[0][:3]).is_equal_to(
+        (
+            ["abc", "def"],
+            START + datetime.timedelta(days=4),
+            START + datetime.timedelta(days=6),
+        )
+    )
+    assert_that(days).is_length(14)
+    assert_that(days[0]["origin_id"]).is_equal_to("abc")
+    assert_that(days[7]["origin_id"]).is_equal_to("def")
+
+
+@mock.patch("opening_hours.hours.get_opening_hours", side_effect=get_mocked_days)
+def test_should_refetch_only_invalidated_resource(mock_get_opening_hours):
+    hours_cache = OpeningHoursCache(timeout=60)
+
+    hours_cache.get_opening_hours(["abc", "def"], START, START)
+    hours_cache.get_opening_hours(["abc", "def"], START, START)
+    hours_cache.invalidate("abc")
+    hours_cache.get_opening_hours(["abc", "def"], START, START)
+
+    assert_that(mock_get_opening_hours.call_count).is_equal_to(2)
+    assert_that(mock_get_opening_hours.call_args[0][0]).is_equal_to(["abc"])
+
+
+@mock.patch("opening_hours.hours.get_opening_hours", side_effect=get_mocked_days)
+def test_should_refetch_all_resources_after_invalidating_everything(
+    mock_get_opening_hours,
+):
+    hours_cache = OpeningHoursCache(timeout=60)
+
+    hours_cache.get_opening_hours(["abc", "def"], START, START)
+    hours_cache.invalidate()
+    hours_cache.get_opening_hours(["abc", "def"], START, START)
+
+    assert_that(mock_get_opening_hours.call_count).is_equal_to(2)
+    assert_that(mock_get_opening_hours.call_args[0][0]).is_equal_to(["abc", "def"])
+
+
+@mock.patch("opening_hours.hours.get_opening_hours", side_effect=get_mocked_days)
+def test_should_not_cache_when_timeout_is_zero(mock_get_opening_hours):
+    hours_cache = OpeningHoursCache(timeout=0)
+
+    hours_cache.get_opening_hours(["abc"], START, START)
+    hours_cache.get_opening_hours(["abc"], START, START)
+
+    assert_that(mock_get_opening_hours.call_count).is_equal_to(2)
+
+
+@mock.patch("opening_hours.hours.get_periods_for_resource", return_value=[])
+def test_should_cache_periods_per_resource(mock_get_periods):
+    hours_cache = OpeningHoursCache(timeout=60)
+
+    hours_cache.get_periods_for_resource("abc")
+    hours_cache.get_periods_for_resource("abc")
+    hours_cache.get_periods_for_resource("def")
+
+    assert_that(mock_get_periods.call_count).is_equal_to(2)
@@ -6,6 +6,7 @@ from django.conf import settings
 from django.test.testcases import TestCase
 from django.utils.timezone import get_default_timezone
 
+from opening_hours.enums import State
 from opening_hours.hours import TimeElement
 from opening_hours.utils.opening_hours_client import OpeningHoursClient
 from reservation_units.tests.factories import ReservationUnitFactory
@@ -188,6 +189,75 @@ class OpeningHoursClientTestCase(TestCase):
         assert_that(date).is_none()
         assert_that(times).is_none()
 
+    def test_is_resource_open_over_adjacent_opening_hours(self, mock):
+        opening_hours = self.get_mocked_opening_hours()
+        opening_hours[0]["times"] = [
+            TimeElement(
+                start_time=datetime.time(hour=10),
+                end_time=datetime.time(hour=12),
+                end_time_on_next_day=False,
+            ),
+            TimeElement(
+                start_time=datetime.time(hour=12),
+                end_time=datetime.time(hour=14),
+                end_time_on_next_day=False,
+            ),
+        ]
+        mock.return_value = opening_hours
+        client = OpeningHoursClient(
+            str(self.reservation_unit.uuid), DATES[0], DATES[1], single=True
+        )
+        begin = DEFAULT_TIMEZONE.localize(datetime.datetime(2021, 1, 1, 11))
+        end = DEFAULT_TIMEZONE.localize(datetime.datetime(2021, 1, 1, 13))
+
+        is_open = client.is_resource_open(str(self.reservation_unit.uuid), begin, end)
+        assert_that(is_open).is_true()
+
+    def test_is_resource_open_does_not_merge_open_and_closed_hours(self, mock):
+        opening_hours = self.get_mocked_opening_hours()
+        opening_hours[0]["times"] = [
+            TimeElement(
+                start_time=datetime.time(hour=10),
+                end_time=datetime.time(hour=12),
+                end_time_on_next_day=False,
+                resource_state=State.OPEN,
+            ),
+            TimeElement(
+                start_time=datetime.time(hour=12),
+                end_time=datetime.time(hour=14),
+                end_time_on_next_day=False,
+                resource_state=State.CLOSED,
+            ),
+        ]
+        mock.return_value = opening_hours
+        client = OpeningHoursClient(
+            str(self.reservation_unit.uuid), DATES[0], DATES[1], single=True
+        )
+        begin = DEFAULT_TIMEZONE.localize(datetime.datetime(2021, 1, 1, 11))
+        end = DEFAULT_TIMEZONE.localize(datetime.datetime(2021, 1, 1, 13))
+
+        is_open = client.is_resource_open(str(self.reservation_unit.uuid), begin, end)
+        assert_that(is_open).is_false()
+
+    def test_next_opening_times_skips_days_without_opening_hours(self, mock):
+        opening_hours = self.get_mocked_opening_hours()
+        opening_hours[0]["times"] = []
+        mock.return_value = opening_hours
+        client = OpeningHoursClient(
+            str(self.reservation_unit.uuid), DATES[0], DATES[1], single=True
+        )
+        date, times = client.next_opening_times(
+            str(self.reservation_unit.uuid), DATES[0]
+        )
+
+        assert_that(date).is_equal_to(DATES[1])
+        assert_that(times).is_length(1)
+        assert_that(
+            client.get_opening_hours_for_date_range(
+                str(self.reservation_unit.uuid), DATES[0], DATES[1]
+            )
+        ).is_equal_to({DATES[1]: times})
+
     def test_default_origin_id_is_used(self, mock):
         OpeningHoursClient(
             str(self.reservation_unit.uuid),
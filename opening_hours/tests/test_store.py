@@ -0,0 +1,155 @@
+import datetime
+from unittest import mock
+
+import pytest
+from assertpy import assert_that
+from django.test import override_settings
+from django.utils import timezone
+
+from opening_hours.hours import TimeElement
+from opening_hours.models import OpeningHoursResource, OpeningTime
+from opening_hours.store import get_opening_hours, sync_opening_hours
+from reservation_units.tests.factories import ReservationUnitFactory
+
+MODIFIED = "2021-12-01T12:00:00+02:00"
+
+
+def get_hauki_resources_response(reservation_units, modified=MODIFIED):
+    return {
+        "next": None,
+        "results": [
+            {
+                "id": i + 1,
+                "timezone": "Europe/Helsinki",
+                "modified": modified,
+                "origins": [
+                    {
+                        "data_source": {"id": "test-tvp"},
+                        "origin_id": str(reservation_unit.uuid),
+                    }
+                ],
+            }
+            for i, reservation_unit in enumerate(reservation_units)
+        ],
+    }
+
+
+def get_mocked_days(resources, start_date, end_date, hauki_origin_id=None):
+    return [
+        {
+            "timezone": None,
+            "resource_id": 1,
+            "origin_id": resource,
+            "date": start_date + datetime.timedelta(days=i),
+            "times": [
+                TimeElement(
+                    start_time=datetime.time(hour=10),
+                    end_time=datetime.time(hour=22),
+                    end_time_on_next_day=False,
+                    resource_state="open",
+                    periods=[1],
+                )
+            ]
+            if i % 2 == 0
+            else [],
+        }
+        for resource in resources
+        for i in range((end_date - start_date).days + 1)
+    ]
+
+
+@pytest.mark.django_db
+@override_settings(
+    HAUKI_API_URL="url", HAUKI_OPENING_HOURS_SYNC_DAYS=9, HAUKI_ORIGIN_ID="test-tvp"
+)
+@mock.patch("opening_hours.hours.get_opening_hours", side_effect=get_mocked_days)
+@mock.patch("opening_hours.store.make_hauki_get_request")
+def test_should_sync_only_changed_resources(mock_resources, mock_get_opening_hours):
+    reservation_units = ReservationUnitFactory.create_batch(2)
+    mock_resources.return_value = get_hauki_resources_response(reservation_units)
+
+    assert_that(sync_opening_hours()).is_equal_to(2)
+    assert_that(sync_opening_hours()).is_equal_to(0)
+
+    mock_resources.return_value = get_hauki_resources_response(
+        reservation_units, modified="2021-12-02T12:00:00+02:00"
+    )
+    assert_that(sync_opening_hours()).is_equal_to(2)
+    assert_that(sync_opening_hours(force=True)).is_equal_to(2)
+
+    assert_that(mock_get_opening_hours.call_count).is_equal_to(3)
+    assert_that(OpeningHoursResource.objects.count()).is_equal_to(2)
+    # Every other day of the ten synced days is open
+    assert_that(OpeningTime.objects.count()).is_equal_to(10)
+
+
+@pytest.mark.django_db
+@override_settings(
+    HAUKI_API_URL="url",
+    HAUKI_OPENING_HOURS_SYNC_DAYS=9,
+    HAUKI_OPENING_HOURS_SYNC_ENABLED=True,
+    HAUKI_ORIGIN_ID="test-tvp",
+)
+@mock.patch("opening_hours.hours.get_opening_hours", side_effect=get_mocked_days)
+@mock.patch("opening_hours.store.make_hauki_get_request")
+def test_should_read_synced_opening_hours_from_table(
+    mock_resources, mock_get_opening_hours
+):
+    reservation_unit = ReservationUnitFactory()
+    mock_resources.return_value = get_hauki_resources_response([reservation_unit])
+    sync_opening_hours()
+    mock_get_opening_hours.reset_mock()
+    today = timezone.localdate()
+
+    days = get_opening_hours(
+        str(reservation_unit.uuid), today, today + datetime.timedelta(days=3)
+    )
+
+    mock_get_opening_hours.assert_not_called()
+    assert_that(days).is_length(4)
+    assert_that(days[0]["origin_id"]).is_equal_to(str(reservation_unit.uuid))
+    assert_that(days[0]["resource_id"]).is_equal_to(1)
+    assert_that(days[0]["timezone"].zone).is_equal_to("Europe/Helsinki")
+    assert_that(days[0]["times"]).is_equal_to(
+        [
+            TimeElement(
+                start_time=datetime.time(hour=10),
+                end_time=datetime.time(hour=22),
+                end_time_on_next_day=False,
+                resource_state="open",
+            )
+        ]
+    )
+    assert_that(days[0]["times"][0].periods).is_equal_to([1])
+    assert_that(days[1]["times"]).is_empty()
+
+
+@pytest.mark.django_db
+@override_settings(
+    HAUKI_API_URL="url",
+    HAUKI_OPENING_HOURS_SYNC_DAYS=9,
+    HAUKI_OPENING_HOURS_SYNC_ENABLED=True,
+    HAUKI_ORIGIN_ID="test-tvp",
+)
+@mock.patch("opening_hours.hours.get_opening_hours", side_effect=get_mocked_days)
+@mock.patch("opening_hours.store.make_hauki_get_request")
+def test_should_fetch_resources_not_covered_by_the_table(
+    mock_resources, mock_get_opening_hours
+):
+    reservation_unit = ReservationUnitFactory()
+    mock_resources.return_value = get_hauki_resources_response([reservation_unit])
+    sync_opening_hours()
+    mock_get_opening_hours.reset_mock()
+    today = timezone.localdate()
+
+    days = get_opening_hours(
+        ["other", str(reservation_unit.uuid)],
+        today,
+        today + datetime.timedelta(days=20),
+    )
+
+    assert_that(mock_get_opening_hours.call_args[0][0]).is_equal_to(
+        ["other", str(reservation_unit.uuid)]
+    )
+    assert_that(days).is_length(42)
+    assert_that(days[0]["origin_id"]).is_equal_to("other")
@@ -0,0 +1,42 @@
+import datetime
+import pickle
+from dataclasses import FrozenInstanceError
+
+import pytest
+import pytz
+from assertpy import assert_that
+
+from opening_hours.hours import TimeElement, parse_date, parse_time
+from opening_hours.utils.opening_hours_client import localize
+
+
+def test_time_element_is_slotted_and_frozen():
+    time_element = TimeElement(
+        start_time=parse_time("10:00:00"),
+        end_time=parse_time("22:00:00"),
+        end_time_on_next_day=False,
+        periods=[1],
+    )
+
+    assert_that(hasattr(time_element, "__dict__")).is_false()
+    assert_that(pickle.loads(pickle.dumps(time_element))).is_equal_to(time_element)
+    with pytest.raises(FrozenInstanceError):
+        time_element.start_time = datetime.time(hour=11)
+
+
+def test_parsed_dates_and_times_are_shared():
+    assert_that(parse_date("2021-03-28")).is_equal_to(datetime.date(2021, 3, 28))
+    assert_that(parse_time("10:30:00")).is_same_as(parse_time("10:30:00"))
+
+
+def test_localize_matches_pytz_over_dst_change():
+    timezone = pytz.timezone("Europe/Helsinki")
+    for date in [datetime.date(2021, 3, 27), datetime.date(2021, 3, 28)]:
+        for hour in range(24):
+            time = datetime.time(hour=hour, minute=30)
+            expected = timezone.localize(datetime.datetime.combine(date, time))
+
+            assert_that(localize(timezone, date, time)).is_equal_to(expected)
+            assert_that(localize(timezone, date, time).utcoffset()).is_equal_to(
+                expected.utcoffset()
+            )
@@ -1,4 +1,6 @@
 import datetime
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
 from typing import Dict, List, Union
 
 import pytz
@@ -6,17 +8,42 @@ from django.conf import settings
 from django.utils.timezone import get_default_timezone
 
 from opening_hours.decorators import datetime_args_to_default_timezone
-from opening_hours.hours import (
-    Period,
-    TimeElement,
+from opening_hours.hours import Period, TimeElement
+from opening_hours.hours_cache import (
     get_opening_hours,
     get_periods_for_resource,
+    opening_hours_cache,
 )
 
 TIMEZONE = get_default_timezone()
 
 
+@lru_cache(maxsize=4096)
+def _get_day_tzinfo(timezone, date: datetime.date):
+    """The tzinfo of the timezone on the date, or None if the UTC offset changes
+    during the day. Localizing with pytz is slow, so the times of a day reuse
+    the tzinfo localized once."""
+    day_start = timezone.localize(datetime.datetime(date.year, date.month, date.day))
+    next_day = date + datetime.timedelta(days=1)
+    day_end = timezone.localize(
+        datetime.datetime(next_day.year, next_day.month, next_day.day)
+    )
+    if day_start.utcoffset() != day_end.utcoffset():
+        return None
+    return day_start.tzinfo
+
+
+def localize(timezone, date: datetime.date, time: datetime.time):
+    naive = datetime.datetime(date.year, date.month, date.day, time.hour, time.minute)
+    tzinfo = _get_day_tzinfo(timezone, date)
+    if tzinfo is None:
+        return timezone.localize(naive)
+    return naive.replace(tzinfo=tzinfo)
+
+
 class OpeningHours:
+    __slots__ = ("start_time", "end_time", "resource_state", "periods")
+
     start_time: datetime.datetime
     end_time: datetime.datetime
     resource_state: str
@@ -43,26 +70,10 @@ class OpeningHours:
             type(pytz.UTC), pytz.tzinfo.DstTzInfo, pytz.tzinfo.StaticTzInfo
         ],
     ):
-        start_time = timezone.localize(
-            datetime.datetime(
-                date.year,
-                date.month,
-                date.day,
-                time_element.start_time.hour,
-                time_element.end_time.minute,
-            )
-        )
+        start_time = localize(timezone, date, time_element.start_time)
         if time_element.end_time_on_next_day:
             date += datetime.timedelta(days=1)
-        end_time = timezone.localize(
-            datetime.datetime(
-                date.year,
-                date.month,
-                date.day,
-                time_element.end_time.hour,
-                time_element.end_time.minute,
-            )
-        )
+        end_time = localize(timezone, date, time_element.end_time)
         return OpeningHours(
             start_time=start_time.astimezone(TIMEZONE),
             end_time=end_time.astimezone(TIMEZONE),
@@ -96,6 +107,9 @@ class OpeningHoursClient:
 
         self.resources = resources
         self.opening_hours = {}
+        self._dates = {}
+        self._interval_starts = {}
+        self._interval_ends = {}
         if init_opening_hours:
             self._init_opening_hours_structure()
             self._fetch_opening_hours(start, end)
@@ -119,16 +133,21 @@ class OpeningHoursClient:
             resource_id: { datetime.date: [OpeningHours, ...
             ...
         }
+        Only the dates that have opening hours are stored. The dates of each
+        resource are also kept sorted in _dates, and the opening hours of each
+        resource as sorted, merged intervals in _interval_starts and
+        _interval_ends, so the lookups can bisect them. The intervals are kept
+        per resource state, only windows with the same state are merged.
         """
         self.opening_hours = {res_id: {} for res_id in self.resources}
-        running_date = self.start
-        while running_date <= self.end:
-            for res_id in self.resources:
-                self.opening_hours[res_id].update({running_date: []})
-            running_date += datetime.timedelta(days=1)
+        self._dates = {res_id: [] for res_id in self.resources}
+        self._interval_starts = {res_id: {} for res_id in self.resources}
+        self._interval_ends = {res_id: {} for res_id in self.resources}
 
     def _fetch_opening_hours(self, start: datetime.date, end: datetime.date):
         for hour in get_opening_hours(self.resources, start, end, self.hauki_origin_id):
+            if not hour["times"]:
+                continue
             res_id = hour["origin_id"]
             timezone = hour["timezone"]
             date = hour["date"]
@@ -139,9 +158,37 @@ class OpeningHoursClient:
                 )
                 opening_hours.append(opening_times)
 
-            self.opening_hours[res_id][date].extend(opening_hours)
+            self.opening_hours.setdefault(res_id, {}).setdefault(date, []).extend(
+                opening_hours
+            )
+        for res_id in self.opening_hours:
+            self._index_resource(res_id)
+
+    def _index_resource(self, resource: str):
+        times_for_resource = self.opening_hours[resource]
+        self._dates[resource] = sorted(times_for_resource)
+
+        interval_starts = {}
+        interval_ends = {}
+        for time in sorted(
+            (time for times in times_for_resource.values() for time in times),
+            key=lambda time: time.start_time,
+        ):
+            state = getattr(time.resource_state, "value", time.resource_state)
+            starts = interval_starts.setdefault(state, [])
+            ends = interval_ends.setdefault(state, [])
+            # Overlapping and adjacent opening hours in the same state are merged
+            if ends and time.start_time <= ends[-1]:
+                ends[-1] = max(ends[-1], time.end_time)
+            else:
+                starts.append(time.start_time)
+                ends.append(time.end_time)
+        self._interval_starts[resource] = interval_starts
+        self._interval_ends[resource] = interval_ends
 
     def refresh_opening_hours(self):
+        for resource in self.resources:
+            opening_hours_cache.invalidate(resource, self.hauki_origin_id)
         self._init_opening_hours_structure()
         self._fetch_opening_hours(self.start, self.end)
 
@@ -153,12 +200,11 @@ class OpeningHoursClient:
     def get_opening_hours_for_date_range(
         self, resource: str, date_start: datetime.date, date_end: datetime.date
     ) -> Dict[datetime.date, List[TimeElement]]:
-        opening_hours = {
-            date: times
-            for date, times in self.opening_hours.get(resource, {}).items()
-            if date >= date_start and date <= date_end and times
-        }
-        return opening_hours
+        times_for_resource = self.opening_hours.get(resource, {})
+        dates = self._dates.get(resource, [])
+        first = bisect_left(dates, date_start)
+        last = bisect_right(dates, date_end)
+        return {date: times_for_resource[date] for date in dates[first:last]}
 
     def get_resource_periods(self, resource) -> List[Period]:
         return self.periods.get(resource)
@@ -167,24 +213,21 @@ class OpeningHoursClient:
     def is_resource_open(
         self, resource: str, start_time: datetime.datetime, end_time: datetime.datetime
     ) -> bool:
-        times = self.get_opening_hours_for_resource(resource, start_time.date())
-        for time in times:
-            if time.start_time <= start_time and time.end_time >= end_time:
+        """Whether the resource is open for the whole of [start_time, end_time)"""
+        interval_ends = self._interval_ends.get(resource, {})
+        for state, interval_starts in self._interval_starts.get(resource, {}).items():
+            index = bisect_right(interval_starts, start_time) - 1
+            if index >= 0 and interval_ends[state][index] >= end_time:
                 return True
         return False
 
     def next_opening_times(
         self, resource: str, date: datetime.date
     ) -> (datetime.date, [OpeningHours]):
-        times_for_resource = self.opening_hours.get(resource, {})
-        times = times_for_resource.get(date)
-
-        running_date = date
-        while not times:
-            dates = [dt for dt in times_for_resource.keys() if dt > running_date]
-            running_date = min(dates) if dates else None
-            if not running_date:
-                break
-            times = times_for_resource.get(running_date)
-
-        return running_date, times
+        """The first date on or after the given date that the resource has
+        opening hours on, and the opening hours of that date"""
+        dates = self._dates.get(resource, [])
+        index = bisect_left(dates, date)
+        if index == len(dates):
+            return None, None
+        return dates[index], self.opening_hours[resource][dates[index]]
@@ -318,11 +318,16 @@ class AllocationRequestPermission(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
 
-        return can_allocate_allocation_request(request.user, allocation_request)
+        return can_allocate_allocation_request(
+            request.user, allocation_request.application_round.service_sector
+        )
 
     def has_permission(self, request, view):
         if request.method in permissions.SAFE_METHODS:
             return True
+        if view.action == "cancel":
+            # Checked against the allocation request in has_object_permission
+            return request.user.is_authenticated
 
         application_round_id = request.data.get("application_round_id")
         try:
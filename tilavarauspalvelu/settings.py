@@ -180,6 +180,21 @@ env = environ.Env(
     HAUKI_ORGANISATION_ID=(str, None),
     HAUKI_EXPORTS_ENABLED=(bool, False),
     HAUKI_API_KEY=(str, None),
+    HAUKI_OPENING_HOURS_CACHE_TIMEOUT=(int, 60),
+    HAUKI_REQUEST_CONNECT_TIMEOUT=(float, 3.05),
+    HAUKI_REQUEST_READ_TIMEOUT=(float, 15.0),
+    HAUKI_REQUEST_MAX_RETRIES=(int, 3),
+    HAUKI_REQUEST_BACKOFF_FACTOR=(float, 0.5),
+    HAUKI_REQUEST_POOL_SIZE=(int, 10),
+    HAUKI_FETCH_RESOURCE_CHUNK_SIZE=(int, 50),
+    HAUKI_FETCH_DATE_RANGE_DAYS=(int, 92),
+    HAUKI_FETCH_MAX_WORKERS=(int, 4),
+    HAUKI_OPENING_HOURS_SYNC_ENABLED=(bool, False),
+    HAUKI_OPENING_HOURS_SYNC_INTERVAL=(int, 15 * 60),
+    HAUKI_OPENING_HOURS_SYNC_DAYS=(int, 365),
+    HAUKI_OPENING_HOURS_SYNC_MAX_AGE=(int, 24 * 60 * 60),
+    HAUKI_USE_FAKE_SERVER=(bool, False),
+    HAUKI_FAKE_SERVER_ADDRESS=(str, "localhost:8701"),
     CSRF_TRUSTED_ORIGINS=(list, []),
     MULTI_PROXY_HEADERS=(bool, False),
     ICAL_HASH_SECRET=(str, ""),
@@ -196,6 +211,17 @@ env = environ.Env(
     CELERY_QUEUE_FOLDER_OUT=(str, "./broker/queue/"),
     CELERY_QUEUE_FOLDER_IN=(str, "./broker/queue/"),
     CELERY_PROCESSED_FOLDER=(str, "./broker/processed/"),
+    # Allocation solver
+    ALLOCATION_SOLVER_NUM_SEARCH_WORKERS=(int, os.cpu_count() or 1),
+    ALLOCATION_SOLVER_MAX_TIME_IN_SECONDS=(int, 600),
+    ALLOCATION_SOLVER_RELATIVE_GAP_LIMIT=(float, 0.0),
+    ALLOCATION_SOLVER_RANDOM_SEED=(int, None),
+    ALLOCATION_SOLVER_NUM_PROCESSES=(int, os.cpu_count() or 1),
+    ALLOCATION_SOLVER_GREEDY_HINTS=(bool, True),
+    ALLOCATION_CELERY_QUEUE=(str, "allocation"),
+    ALLOCATION_TASK_SOFT_TIME_LIMIT=(int, 60 * 60),
+    ALLOCATION_SNAPSHOT_DIR=(str, None),
+    ALLOCATION_PREVIEW_CACHE_TIMEOUT=(int, 60 * 60),
     # Verkkokauppa integration
     VERKKOKAUPPA_API_KEY=(str, None),
     VERKKOKAUPPA_PRODUCT_API_URL=(str, None),
@@ -215,6 +241,16 @@ LOGGING = LOGGING_ELASTIC if env("ELASTIC_APM_SERVER_URL") else LOGGING_CONSOLE
 DATABASES = {"default": env.db()}
 DATABASES["default"]["CONN_MAX_AGE"] = env("CONN_MAX_AGE")
 
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    # Opening hours read from Hauki, kept separately in each process
+    "opening_hours": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "opening_hours",
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    },
+}
+
 # SECURITY WARNING: keep the secret key used in production secret!
 # Using hard coded in dev environments if not defined.
 if DEBUG is True and env("SECRET_KEY") == "":
@@ -244,6 +280,42 @@ HAUKI_ORGANISATION_ID = env("HAUKI_ORGANISATION_ID")
 HAUKI_ADMIN_UI_URL = env("HAUKI_ADMIN_UI_URL")
 HAUKI_EXPORTS_ENABLED = env("HAUKI_EXPORTS_ENABLED")
 HAUKI_API_KEY = env("HAUKI_API_KEY")
+# Local stand-in for Hauki, run with manage.py run_fake_hauki
+HAUKI_FAKE_SERVER_ADDRESS = env("HAUKI_FAKE_SERVER_ADDRESS")
+if env("HAUKI_USE_FAKE_SERVER"):
+    HAUKI_API_URL = f"http://{HAUKI_FAKE_SERVER_ADDRESS}"
+    HAUKI_API_KEY = HAUKI_API_KEY or "fake"
+# Seconds opening hours and periods read from Hauki are cached in each process, 0 disables
+HAUKI_OPENING_HOURS_CACHE_TIMEOUT = env("HAUKI_OPENING_HOURS_CACHE_TIMEOUT")
+HAUKI_REQUEST_CONNECT_TIMEOUT = env("HAUKI_REQUEST_CONNECT_TIMEOUT")
+HAUKI_REQUEST_READ_TIMEOUT = env("HAUKI_REQUEST_READ_TIMEOUT")
+# Retries of GET and PUT requests, waiting up to backoff factor * 2^n seconds
+HAUKI_REQUEST_MAX_RETRIES = env("HAUKI_REQUEST_MAX_RETRIES")
+HAUKI_REQUEST_BACKOFF_FACTOR = env("HAUKI_REQUEST_BACKOFF_FACTOR")
+HAUKI_REQUEST_POOL_SIZE = env("HAUKI_REQUEST_POOL_SIZE")
+# Opening hours are fetched in chunks of resources and days, several at a time
+HAUKI_FETCH_RESOURCE_CHUNK_SIZE = env("HAUKI_FETCH_RESOURCE_CHUNK_SIZE")
+HAUKI_FETCH_DATE_RANGE_DAYS = env("HAUKI_FETCH_DATE_RANGE_DAYS")
+HAUKI_FETCH_MAX_WORKERS = env("HAUKI_FETCH_MAX_WORKERS")
+# Opening hours are read from a table synced from Hauki every interval seconds
+HAUKI_OPENING_HOURS_SYNC_ENABLED = env("HAUKI_OPENING_HOURS_SYNC_ENABLED")
+HAUKI_OPENING_HOURS_SYNC_INTERVAL = env("HAUKI_OPENING_HOURS_SYNC_INTERVAL")
+HAUKI_OPENING_HOURS_SYNC_DAYS = env("HAUKI_OPENING_HOURS_SYNC_DAYS")
+# Seconds after which a resource is synced even if Hauki doesn't show it modified
+HAUKI_OPENING_HOURS_SYNC_MAX_AGE = env("HAUKI_OPENING_HOURS_SYNC_MAX_AGE")
+
+ALLOCATION_SOLVER_NUM_SEARCH_WORKERS = env("ALLOCATION_SOLVER_NUM_SEARCH_WORKERS")
+ALLOCATION_SOLVER_MAX_TIME_IN_SECONDS = env("ALLOCATION_SOLVER_MAX_TIME_IN_SECONDS")
+ALLOCATION_SOLVER_RELATIVE_GAP_LIMIT = env("ALLOCATION_SOLVER_RELATIVE_GAP_LIMIT")
+ALLOCATION_SOLVER_RANDOM_SEED = env("ALLOCATION_SOLVER_RANDOM_SEED")
+ALLOCATION_SOLVER_NUM_PROCESSES = env("ALLOCATION_SOLVER_NUM_PROCESSES")
+ALLOCATION_SOLVER_GREEDY_HINTS = env("ALLOCATION_SOLVER_GREEDY_HINTS")
+ALLOCATION_CELERY_QUEUE = env("ALLOCATION_CELERY_QUEUE")
+ALLOCATION_TASK_SOFT_TIME_LIMIT = env("ALLOCATION_TASK_SOFT_TIME_LIMIT")
+# Directory to which the data of every allocation is exported for replaying
+ALLOCATION_SNAPSHOT_DIR = env("ALLOCATION_SNAPSHOT_DIR")
+# Seconds an allocation preview is kept in the cache for identical input
+ALLOCATION_PREVIEW_CACHE_TIMEOUT = env("ALLOCATION_PREVIEW_CACHE_TIMEOUT")
 
 VERKKOKAUPPA_API_KEY = env("VERKKOKAUPPA_API_KEY")
 VERKKOKAUPPA_PRODUCT_API_URL = env("VERKKOKAUPPA_PRODUCT_API_URL")
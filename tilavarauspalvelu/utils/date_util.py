@@ -1,4 +1,6 @@
 import datetime
+from functools import lru_cache
+from typing import List, Tuple
 
 
 class InvalidWeekdayException(Exception):
@@ -29,3 +31,75 @@ def previous_or_current_matching_weekday(
     if days_ahead > 0:  # Target day already happened this week
         days_ahead -= 7
     return d + datetime.timedelta(days_ahead)
+
+
+def _includes_last_day(begin_time: datetime.time, end_time: datetime.time) -> bool:
+    # The series ends at end_time of the last matching day, seconds are ignored
+    return (begin_time.hour, begin_time.minute) <= (end_time.hour, end_time.minute)
+
+
+@lru_cache(maxsize=4096)
+def count_weekly_occurrences(
+    begin: datetime.date,
+    end: datetime.date,
+    weekday: int,
+    begin_time: datetime.time,
+    end_time: datetime.time,
+    interval: int = 1,
+) -> int:
+    """Number of dates weekly_occurrences returns for the same arguments"""
+    first = next_or_current_matching_weekday(begin, weekday)
+    last = previous_or_current_matching_weekday(end, weekday)
+    if first > last:
+        return 1
+
+    count = (last - first).days // (7 * interval) + 1
+    last_occurrence = first + datetime.timedelta(weeks=(count - 1) * interval)
+    if last_occurrence == last and not _includes_last_day(begin_time, end_time):
+        count -= 1
+    # The first matching day is always an occurrence, like dtstart of a recurrence
+    return max(count, 1)
+
+
+@lru_cache(maxsize=4096)
+def _weekly_occurrences(
+    begin: datetime.date,
+    end: datetime.date,
+    weekday: int,
+    begin_time: datetime.time,
+    end_time: datetime.time,
+    interval: int,
+) -> Tuple[datetime.datetime, ...]:
+    first = datetime.datetime.combine(
+        next_or_current_matching_weekday(begin, weekday),
+        datetime.time(hour=begin_time.hour, minute=begin_time.minute),
+    )
+    step = datetime.timedelta(weeks=interval)
+    return tuple(
+        first + step * week
+        for week in range(
+            count_weekly_occurrences(
+                begin, end, weekday, begin_time, end_time, interval
+            )
+        )
+    )
+
+
+def weekly_occurrences(
+    begin: datetime.date,
+    end: datetime.date,
+    weekday: int,
+    begin_time: datetime.time,
+    end_time: datetime.time,
+    interval: int = 1,
+) -> List[datetime.datetime]:
+    """Start times of a weekly series on the weekday between begin and end.
+
+    Gives the same dates as a weekly django-recurrence rule starting on the first
+    matching day and ending at end_time of the last matching day, with interval
+    2 for biweekly series. Results are cached, since the same series are
+    expanded for allocation, aggregate data and reservation counts.
+    """
+    return list(
+        _weekly_occurrences(begin, end, weekday, begin_time, end_time, interval)
+    )
@@ -1,11 +1,14 @@
 import datetime
 
-from pytest import raises
+import recurrence
+from pytest import mark, raises
 
 from tilavarauspalvelu.utils.date_util import (
     InvalidWeekdayException,
+    count_weekly_occurrences,
     next_or_current_matching_weekday,
     previous_or_current_matching_weekday,
+    weekly_occurrences,
 )
 
 
@@ -53,3 +56,66 @@ def test_previous_match_should_validate_weekday():
         previous_or_current_matching_weekday(
             datetime.date(year=2020, month=1, day=1), -1
         )
+
+
+def recurrence_occurrences(begin, end, weekday, begin_time, end_time, interval):
+    first = next_or_current_matching_weekday(begin, weekday)
+    last = previous_or_current_matching_weekday(end, weekday)
+    rule = recurrence.Rule(
+        recurrence.WEEKLY,
+        interval=interval,
+        byday=weekday,
+        until=datetime.datetime.combine(last, end_time),
+    )
+    pattern = recurrence.Recurrence(
+        dtstart=datetime.datetime.combine(first, begin_time), rrules=[rule]
+    )
+    return list(pattern.occurrences())
+
+
+@mark.parametrize(
+    "begin,end,weekday,begin_time,end_time,interval",
+    [
+        # Whole spring, weekly and biweekly
+        ("2021-01-04", "2021-05-31", 0, "10:00", "12:00", 1),
+        ("2021-01-04", "2021-05-31", 2, "10:00", "12:00", 2),
+        # Period ends on the weekday
+        ("2021-01-01", "2021-03-01", 0, "18:30", "20:00", 1),
+        # Series ending at midnight leaves the last day out
+        ("2021-01-01", "2021-03-01", 0, "22:00", "00:00", 1),
+        # Period without the weekday still has the first matching day
+        ("2021-01-05", "2021-01-07", 0, "10:00", "12:00", 1),
+        ("2021-01-04", "2021-01-04", 0, "22:00", "00:00", 2),
+    ],
+)
+def test_weekly_occurrences_should_match_recurrence_rule(
+    begin, end, weekday, begin_time, end_time, interval
+):
+    begin = datetime.date.fromisoformat(begin)
+    end = datetime.date.fromisoformat(end)
+    begin_time = datetime.time.fromisoformat(begin_time)
+    end_time = datetime.time.fromisoformat(end_time)
+    expected = recurrence_occurrences(
+        begin, end, weekday, begin_time, end_time, interval
+    )
+
+    assert (
+        weekly_occurrences(begin, end, weekday, begin_time, end_time, interval)
+        == expected
+    )
+    assert count_weekly_occurrences(
+        begin, end, weekday, begin_time, end_time, interval
+    ) == len(expected)
+
+
+def test_weekly_occurrences_should_return_a_new_list():
+    args = (
+        datetime.date(2021, 1, 4),
+        datetime.date(2021, 2, 1),
+        0,
+        datetime.time(10),
+        datetime.time(12),
+    )
+    weekly_occurrences(*args).clear()
+
+    assert len(weekly_occurrences(*args)) == 5